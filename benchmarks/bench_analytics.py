@@ -0,0 +1,68 @@
+"""
+Compara a análise financeira em Python (um dicionário por linha) com a análise colunar em NumPy.
+
+Uso: python -m benchmarks.bench_analytics [--rows 1000000 10000000] [--repeat 3] [--no-reference]
+"""
+from typing import Any, Callable, Dict, List, Tuple
+from src.analysis.analytics import FinancialAnalytics
+from src.analysis.columnar import ColumnarFinancialAnalytics, LancamentosSnapshot, SNAPSHOT_COLUMNS
+from benchmarks.generators import lancamentos
+import argparse
+import math
+import time
+
+METHODS = ("get_financial_summary", "get_monthly_totals", "get_supplier_analysis")
+
+def best_of(repeat: int, fn: Callable[[], Any]) -> Tuple[float, Any]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def assert_close(expected: Any, actual: Any, path: str = "") -> None:
+    """Compara resultados aceitando a diferença de arredondamento entre somas em float e em centavos."""
+    if isinstance(expected, dict):
+        if expected.keys() != actual.keys():
+            raise AssertionError(f"{path}: chaves diferentes")
+        for key in expected:
+            assert_close(expected[key], actual[key], f"{path}/{key}")
+    elif not math.isclose(expected, actual, rel_tol=1e-9, abs_tol=0.01):
+        raise AssertionError(f"{path}: esperado {expected}, obtido {actual}")
+
+def run(rows: int, repeat: int, reference: bool) -> None:
+    print(f"\n{rows:,} lançamentos")
+    started = time.perf_counter()
+    # Apenas as colunas usadas pelas análises, para que a lista de referência caiba em memória.
+    data: List[Dict[str, Any]] = [{k: l[k] for k in SNAPSHOT_COLUMNS} for l in lancamentos(rows, chave_ratio=0)]
+    print(f"  geração dos dados          {time.perf_counter() - started:>8.2f} s")
+
+    build, snapshot = best_of(1, lambda: LancamentosSnapshot.from_lancamentos(data))
+    print(f"  montagem do snapshot       {build:>8.2f} s  ({snapshot.nbytes / 2**20:.0f} MiB)")
+
+    columnar = ColumnarFinancialAnalytics(None, snapshot=snapshot)
+    python = FinancialAnalytics(None)  # type: ignore[arg-type]
+    if not reference:
+        del data
+
+    for method in METHODS:
+        columnar_time, columnar_result = best_of(repeat, getattr(columnar, method))
+        line = f"  {method:<26} numpy {columnar_time * 1000:>9.1f} ms"
+        if reference:
+            python_time, python_result = best_of(repeat, lambda: getattr(python, method)(data))
+            assert_close(python_result, columnar_result, method)
+            line += f"   python {python_time * 1000:>9.1f} ms   {python_time / columnar_time:>6.1f}x"
+        print(line)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compara a análise financeira em Python com a versão colunar.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-reference", action="store_true", help="Não executa os laços em Python (economiza memória).")
+    args = parser.parse_args()
+    for rows in args.rows:
+        run(rows, args.repeat, not args.no_reference)
+
+if __name__ == "__main__":
+    main()
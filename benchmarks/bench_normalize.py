@@ -0,0 +1,166 @@
+"""
+Compara o banco antes e depois da migração 8 (loja e fornecedor pelos ids dos cadastros):
+tamanho do arquivo e das tabelas de lançamentos e latência das consultas mais usadas.
+
+O banco "antes" é montado com as migrações 1 a 7 e carregado direto pelo sqlite3; as consultas
+dele são as que o DatabaseManager fazia até a versão 7. Depois ele é aberto pelo DatabaseManager,
+que aplica a migração 8, e as mesmas consultas são medidas pelos métodos do DatabaseManager.
+
+Uso: python -m benchmarks.bench_normalize [--rows 1000000] [--repeat 3]
+"""
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+from src.database.manager import DatabaseManager, LANCAMENTO_COLUMNS
+from src.database.migrations import MIGRATIONS, apply_migrations
+from benchmarks.generators import lancamentos
+import argparse
+import gc
+import sqlite3
+import tempfile
+import time
+
+# Esquema da versão 7 anterior às migrações (o mesmo criado por DatabaseManager._create_tables).
+LEGACY_TABLES = [
+    "CREATE TABLE lojas (id INTEGER PRIMARY KEY AUTOINCREMENT, nome TEXT NOT NULL UNIQUE, cnpj TEXT NOT NULL UNIQUE)",
+    "CREATE TABLE fornecedores (id INTEGER PRIMARY KEY AUTOINCREMENT, nome TEXT NOT NULL UNIQUE, cnpj TEXT NOT NULL UNIQUE)",
+    """
+    CREATE TABLE lancamentos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        loja TEXT, cnpj_loja TEXT, fornecedor TEXT, cnpj_forn TEXT,
+        documento TEXT, nfe TEXT, chave_nfe TEXT,
+        valor REAL NOT NULL, data_lancamento TEXT, vencimento TEXT,
+        observacao TEXT, tipo TEXT NOT NULL
+    )
+    """,
+]
+# Período que não cobre meses inteiros: as agregações leem os lançamentos, não os resumos.
+PARTIAL_START, PARTIAL_END = "2018-01-15", "2020-06-14"
+SUPPLIER = "Fornecedor 3 Ltda"
+LABELS = (
+    "get_lancamentos (todos)",
+    "get_lancamentos (fornecedor)",
+    "get_lancamentos_page",
+    "aggregate_by_fornecedor (todos)",
+    "aggregate_by_fornecedor (período)",
+    "aggregate_by_tipo (período, fornecedor)",
+)
+
+def best_of(repeat: int, fn: Callable[[], Any]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def legacy_queries(conn: sqlite3.Connection) -> List[Callable[[], Any]]:
+    """Consultas do DatabaseManager na versão 7, na ordem de LABELS."""
+    def fetch(query: str, *params: Any) -> Callable[[], Any]:
+        return lambda: [dict(row) for row in conn.execute(query, params).fetchall()]
+    return [
+        fetch("SELECT * FROM lancamentos WHERE 1=1 ORDER BY id DESC"),
+        fetch("SELECT * FROM lancamentos WHERE 1=1 AND fornecedor = ? ORDER BY id DESC", SUPPLIER),
+        fetch("SELECT * FROM lancamentos WHERE 1=1 ORDER BY id DESC LIMIT ?", 200),
+        fetch("""
+            SELECT fornecedor, SUM(valor) AS total FROM lancamentos
+            WHERE fornecedor IS NOT NULL AND fornecedor <> '' GROUP BY fornecedor
+        """),
+        fetch("""
+            SELECT fornecedor, SUM(valor) AS total FROM lancamentos
+            WHERE fornecedor IS NOT NULL AND fornecedor <> '' AND data_lancamento BETWEEN ? AND ?
+            GROUP BY fornecedor
+        """, PARTIAL_START, PARTIAL_END),
+        fetch("""
+            SELECT tipo, SUM(valor) AS total, COUNT(*) AS quantidade FROM lancamentos
+            WHERE 1=1 AND data_lancamento BETWEEN ? AND ? AND fornecedor = ? GROUP BY tipo
+        """, PARTIAL_START, PARTIAL_END, SUPPLIER),
+    ]
+
+def manager_queries(db_manager: DatabaseManager) -> List[Callable[[], Any]]:
+    """As mesmas consultas pelos métodos do DatabaseManager, na ordem de LABELS."""
+    return [
+        lambda: db_manager.get_lancamentos(),
+        lambda: db_manager.get_lancamentos(fornecedor=SUPPLIER),
+        lambda: db_manager.get_lancamentos_page(limit=200),
+        lambda: db_manager.aggregate_by_fornecedor(use_rollups=False),
+        lambda: db_manager.aggregate_by_fornecedor(PARTIAL_START, PARTIAL_END),
+        lambda: db_manager.aggregate_by_tipo(PARTIAL_START, PARTIAL_END, SUPPLIER),
+    ]
+
+def table_sizes(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Bytes ocupados por tabela, somando os índices (dbstat), dos lançamentos e dos cadastros."""
+    rows = conn.execute("""
+        SELECT m.tbl_name, SUM(s.pgsize) FROM dbstat AS s JOIN sqlite_master AS m ON m.name = s.name
+        WHERE m.tbl_name IN ('lancamentos', 'lancamentos_base', 'lojas', 'fornecedores')
+        GROUP BY m.tbl_name
+    """).fetchall()
+    return {name: size for name, size in rows}
+
+def report_sizes(label: str, db_path: Path, conn: sqlite3.Connection) -> None:
+    sizes = table_sizes(conn)
+    detail = "  ".join(f"{name} {size / 2**20:.1f}" for name, size in sorted(sizes.items()))
+    print(f"  {label:<8} arquivo {db_path.stat().st_size / 2**20:>8.1f} MiB   ({detail} MiB, com índices)")
+
+def build_legacy(db_path: Path, rows: int) -> None:
+    """Cria o banco na versão 7 e carrega `rows` lançamentos sintéticos."""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode = WAL")
+    for query in LEGACY_TABLES:
+        conn.execute(query)
+    apply_migrations(conn, MIGRATIONS[:7])
+
+    query = f"INSERT INTO lancamentos ({', '.join(LANCAMENTO_COLUMNS)}) VALUES ({', '.join('?' for _ in LANCAMENTO_COLUMNS)})"
+    batch: List[Tuple[Any, ...]] = []
+    for lancamento in lancamentos(rows):
+        batch.append(tuple(lancamento[column] for column in LANCAMENTO_COLUMNS))
+        if len(batch) == 5000:
+            conn.execute("BEGIN")
+            conn.executemany(query, batch)
+            conn.execute("COMMIT")
+            batch.clear()
+    if batch:
+        conn.execute("BEGIN")
+        conn.executemany(query, batch)
+        conn.execute("COMMIT")
+    conn.execute("VACUUM")
+    conn.close()
+
+def run(db_path: Path, rows: int, repeat: int) -> None:
+    print(f"\n{rows:,} lançamentos")
+    started = time.perf_counter()
+    build_legacy(db_path, rows)
+    print(f"  carga do banco (versão 7)        {time.perf_counter() - started:>8.2f} s")
+
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    report_sizes("antes", db_path, conn)
+    before = [best_of(repeat, fn) for fn in legacy_queries(conn)]
+    conn.close()
+
+    started = time.perf_counter()
+    db_manager = DatabaseManager(db_path=db_path)
+    print(f"  migração 8                       {time.perf_counter() - started:>8.2f} s")
+    conn = db_manager._get_connection()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    print(f"  após a migração, sem VACUUM: arquivo {db_path.stat().st_size / 2**20:.1f} MiB")
+    conn.execute("VACUUM")
+    report_sizes("depois", db_path, conn)
+    after = [best_of(repeat, fn) for fn in manager_queries(db_manager)]
+    db_manager.close()
+
+    print(f"  {'consulta':<42} {'antes':>10} {'depois':>10}")
+    for label, old, new in zip(LABELS, before, after):
+        print(f"  {label:<42} {old * 1000:>7.1f} ms {new * 1000:>7.1f} ms   {old / new:>5.2f}x")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Tamanho e latência antes e depois da migração 8.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.rows:
+            run(Path(workdir) / f"normalize_{rows}.db", rows, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Compara get_lancamentos com um dicionário por linha (padrão) e com LancamentoRow (compact=True):
+tempo da consulta, memória da lista retornada e tempo das análises em Python sobre cada uma.
+
+Uso: python -m benchmarks.bench_rows [--rows 100000 1000000] [--repeat 3]
+"""
+from pathlib import Path
+from typing import Any, Callable, List, Tuple
+from src.analysis.analytics import FinancialAnalytics
+from src.database.manager import DatabaseManager
+from benchmarks.generators import lancamentos
+import argparse
+import gc
+import tempfile
+import time
+import tracemalloc
+
+METHODS = ("get_financial_summary", "get_monthly_totals", "get_supplier_analysis")
+
+def best_of(repeat: int, fn: Callable[[], Any]) -> Tuple[float, Any]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def measure_memory(fn: Callable[[], Any]) -> Tuple[float, float]:
+    """(MiB retidos pelo resultado, pico em MiB durante a chamada), medidos com tracemalloc."""
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained / 2**20, peak / 2**20
+
+def run(db_path: Path, rows: int, repeat: int) -> None:
+    print(f"\n{rows:,} lançamentos")
+    db_manager = DatabaseManager(db_path=db_path)
+    started = time.perf_counter()
+    db_manager.insert_lancamentos_many(lancamentos(rows, chave_ratio=0))
+    print(f"  carga do banco                   {time.perf_counter() - started:>8.2f} s")
+
+    analytics = FinancialAnalytics(db_manager)
+    results: List[Any] = []
+    for label, compact in (("dict", False), ("compact", True)):
+        fetch = lambda: db_manager.get_lancamentos(compact=compact)
+        retained, peak = measure_memory(fetch)
+        seconds, data = best_of(repeat, fetch)
+        print(f"  get_lancamentos[{label:<7}]         {seconds * 1000:>9.1f} ms   {retained:>7.0f} MiB   pico {peak:>7.0f} MiB")
+        method_results = []
+        for method in METHODS:
+            method_seconds, result = best_of(repeat, lambda: getattr(analytics, method)(data))
+            method_results.append(result)
+            print(f"    {method:<30} {method_seconds * 1000:>9.1f} ms")
+        results.append(method_results)
+        del data
+
+    if results[0] != results[1]:
+        raise AssertionError("As análises sobre dicionários e sobre LancamentoRow divergem")
+    db_manager.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compara dicionários e LancamentoRow em get_lancamentos.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.rows:
+            run(Path(workdir) / f"rows_{rows}.db", rows, args.repeat)
+
+if __name__ == "__main__":
+    main()
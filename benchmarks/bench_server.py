@@ -0,0 +1,153 @@
+"""
+Teste de carga do servidor HTTP/JSON: requisições por segundo e latência com vários clientes simultâneos.
+
+Uso:
+  python -m benchmarks.bench_server [--rows 100000] [--clients 1 4 16] [--duration 5] [--write-ratio 0.1]
+  python -m benchmarks.bench_server --url http://servidor:8765 [--token SEGREDO] ...
+
+Sem --url, sobe um servidor local em um subprocesso, com um banco temporário de `--rows` lançamentos.
+Cada cliente roda em um processo próprio, para que o GIL dos clientes não limite a medição.
+A mistura de operações imita as telas: totais e páginas do relatório, resumo do dashboard,
+busca textual e, na proporção `--write-ratio`, inclusão de lançamentos.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+from src.database.manager import DatabaseManager
+from src.remote.client import RemoteDatabaseManager, RemoteFinancialAnalytics
+from benchmarks.generators import lancamentos
+import argparse
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+READ_OPERATIONS = ("relatorio.totais", "relatorio.pagina", "dashboard.resumo", "busca")
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+def _operations(client: RemoteDatabaseManager, rng: random.Random, worker: int) -> Dict[str, Callable[[], Any]]:
+    analytics = RemoteFinancialAnalytics(client)
+    fornecedores = [f"Fornecedor {i} Ltda" for i in range(1, 20)]
+    sequence = iter(range(10**9))
+
+    def month() -> Dict[str, str]:
+        year, mes = rng.randint(2015, 2024), rng.randint(1, 12)
+        return {"start_date": f"{year}-{mes:02d}-01", "end_date": f"{year}-{mes:02d}-28"}
+
+    def insert() -> None:
+        client.insert_lancamento({  # type: ignore[typeddict-item]
+            "loja": "Loja carga", "cnpj_loja": "", "fornecedor": rng.choice(fornecedores), "cnpj_forn": "",
+            "documento": "Recibo", "nfe": f"carga-{os.getpid()}-{worker}-{next(sequence)}", "chave_nfe": None,
+            "valor": round(rng.uniform(10, 5000), 2), "data_lancamento": "2024-06-15", "vencimento": None,
+            "observacao": "teste de carga", "tipo": "Saída",
+        })
+
+    return {
+        "relatorio.totais": lambda: client.get_lancamentos_totals(fornecedor=rng.choice(fornecedores), **month()),
+        "relatorio.pagina": lambda: client.get_lancamentos_page(fornecedor=rng.choice(fornecedores), limit=200),
+        "dashboard.resumo": lambda: analytics.get_financial_summary(),
+        "busca": lambda: client.search_lancamentos(rng.choice(("forn", "loja 1", "recibo", "nf")), limit=50),
+        "insercao": insert,
+    }
+
+def run_client(url: str, token: str, duration: float, write_ratio: float, worker: int) -> Dict[str, List[float]]:
+    """Executa operações sem pausa durante `duration` segundos. Retorna as latências de cada operação."""
+    client = RemoteDatabaseManager(url, token)
+    rng = random.Random(worker)
+    operations = _operations(client, rng, worker)
+    latencies: Dict[str, List[float]] = {name: [] for name in operations}
+    deadline = time.perf_counter() + duration
+    try:
+        while (started := time.perf_counter()) < deadline:
+            name = "insercao" if rng.random() < write_ratio else rng.choice(READ_OPERATIONS)
+            operations[name]()
+            latencies[name].append(time.perf_counter() - started)
+    finally:
+        client.close()
+    return latencies
+
+def run_load(url: str, token: str, clients: int, duration: float, write_ratio: float) -> None:
+    with ProcessPoolExecutor(max_workers=clients) as pool:
+        futures = [pool.submit(run_client, url, token, duration, write_ratio, worker) for worker in range(clients)]
+        results = [future.result() for future in futures]
+
+    merged: Dict[str, List[float]] = {}
+    for latencies in results:
+        for name, values in latencies.items():
+            merged.setdefault(name, []).extend(values)
+    total = sum(len(values) for values in merged.values())
+
+    print(f"\n{clients} cliente(s): {total / duration:,.0f} req/s")
+    for name, values in sorted(merged.items()):
+        if not values:
+            continue
+        values.sort()
+        print(
+            f"  {name:<18} {len(values) / duration:>8,.0f} req/s   p50 {_percentile(values, 0.5) * 1000:>7.2f} ms"
+            f"   p95 {_percentile(values, 0.95) * 1000:>7.2f} ms   máx {values[-1] * 1000:>7.2f} ms"
+        )
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_local_server(workdir: Path, rows: int, read_workers: int) -> Tuple[subprocess.Popen, str]:
+    """Popula um banco temporário e sobe o servidor em um subprocesso. Retorna o processo e a URL."""
+    db_path = workdir / "carga.db"
+    started = time.perf_counter()
+    db_manager = DatabaseManager(db_path=db_path)
+    db_manager.insert_lancamentos_many(lancamentos(rows))
+    db_manager.close()
+    print(f"banco com {rows:,} lançamentos criado em {time.perf_counter() - started:.1f} s", file=sys.stderr)
+
+    port = _free_port()
+    process = subprocess.Popen([
+        sys.executable, "-m", "src.remote.server", "--db", str(db_path),
+        "--port", str(port), "--read-workers", str(read_workers),
+    ])
+    url = f"http://127.0.0.1:{port}"
+    client = RemoteDatabaseManager(url)
+    for _ in range(100):
+        try:
+            client.schema_version()
+            break
+        except RuntimeError:
+            time.sleep(0.1)
+    else:
+        process.terminate()
+        raise RuntimeError("O servidor não respondeu.")
+    client.close()
+    return process, url
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Teste de carga do servidor HTTP/JSON.")
+    parser.add_argument("--url", help="Servidor já em execução. Sem esta opção, um servidor local é iniciado.")
+    parser.add_argument("--token", default="")
+    parser.add_argument("--rows", type=int, default=100_000, help="Lançamentos do banco do servidor local.")
+    parser.add_argument("--read-workers", type=int, default=4, help="Threads de leitura do servidor local.")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--duration", type=float, default=5.0, help="Segundos de carga para cada quantidade de clientes.")
+    parser.add_argument("--write-ratio", type=float, default=0.1, help="Fração das operações que são inclusões.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        process = None
+        url = args.url
+        if url is None:
+            process, url = start_local_server(Path(tmp), args.rows, args.read_workers)
+        try:
+            for clients in args.clients:
+                run_load(url, args.token, clients, args.duration, args.write_ratio)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+if __name__ == "__main__":
+    main()
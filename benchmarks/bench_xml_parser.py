@@ -0,0 +1,47 @@
+"""
+Micro-benchmark dos modos de parsing do XMLImporter.
+
+Uso: python -m benchmarks.bench_xml_parser [--files 200] [--items 5 100 1000] [--repeat 3]
+"""
+from pathlib import Path
+from typing import List
+from src.services.xml_importer import XMLImporter, PARSER_MODES
+from benchmarks.generators import write_nfe_files
+import argparse
+import tempfile
+import time
+
+def run(files: int, items_list: List[int], repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        for items in items_list:
+            paths = [str(p) for p in write_nfe_files(Path(tmp) / f"itens_{items}", files, items)]
+            importers = {mode: XMLImporter(mode) for mode in PARSER_MODES}
+
+            # Todos os modos precisam produzir exatamente o mesmo dicionário.
+            reference = [importers["padrao"].parse_xml(p) for p in paths]
+            for mode, importer in importers.items():
+                if [importer.parse_xml(p) for p in paths] != reference:
+                    raise AssertionError(f"Modo '{mode}' gerou resultado diferente do modo padrão.")
+
+            print(f"\n{files} arquivos com {items} itens cada")
+            baseline = 0.0
+            for mode, importer in importers.items():
+                best = float("inf")
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    for p in paths:
+                        importer.parse_xml(p)
+                    best = min(best, time.perf_counter() - started)
+                baseline = baseline or best
+                print(f"  {mode:<10} {files / best:>10.0f} arquivos/s  {baseline / best:>5.2f}x")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compara os modos de parsing de NF-e.")
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--items", type=int, nargs="+", default=[5, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.files, args.items, args.repeat)
+
+if __name__ == "__main__":
+    main()
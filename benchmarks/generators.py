@@ -0,0 +1,114 @@
+"""Geradores determinísticos de dados sintéticos para os benchmarks."""
+from datetime import date, timedelta
+from itertools import accumulate
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+import random
+
+NFE_NAMESPACE = "http://www.portalfiscal.inf.br/nfe"
+
+def cnpj(rng: random.Random) -> str:
+    """Gera um CNPJ (somente dígitos) com dígitos verificadores válidos."""
+    digits = [rng.randint(0, 9) for _ in range(8)] + [0, 0, 0, 1]
+    for weights in ([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]):
+        remainder = sum(d * w for d, w in zip(digits, weights)) % 11
+        digits.append(0 if remainder < 2 else 11 - remainder)
+    return "".join(map(str, digits))
+
+def chave_nfe(rng: random.Random, emitente_cnpj: str, numero: int, ano: int, mes: int) -> str:
+    """Gera uma chave de acesso de 44 dígitos no formato da NF-e."""
+    base = f"35{ano % 100:02d}{mes:02d}{emitente_cnpj}55001{numero:09d}1{rng.randint(0, 99999999):08d}"
+    weights = [2, 3, 4, 5, 6, 7, 8, 9]
+    total = sum(int(d) * weights[i % 8] for i, d in enumerate(reversed(base)))
+    dv = 11 - total % 11
+    return base + str(0 if dv >= 10 else dv)
+
+def nfe_xml(rng: random.Random, numero: int, items: int = 5) -> str:
+    """Gera o conteúdo de um XML de NF-e (nfeProc) com a quantidade de itens informada."""
+    ano, mes, dia = rng.randint(2019, 2024), rng.randint(1, 12), rng.randint(1, 28)
+    emit_cnpj, dest_cnpj = cnpj(rng), cnpj(rng)
+    chave = chave_nfe(rng, emit_cnpj, numero, ano, mes)
+
+    dets: List[str] = []
+    total = 0.0
+    for n in range(1, items + 1):
+        quantidade = rng.randint(1, 20)
+        unitario = round(rng.uniform(1, 500), 2)
+        valor = round(quantidade * unitario, 2)
+        total += valor
+        dets.append(
+            f'<det nItem="{n}"><prod><cProd>{rng.randint(1, 99999):05d}</cProd>'
+            f'<xProd>Produto {n}</xProd><NCM>{rng.randint(10000000, 99999999)}</NCM>'
+            f'<CFOP>5102</CFOP><uCom>UN</uCom><qCom>{quantidade:.4f}</qCom>'
+            f'<vUnCom>{unitario:.2f}</vUnCom><vProd>{valor:.2f}</vProd></prod>'
+            f'<imposto><ICMS><ICMS00><orig>0</orig><CST>00</CST><vBC>{valor:.2f}</vBC>'
+            f'<pICMS>18.00</pICMS><vICMS>{valor * 0.18:.2f}</vICMS></ICMS00></ICMS></imposto></det>'
+        )
+
+    return (
+        f'<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<nfeProc xmlns="{NFE_NAMESPACE}" versao="4.00"><NFe><infNFe Id="NFe{chave}" versao="4.00">'
+        f'<ide><cUF>35</cUF><natOp>VENDA</natOp><mod>55</mod><serie>1</serie><nNF>{numero}</nNF>'
+        f'<dhEmi>{ano}-{mes:02d}-{dia:02d}T10:30:00-03:00</dhEmi><tpNF>1</tpNF></ide>'
+        f'<emit><CNPJ>{emit_cnpj}</CNPJ><xNome>Fornecedor {rng.randint(1, 500)} Ltda</xNome>'
+        f'<enderEmit><xLgr>Rua A</xLgr><nro>{rng.randint(1, 999)}</nro><xMun>Sao Paulo</xMun><UF>SP</UF></enderEmit></emit>'
+        f'<dest><CNPJ>{dest_cnpj}</CNPJ><xNome>Loja {rng.randint(1, 50)}</xNome>'
+        f'<enderDest><xLgr>Av B</xLgr><nro>{rng.randint(1, 999)}</nro><xMun>Campinas</xMun><UF>SP</UF></enderDest></dest>'
+        f'{"".join(dets)}'
+        f'<total><ICMSTot><vBC>{total:.2f}</vBC><vICMS>{total * 0.18:.2f}</vICMS><vProd>{total:.2f}</vProd>'
+        f'<vNF>{total:.2f}</vNF></ICMSTot></total>'
+        f'<transp><modFrete>9</modFrete></transp></infNFe></NFe>'
+        f'<protNFe versao="4.00"><infProt><chNFe>{chave}</chNFe><cStat>100</cStat></infProt></protNFe></nfeProc>'
+    )
+
+def write_nfe_files(directory: Path, count: int, items: int = 5, seed: int = 42) -> List[Path]:
+    """Grava `count` arquivos XML de NF-e sintéticos no diretório informado."""
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths: List[Path] = []
+    for numero in range(1, count + 1):
+        path = directory / f"nfe_{numero:07d}.xml"
+        path.write_text(nfe_xml(rng, numero, items), encoding="utf-8")
+        paths.append(path)
+    return paths
+
+def entidades(rng: random.Random, count: int, prefixo: str) -> List[Tuple[str, str]]:
+    """Gera `count` pares (nome, CNPJ) de lojas ou fornecedores, ex.: ("Fornecedor 7 Ltda", "...")."""
+    return [(f"{prefixo} {n}{' Ltda' if prefixo == 'Fornecedor' else ''}", cnpj(rng)) for n in range(1, count + 1)]
+
+def lancamentos(
+    count: int,
+    seed: int = 42,
+    start: date = date(2015, 1, 1),
+    days: int = 3650,
+    suppliers: int = 500,
+    stores: int = 50,
+    chave_ratio: float = 0.8,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Gera `count` lançamentos sintéticos com as colunas da tabela lancamentos (exceto id).
+    Os fornecedores seguem uma distribuição de Zipf, como em razões reais, onde poucos
+    fornecedores concentram a maior parte das notas. Uma fração `chave_ratio` dos lançamentos
+    vem de NF-e (com chave de acesso única); os demais são manuais, sem chave.
+    """
+    rng = random.Random(seed)
+    fornecedores = entidades(rng, suppliers, "Fornecedor")
+    fornecedores_cum = list(accumulate(1 / n for n in range(1, suppliers + 1)))
+    lojas = entidades(rng, stores, "Loja")
+    # 60 dias extras para os vencimentos dos últimos lançamentos.
+    datas = [(start + timedelta(days=d)).isoformat() for d in range(days + 60)]
+
+    for numero in range(1, count + 1):
+        loja, cnpj_loja = rng.choice(lojas)
+        fornecedor, cnpj_forn = rng.choices(fornecedores, cum_weights=fornecedores_cum)[0]
+        dia = rng.randrange(days)
+        data = datas[dia]
+        nfe = rng.random() < chave_ratio
+        yield {
+            "loja": loja, "cnpj_loja": cnpj_loja, "fornecedor": fornecedor, "cnpj_forn": cnpj_forn,
+            "documento": "NF-e" if nfe else "Recibo", "nfe": str(numero),
+            "chave_nfe": chave_nfe(rng, cnpj_forn, numero, int(data[:4]), int(data[5:7])) if nfe else None,
+            "valor": round(rng.uniform(10, 50000), 2), "data_lancamento": data,
+            "vencimento": datas[dia + rng.choice((0, 30, 60))], "observacao": None,
+            "tipo": "Entrada" if rng.random() < 0.7 else "Saída",
+        }
@@ -0,0 +1,217 @@
+"""
+Suíte de benchmarks: importação de XML, inserções, filtros de get_lancamentos e análises financeiras.
+
+Uso:
+  python -m benchmarks.suite [--sizes 10000 100000 1000000] [--only insert queries ...]
+                             [--output resultados.json] [--baseline baseline.json] [--tolerance 0.2]
+
+Os resultados são gravados em JSON. Com --baseline, cada cenário é comparado ao resultado
+gravado anteriormente e o comando termina com código 1 se algum ficar mais lento que a tolerância.
+"""
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Tuple, TypedDict
+from src.database.manager import DatabaseManager
+from src.analysis.analytics import FinancialAnalytics, SQLFinancialAnalytics
+from benchmarks.generators import lancamentos, write_nfe_files
+import argparse
+import json
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+
+SCENARIOS = ("xml", "insert", "queries", "analytics")
+ANALYTICS_METHODS = ("get_financial_summary", "get_monthly_totals", "get_supplier_analysis")
+# Inserções uma a uma (um commit por linha) são limitadas a esta quantidade em qualquer tamanho.
+SINGLE_INSERTS = 2000
+
+class BenchmarkResult(TypedDict):
+    """Medição de um cenário em um tamanho de base."""
+    scenario: str
+    size: int
+    seconds: float
+    operations: int
+    per_second: float
+
+def best_of(repeat: int, fn: Callable[[], Any]) -> float:
+    """Menor tempo entre `repeat` execuções, em segundos."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def _result(scenario: str, size: int, seconds: float, operations: int = 1) -> BenchmarkResult:
+    result: BenchmarkResult = {
+        "scenario": scenario, "size": size, "seconds": seconds,
+        "operations": operations, "per_second": operations / seconds if seconds else 0.0,
+    }
+    print(f"  {scenario:<48} {size:>9,}  {seconds * 1000:>10.1f} ms  {result['per_second']:>12,.0f}/s", file=sys.stderr)
+    return result
+
+def bench_xml(workdir: Path, files: int, items: int, repeat: int) -> List[BenchmarkResult]:
+    """Throughput de XMLImporter.import_xml, em cada modo de parsing."""
+    from src.services.xml_importer import XMLImporter, PARSER_MODES
+
+    paths = [str(p) for p in write_nfe_files(workdir / "xml", files, items)]
+    results = []
+    for mode in PARSER_MODES:
+        importer = XMLImporter(mode)
+        seconds = best_of(repeat, lambda: [importer.import_xml(p) for p in paths])
+        results.append(_result(f"xml.import_xml[{mode},{items} itens]", files, seconds, files))
+    return results
+
+def bench_insert(db_path: Path, size: int) -> Tuple[DatabaseManager, List[BenchmarkResult]]:
+    """Inserção em lote de `size` lançamentos e inserção uma a uma em seguida. Retorna o banco populado."""
+    db_manager = DatabaseManager(db_path=db_path)
+    rows = list(lancamentos(size))
+    started = time.perf_counter()
+    db_manager.insert_lancamentos_many(rows)
+    results = [_result("insert.insert_lancamentos_many", size, time.perf_counter() - started, size)]
+
+    single = [dict(row, nfe=f"s{i}", chave_nfe=None) for i, row in enumerate(rows[:SINGLE_INSERTS])]
+    started = time.perf_counter()
+    for row in single:
+        db_manager.insert_lancamento(row)  # type: ignore[arg-type]
+    results.append(_result("insert.insert_lancamento", size, time.perf_counter() - started, len(single)))
+    return db_manager, results
+
+def _filter_shapes(db_manager: DatabaseManager) -> Dict[str, Dict[str, Any]]:
+    """Os formatos de filtro de get_lancamentos, com valores presentes na base gerada."""
+    conn = db_manager._get_connection()
+    fornecedor = conn.execute("SELECT fornecedor FROM lancamentos GROUP BY fornecedor ORDER BY COUNT(*) DESC LIMIT 1").fetchone()[0]
+    datas = {"start_date": "2019-01-01", "end_date": "2019-03-31"}
+    shapes: Dict[str, Dict[str, Any]] = {}
+    for nome, filtros in (("sem filtro", {}), ("data", datas), ("fornecedor", {"fornecedor": fornecedor}),
+                          ("data+fornecedor", dict(datas, fornecedor=fornecedor))):
+        shapes[nome] = filtros
+        shapes[f"{nome}+limit"] = dict(filtros, limit=10)
+    return shapes
+
+def bench_queries(db_manager: DatabaseManager, size: int, repeat: int) -> List[BenchmarkResult]:
+    """Cada formato de filtro de get_lancamentos, além da paginação e dos totais do relatório."""
+    results = []
+    shapes = _filter_shapes(db_manager)
+    for nome, filtros in shapes.items():
+        rows = len(db_manager.get_lancamentos(**filtros))
+        seconds = best_of(repeat, lambda: db_manager.get_lancamentos(**filtros))
+        results.append(_result(f"queries.get_lancamentos[{nome}]", size, seconds, rows))
+
+    filtros = shapes["data+fornecedor"]
+    seconds = best_of(repeat, lambda: db_manager.get_lancamentos_page(limit=200, **filtros))
+    results.append(_result("queries.get_lancamentos_page[data+fornecedor]", size, seconds))
+    seconds = best_of(repeat, lambda: db_manager.get_lancamentos_totals(**filtros))
+    results.append(_result("queries.get_lancamentos_totals[data+fornecedor]", size, seconds))
+    return results
+
+def bench_analytics(db_manager: DatabaseManager, size: int, repeat: int) -> List[BenchmarkResult]:
+    """Cada método de análise em Python (referência), em SQL direto, com tabelas de resumo e em NumPy."""
+    engines: Dict[str, Any] = {
+        "sql": SQLFinancialAnalytics(db_manager, use_rollups=False),
+        "rollups": SQLFinancialAnalytics(db_manager),
+    }
+    try:
+        from src.analysis.columnar import ColumnarFinancialAnalytics
+        engines["columnar"] = ColumnarFinancialAnalytics(db_manager)
+        engines["columnar"].snapshot()  # a carga do snapshot é medida à parte
+    except ImportError:
+        pass
+
+    results = []
+    reference = FinancialAnalytics(db_manager)
+    rows = db_manager.get_lancamentos()
+    for method in ANALYTICS_METHODS:
+        seconds = best_of(repeat, lambda: getattr(reference, method)(rows))
+        results.append(_result(f"analytics.{method}[python]", size, seconds, size))
+        for engine, analytics in engines.items():
+            seconds = best_of(repeat, getattr(analytics, method))
+            results.append(_result(f"analytics.{method}[{engine}]", size, seconds, size))
+    del rows
+
+    if "columnar" in engines:
+        from src.analysis.columnar import LancamentosSnapshot
+        seconds = best_of(1, lambda: LancamentosSnapshot.from_database(db_manager))
+        results.append(_result("analytics.snapshot[columnar]", size, seconds, size))
+    return results
+
+def run_suite(sizes: Iterable[int], scenarios: Iterable[str], repeat: int, xml_files: int, xml_items: List[int]) -> Dict[str, Any]:
+    """Executa os cenários escolhidos e retorna o documento JSON dos resultados."""
+    scenarios = set(scenarios)
+    results: List[BenchmarkResult] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        if "xml" in scenarios:
+            print("xml", file=sys.stderr)
+            for items in xml_items:
+                results.extend(bench_xml(workdir / f"itens_{items}", xml_files, items, repeat))
+
+        if scenarios & {"insert", "queries", "analytics"}:
+            for size in sizes:
+                print(f"{size:,} lançamentos", file=sys.stderr)
+                db_manager, insert_results = bench_insert(workdir / f"bench_{size}.db", size)
+                try:
+                    if "insert" in scenarios:
+                        results.extend(insert_results)
+                    if "queries" in scenarios:
+                        results.extend(bench_queries(db_manager, size, repeat))
+                    if "analytics" in scenarios:
+                        results.extend(bench_analytics(db_manager, size, repeat))
+                finally:
+                    db_manager.close()
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Imprime a comparação com a baseline e retorna os cenários que ficaram mais lentos que a tolerância."""
+    previous = {(r["scenario"], r["size"]): r["seconds"] for r in baseline["results"]}
+    regressions = []
+    print(f"\n{'cenário':<48} {'tamanho':>9}  {'baseline':>10}  {'atual':>10}  {'razão':>6}", file=sys.stderr)
+    for result in current["results"]:
+        key = (result["scenario"], result["size"])
+        if key not in previous:
+            continue
+        ratio = result["seconds"] / previous[key] if previous[key] else 1.0
+        flag = ""
+        if ratio > 1 + tolerance:
+            regressions.append(f"{key[0]} ({key[1]:,})")
+            flag = "  REGRESSÃO"
+        print(f"{key[0]:<48} {key[1]:>9,}  {previous[key] * 1000:>8.1f}ms  {result['seconds'] * 1000:>8.1f}ms  {ratio:>5.2f}x{flag}", file=sys.stderr)
+    return regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Executa a suíte de benchmarks do FiscalizeCórtex.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--only", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--xml-files", type=int, default=200)
+    parser.add_argument("--xml-items", type=int, nargs="+", default=[5, 100])
+    parser.add_argument("--output", type=Path, help="Grava os resultados neste arquivo JSON.")
+    parser.add_argument("--baseline", type=Path, help="Resultados anteriores para comparação.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Aumento de tempo aceito antes de acusar regressão (0.2 = 20%%).")
+    args = parser.parse_args()
+
+    current = run_suite(args.sizes, args.only, args.repeat, args.xml_files, args.xml_items)
+    if args.output:
+        args.output.write_text(json.dumps(current, ensure_ascii=False, indent=2), encoding="utf-8")
+    else:
+        print(json.dumps(current, ensure_ascii=False, indent=2))
+
+    if args.baseline:
+        regressions = compare(current, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regressão(ões): {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
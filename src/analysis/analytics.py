@@ -1,10 +1,35 @@
-from src.database.manager import DatabaseManager, LancamentoData
-from typing import Dict, Any, List, Optional, Protocol, TypeAlias
+from src.database.manager import DatabaseManager, ItemData, ItemTotals, Lancamento
+from src.database.rows import LancamentoRow
+from typing import Dict, Any, List, Optional, Protocol, Tuple, TypeAlias
 from datetime import datetime
 import collections
 from itertools import groupby
+from operator import attrgetter
 
-LancamentoList: TypeAlias = List[LancamentoData]
+# Dicionários (LancamentoData) ou registros compactos (LancamentoRow): as análises só usam l['campo'] e l.get.
+LancamentoList: TypeAlias = List[Lancamento]
+ItemList: TypeAlias = List[ItemData]
+
+# Em listas de LancamentoRow, os campos são lidos por atributo, em C, em vez de row.get.
+_TIPO_VALOR = attrgetter('tipo', 'valor')
+_DATA_TIPO_VALOR = attrgetter('data_lancamento', 'tipo', 'valor')
+_FORNECEDOR_VALOR = attrgetter('fornecedor', 'valor')
+
+def summary_from_totals(totals: Dict[str, Tuple[float, int]]) -> Dict[str, Any]:
+    """Monta o resumo financeiro a partir de {tipo: (soma dos valores, quantidade)}."""
+    total_entradas, count_entradas = totals.get('Entrada', (0.0, 0))
+    total_saidas, count_saidas = totals.get('Saída', (0.0, 0))
+    return {
+        "total_entradas": total_entradas,
+        "total_saidas": total_saidas,
+        "saldo_liquido": total_entradas - total_saidas,
+        "count_entradas": count_entradas,
+        "count_saidas": count_saidas
+    }
+
+def _is_compact(lancamentos: LancamentoList) -> bool:
+    """True quando a lista veio de get_lancamentos(compact=True)."""
+    return bool(lancamentos) and isinstance(lancamentos[0], LancamentoRow)
 
 class FinancialAnalyticsProtocol(Protocol):
     """
@@ -33,18 +58,23 @@ class FinancialAnalytics(FinancialAnalyticsProtocol):
         Gera um resumo financeiro com totais por tipo e valor.
         """
         if lancamentos is None:
-            lancamentos = self.db_manager.get_lancamentos()
+            lancamentos = self.db_manager.get_lancamentos(compact=True)
 
         # Otimização: usa um único loop para calcular todos os totais.
         totals: collections.defaultdict[str, Any] = collections.defaultdict(float)
         counts: collections.defaultdict[str, int] = collections.defaultdict(int)
 
-        for lancamento in lancamentos:
-            tipo = lancamento.get('tipo', 'Outro')
-            valor = lancamento.get('valor', 0.0)
-            
-            totals[tipo] += valor
-            counts[tipo] += 1
+        if _is_compact(lancamentos):
+            for tipo, valor in map(_TIPO_VALOR, lancamentos):
+                totals[tipo] += valor
+                counts[tipo] += 1
+        else:
+            for lancamento in lancamentos:
+                tipo = lancamento.get('tipo', 'Outro')
+                valor = lancamento.get('valor', 0.0)
+
+                totals[tipo] += valor
+                counts[tipo] += 1
         
         return {
             "total_entradas": totals['Entrada'],
@@ -60,13 +90,20 @@ class FinancialAnalytics(FinancialAnalyticsProtocol):
         Retorna um dicionário no formato: {"YYYY-MM": {"Entrada": total, "Saída": total}}.
         """
         if lancamentos is None:
-            lancamentos = self.db_manager.get_lancamentos()
+            lancamentos = self.db_manager.get_lancamentos(compact=True)
         
+        monthly_data: Dict[str, Dict[str, float]] = collections.defaultdict(lambda: collections.defaultdict(float))
+
+        if _is_compact(lancamentos):
+            # Mesma ordem de soma do caminho com groupby, para que os totais sejam idênticos.
+            for data, tipo, valor in map(_DATA_TIPO_VALOR, sorted(lancamentos, key=attrgetter('data_lancamento'))):
+                if tipo and valor is not None:
+                    monthly_data[data[:7]][tipo] += valor
+            return {mes: dict(valores) for mes, valores in monthly_data.items()}
+
         # Otimização: ordena a lista para usar groupby.
         # A ordenação é um pré-requisito para o groupby.
         sorted_lancamentos = sorted(lancamentos, key=lambda l: l['data_lancamento'])
-        
-        monthly_data: Dict[str, Dict[str, float]] = collections.defaultdict(lambda: collections.defaultdict(float))
 
         # Agrupa os lançamentos por mês e ano
         for mes_ano, group in groupby(sorted_lancamentos, key=lambda l: l['data_lancamento'][:7]):
@@ -82,12 +119,116 @@ class FinancialAnalytics(FinancialAnalyticsProtocol):
         Retorna um dicionário no formato: {"Fornecedor": total_valor}.
         """
         if lancamentos is None:
-            lancamentos = self.db_manager.get_lancamentos()
+            lancamentos = self.db_manager.get_lancamentos(compact=True)
 
         supplier_totals: collections.defaultdict[str, float] = collections.defaultdict(float)
         
-        for lancamento in lancamentos:
-            if (fornecedor := lancamento.get('fornecedor')) and (valor := lancamento.get('valor')) is not None:
-                supplier_totals[fornecedor] += valor
+        if _is_compact(lancamentos):
+            for fornecedor, valor in map(_FORNECEDOR_VALOR, lancamentos):
+                if fornecedor and valor is not None:
+                    supplier_totals[fornecedor] += valor
+        else:
+            for lancamento in lancamentos:
+                if (fornecedor := lancamento.get('fornecedor')) and (valor := lancamento.get('valor')) is not None:
+                    supplier_totals[fornecedor] += valor
+
+        return dict(supplier_totals)
+
+    def get_ncm_analysis(self, itens: Optional[ItemList] = None) -> Dict[str, ItemTotals]:
+        """
+        Calcula quantidade, valor total e preço médio dos itens por NCM, do maior valor para o menor.
+        Retorna um dicionário no formato: {"NCM": {"itens": n, "quantidade": q, "valor_total": v, ...}}.
+        """
+        return self._item_totals(itens, "ncm")
+
+    def get_product_analysis(self, itens: Optional[ItemList] = None) -> Dict[str, ItemTotals]:
+        """
+        Calcula quantidade, valor total e preço médio dos itens por código de produto,
+        do maior valor para o menor, com a descrição do produto.
+        """
+        return self._item_totals(itens, "codigo")
+
+    def _item_totals(self, itens: Optional[ItemList], column: str) -> Dict[str, ItemTotals]:
+        if itens is None:
+            itens = self.db_manager.get_itens()
+
+        totals: Dict[str, ItemTotals] = {}
+        for item in itens:
+            key = item.get(column) or ""
+            entry = totals.get(key)
+            if entry is None:
+                entry = totals[key] = {"descricao": "", "itens": 0, "quantidade": 0.0, "valor_total": 0.0, "preco_medio": 0.0}
+            if column == "codigo":
+                entry["descricao"] = max(entry["descricao"], item.get("descricao") or "")
+            entry["itens"] += 1
+            entry["quantidade"] += item.get("quantidade", 0.0)
+            entry["valor_total"] += item.get("valor_total", 0.0)
+
+        for entry in totals.values():
+            entry["preco_medio"] = entry["valor_total"] / entry["quantidade"] if entry["quantidade"] else 0.0
+        return dict(sorted(totals.items(), key=lambda kv: (-kv[1]["valor_total"], kv[0])))
+
+class SQLFinancialAnalytics(FinancialAnalyticsProtocol):
+    """
+    Serviço de análise financeira com agregação feita no banco (GROUP BY).
+    Apenas os totais agrupados são trazidos para o Python, então o uso de memória
+    não depende do tamanho da tabela de lançamentos.
+    Com use_rollups=True (padrão), consultas sem filtro de datas ou com meses inteiros
+    são respondidas pelas tabelas de resumo, em tempo proporcional ao número de meses.
+    Quando uma lista de lançamentos é informada, delega para a implementação em Python,
+    que continua sendo a referência de equivalência.
+    """
+    def __init__(self, db_manager: DatabaseManager, use_rollups: bool = True) -> None:
+        self.db_manager = db_manager
+        self.use_rollups = use_rollups
+        self._reference = FinancialAnalytics(db_manager)
 
-        return dict(supplier_totals)
\ No newline at end of file
+    def get_financial_summary(self, lancamentos: Optional[LancamentoList] = None, start_date: str = "", end_date: str = "", fornecedor: str = "") -> Dict[str, Any]:
+        """
+        Gera um resumo financeiro com totais por tipo e valor.
+        """
+        if lancamentos is not None:
+            return self._reference.get_financial_summary(lancamentos)
+
+        return summary_from_totals(self.db_manager.aggregate_by_tipo(start_date, end_date, fornecedor, self.use_rollups))
+
+    def get_monthly_totals(self, lancamentos: Optional[LancamentoList] = None, start_date: str = "", end_date: str = "", fornecedor: str = "") -> Dict[str, Dict[str, float]]:
+        """
+        Calcula os totais de entrada e saída por mês.
+        Retorna um dicionário no formato: {"YYYY-MM": {"Entrada": total, "Saída": total}}.
+        """
+        if lancamentos is not None:
+            return self._reference.get_monthly_totals(lancamentos)
+
+        monthly_data: Dict[str, Dict[str, float]] = {}
+        for mes, tipo, total in self.db_manager.aggregate_by_month(start_date, end_date, fornecedor, self.use_rollups):
+            monthly_data.setdefault(mes, {})[tipo] = total
+        return monthly_data
+
+    def get_supplier_analysis(self, lancamentos: Optional[LancamentoList] = None, start_date: str = "", end_date: str = "", fornecedor: str = "") -> Dict[str, float]:
+        """
+        Calcula o total de valor por fornecedor.
+        Retorna um dicionário no formato: {"Fornecedor": total_valor}.
+        """
+        if lancamentos is not None:
+            return self._reference.get_supplier_analysis(lancamentos)
+
+        return self.db_manager.aggregate_by_fornecedor(start_date, end_date, fornecedor, self.use_rollups)
+
+    def get_ncm_analysis(self, itens: Optional[ItemList] = None, start_date: str = "", end_date: str = "", fornecedor: str = "", limit: int = 0) -> Dict[str, ItemTotals]:
+        """
+        Calcula quantidade, valor total e preço médio dos itens por NCM, do maior valor para o menor.
+        Retorna um dicionário no formato: {"NCM": {"itens": n, "quantidade": q, "valor_total": v, ...}}.
+        """
+        if itens is not None:
+            return self._reference.get_ncm_analysis(itens)
+        return self.db_manager.aggregate_itens("ncm", start_date, end_date, fornecedor, limit)
+
+    def get_product_analysis(self, itens: Optional[ItemList] = None, start_date: str = "", end_date: str = "", fornecedor: str = "", limit: int = 0) -> Dict[str, ItemTotals]:
+        """
+        Calcula quantidade, valor total e preço médio dos itens por código de produto,
+        do maior valor para o menor, com a descrição do produto.
+        """
+        if itens is not None:
+            return self._reference.get_product_analysis(itens)
+        return self.db_manager.aggregate_itens("produto", start_date, end_date, fornecedor, limit)
@@ -0,0 +1,263 @@
+from src.database.manager import DatabaseManager
+from src.analysis.analytics import FinancialAnalyticsProtocol, LancamentoList
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from itertools import islice
+import threading
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: só a análise colunar depende dele.
+    np = None  # type: ignore[assignment]
+
+HAS_NUMPY = np is not None
+
+# Colunas copiadas para o snapshot, na ordem esperada por LancamentosSnapshot.from_rows.
+SNAPSHOT_COLUMNS: Tuple[str, ...] = ("valor", "data_lancamento", "tipo", "fornecedor", "loja")
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("A análise colunar requer o NumPy. Instale com: pip install numpy")
+
+def _encode(values: Sequence[Any], categories: Dict[Any, int]) -> "np.ndarray":
+    """Converte textos em códigos inteiros, acrescentando categorias novas ao dicionário."""
+    return np.fromiter((categories.setdefault(v, len(categories)) for v in values), dtype=np.int32, count=len(values))
+
+def _parse_dates(values: Sequence[Optional[str]]) -> "np.ndarray":
+    """Converte datas AAAA-MM-DD em datetime64[D]. Datas ausentes ou inválidas viram NaT."""
+    try:
+        return np.array(values, dtype="datetime64[D]")
+    except ValueError:
+        # Algum valor fora do padrão ISO (ex.: DD-MM-AAAA): converte um a um.
+        dates = np.full(len(values), np.datetime64("NaT"), dtype="datetime64[D]")
+        for i, value in enumerate(values):
+            try:
+                dates[i] = np.datetime64(value[:10], "D") if value else np.datetime64("NaT")
+            except ValueError:
+                pass
+        return dates
+
+class MonthlySeries(NamedTuple):
+    """Totais reamostrados por mês: uma linha por mês do intervalo (inclusive meses sem lançamentos)."""
+    months: Any             # datetime64[M], consecutivos
+    tipos: List[str]        # uma coluna por tipo
+    total_centavos: Any     # int64 (len(months), len(tipos))
+    quantidade: Any         # int64 (len(months), len(tipos))
+
+class LancamentosSnapshot:
+    """
+    Cópia colunar dos lançamentos em arrays NumPy.
+    valor_centavos é int64, data é datetime64[D] (NaT quando ausente ou inválida) e
+    tipo, fornecedor e loja são códigos int32 que indexam as listas de categorias.
+    Um snapshot ocupa cerca de 28 bytes por lançamento, contra centenas de bytes
+    de um dicionário por linha.
+    """
+
+    def __init__(self, valor_centavos: Any, data: Any, tipo_codes: Any, tipos: List[Any], fornecedor_codes: Any, fornecedores: List[Any], loja_codes: Any, lojas: List[Any]) -> None:
+        self.valor_centavos = valor_centavos
+        self.data = data
+        self.tipo_codes = tipo_codes
+        self.tipos = tipos
+        self.fornecedor_codes = fornecedor_codes
+        self.fornecedores = fornecedores
+        self.loja_codes = loja_codes
+        self.lojas = lojas
+        self._months: Optional[Any] = None
+
+    def __len__(self) -> int:
+        return len(self.valor_centavos)
+
+    @property
+    def nbytes(self) -> int:
+        """Memória ocupada pelos arrays do snapshot."""
+        return sum(a.nbytes for a in (self.valor_centavos, self.data, self.tipo_codes, self.fornecedor_codes, self.loja_codes))
+
+    @property
+    def months(self) -> Any:
+        """Mês de cada lançamento (datetime64[M]). Calculado na primeira consulta mensal e reaproveitado."""
+        if self._months is None:
+            self._months = self.data.astype("datetime64[M]")
+        return self._months
+
+    @classmethod
+    def from_rows(cls, chunks: Iterable[Sequence[Sequence[Any]]]) -> "LancamentosSnapshot":
+        """Monta o snapshot a partir de blocos de linhas no formato de SNAPSHOT_COLUMNS."""
+        _require_numpy()
+        categories: Tuple[Dict[Any, int], ...] = ({}, {}, {})
+        parts: Tuple[List[Any], ...] = ([], [], [], [], [])
+
+        for chunk in chunks:
+            if not chunk:
+                continue
+            valores, datas, tipos, fornecedores, lojas = zip(*chunk)
+            parts[0].append(np.rint(np.asarray(valores, dtype=np.float64) * 100).astype(np.int64))
+            parts[1].append(_parse_dates(datas))
+            parts[2].append(_encode(tipos, categories[0]))
+            parts[3].append(_encode(fornecedores, categories[1]))
+            parts[4].append(_encode(lojas, categories[2]))
+
+        dtypes = (np.int64, "datetime64[D]", np.int32, np.int32, np.int32)
+        valor, data, tipo, fornecedor, loja = (
+            np.concatenate(part) if part else np.empty(0, dtype=dtype) for part, dtype in zip(parts, dtypes)
+        )
+        return cls(valor, data, tipo, list(categories[0]), fornecedor, list(categories[1]), loja, list(categories[2]))
+
+    @classmethod
+    def from_lancamentos(cls, lancamentos: LancamentoList, chunk_size: int = 100000) -> "LancamentosSnapshot":
+        """Monta o snapshot a partir de uma lista de lançamentos (dicionários)."""
+        def chunks() -> Iterator[List[Tuple[Any, ...]]]:
+            iterator = iter(lancamentos)
+            while chunk := [
+                (l.get('valor', 0.0), l.get('data_lancamento'), l.get('tipo'), l.get('fornecedor'), l.get('loja'))
+                for l in islice(iterator, chunk_size)
+            ]:
+                yield chunk
+        return cls.from_rows(chunks())
+
+    @classmethod
+    def from_database(cls, db_manager: DatabaseManager, chunk_size: int = 100000) -> "LancamentosSnapshot":
+        """Lê a tabela de lançamentos em blocos, sem criar um dicionário por linha."""
+        return cls.from_rows(db_manager.iter_lancamento_columns(SNAPSHOT_COLUMNS, chunk_size))
+
+    def mask(self, start_date: str = "", end_date: str = "", fornecedor: str = "") -> Optional[Any]:
+        """
+        Máscara booleana com os mesmos filtros de DatabaseManager.get_lancamentos.
+        Retorna None quando não há filtro, evitando cópias dos arrays.
+        """
+        mask = None
+        if start_date and end_date:
+            mask = (self.data >= np.datetime64(start_date, "D")) & (self.data <= np.datetime64(end_date, "D"))
+        if fornecedor:
+            try:
+                code = self.fornecedores.index(fornecedor)
+                by_fornecedor = self.fornecedor_codes == code
+            except ValueError:
+                by_fornecedor = np.zeros(len(self), dtype=bool)
+            mask = by_fornecedor if mask is None else mask & by_fornecedor
+        return mask
+
+    def totals_by_tipo(self, mask: Optional[Any] = None) -> Tuple[Any, Any]:
+        """Soma em centavos e quantidade de lançamentos por código de tipo."""
+        return self._grouped(self.tipo_codes, len(self.tipos), mask)
+
+    def totals_by_fornecedor(self, mask: Optional[Any] = None) -> Tuple[Any, Any]:
+        """Soma em centavos e quantidade de lançamentos por código de fornecedor."""
+        return self._grouped(self.fornecedor_codes, len(self.fornecedores), mask)
+
+    def monthly_series(self, mask: Optional[Any] = None) -> MonthlySeries:
+        """Reamostra os lançamentos por mês e tipo. Lançamentos sem data ou sem tipo são ignorados."""
+        months = self.months
+        valid = ~np.isnat(months)
+        valid &= np.isin(self.tipo_codes, [code for code, tipo in enumerate(self.tipos) if tipo])
+        if mask is not None:
+            valid &= mask
+
+        months, tipo_codes, valores = months[valid], self.tipo_codes[valid], self.valor_centavos[valid]
+        if not len(months):
+            empty = np.zeros((0, len(self.tipos)), dtype=np.int64)
+            return MonthlySeries(months, list(self.tipos), empty, empty.copy())
+
+        first = months.min()
+        month_index = (months - first).astype(np.int64)
+        shape = (int(month_index.max()) + 1, len(self.tipos))
+
+        total = np.zeros(shape, dtype=np.int64)
+        quantidade = np.zeros(shape, dtype=np.int64)
+        # ufunc.at acumula índices repetidos, mantendo as somas inteiras e exatas.
+        np.add.at(total, (month_index, tipo_codes), valores)
+        np.add.at(quantidade, (month_index, tipo_codes), 1)
+        return MonthlySeries(first + np.arange(shape[0]), list(self.tipos), total, quantidade)
+
+    def _grouped(self, codes: Any, size: int, mask: Optional[Any]) -> Tuple[Any, Any]:
+        """Soma valor_centavos e conta linhas por código com bincount."""
+        valores = self.valor_centavos
+        if mask is not None:
+            codes, valores = codes[mask], valores[mask]
+        # Os pesos de bincount são float64: exatos para somas de até 2**53 centavos.
+        totals = np.rint(np.bincount(codes, weights=valores, minlength=size)).astype(np.int64)
+        return totals, np.bincount(codes, minlength=size)
+
+class ColumnarFinancialAnalytics(FinancialAnalyticsProtocol):
+    """
+    Serviço de análise financeira vetorizado sobre um LancamentosSnapshot.
+    Indicado para simulações sobre históricos longos: o snapshot é carregado uma vez
+    e recarregado apenas quando os lançamentos mudam, inclusive por outro processo, como uma
+    importação pela CLI, a pasta monitorada ou o servidor (ver DatabaseManager.get_changes).
+    Os filtros seguem a mesma semântica de SQLFinancialAnalytics.
+    Sem db_manager, analisa apenas o snapshot informado (ex.: um cenário simulado).
+    """
+    def __init__(self, db_manager: Optional[DatabaseManager], chunk_size: int = 100000, snapshot: Optional[LancamentosSnapshot] = None) -> None:
+        _require_numpy()
+        if db_manager is None and snapshot is None:
+            raise ValueError("Informe um db_manager ou um snapshot.")
+        self.db_manager = db_manager
+        self.chunk_size = chunk_size
+        self._snapshot = snapshot
+        # Versão de get_changes lida antes da carga do snapshot atual.
+        self._snapshot_version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> LancamentosSnapshot:
+        """Retorna o snapshot dos lançamentos, recarregando-o se a tabela mudou."""
+        if self.db_manager is None:
+            return self._snapshot  # type: ignore[return-value]
+        with self._lock:
+            if self._snapshot is None or self._snapshot_version is None:
+                stale, version = True, self.db_manager.get_changes()["version"]
+            else:
+                changes = self.db_manager.get_changes(self._snapshot_version)
+                # Escritas de fora não dizem quais tabelas mudaram.
+                stale, version = changes["external"] or "lancamentos" in changes["tables"], changes["version"]
+            # A versão é lida antes da carga: uma escrita durante a leitura só causa uma recarga a mais.
+            if stale:
+                self._snapshot = LancamentosSnapshot.from_database(self.db_manager, self.chunk_size)
+            self._snapshot_version = version
+            return self._snapshot
+
+    def _resolve(self, lancamentos: Optional[LancamentoList], start_date: str, end_date: str, fornecedor: str) -> Tuple[LancamentosSnapshot, Optional[Any]]:
+        snapshot = self.snapshot() if lancamentos is None else LancamentosSnapshot.from_lancamentos(lancamentos, self.chunk_size)
+        return snapshot, snapshot.mask(start_date, end_date, fornecedor)
+
+    def get_financial_summary(self, lancamentos: Optional[LancamentoList] = None, start_date: str = "", end_date: str = "", fornecedor: str = "") -> Dict[str, Any]:
+        """
+        Gera um resumo financeiro com totais por tipo e valor.
+        """
+        snapshot, mask = self._resolve(lancamentos, start_date, end_date, fornecedor)
+        totals, counts = snapshot.totals_by_tipo(mask)
+        by_tipo = {tipo: (int(totals[code]), int(counts[code])) for code, tipo in enumerate(snapshot.tipos)}
+        entradas, count_entradas = by_tipo.get('Entrada', (0, 0))
+        saidas, count_saidas = by_tipo.get('Saída', (0, 0))
+
+        return {
+            "total_entradas": entradas / 100,
+            "total_saidas": saidas / 100,
+            "saldo_liquido": (entradas - saidas) / 100,
+            "count_entradas": count_entradas,
+            "count_saidas": count_saidas
+        }
+
+    def get_monthly_totals(self, lancamentos: Optional[LancamentoList] = None, start_date: str = "", end_date: str = "", fornecedor: str = "") -> Dict[str, Dict[str, float]]:
+        """
+        Calcula os totais de entrada e saída por mês.
+        Retorna um dicionário no formato: {"YYYY-MM": {"Entrada": total, "Saída": total}}.
+        """
+        snapshot, mask = self._resolve(lancamentos, start_date, end_date, fornecedor)
+        series = snapshot.monthly_series(mask)
+
+        monthly_data: Dict[str, Dict[str, float]] = {}
+        for month_index, tipo_index in zip(*np.nonzero(series.quantidade)):
+            mes = str(series.months[month_index])
+            monthly_data.setdefault(mes, {})[series.tipos[tipo_index]] = int(series.total_centavos[month_index, tipo_index]) / 100
+        return monthly_data
+
+    def get_supplier_analysis(self, lancamentos: Optional[LancamentoList] = None, start_date: str = "", end_date: str = "", fornecedor: str = "") -> Dict[str, float]:
+        """
+        Calcula o total de valor por fornecedor.
+        Retorna um dicionário no formato: {"Fornecedor": total_valor}.
+        """
+        snapshot, mask = self._resolve(lancamentos, start_date, end_date, fornecedor)
+        totals, counts = snapshot.totals_by_fornecedor(mask)
+        return {
+            nome: int(totals[code]) / 100
+            for code, nome in enumerate(snapshot.fornecedores)
+            if nome and counts[code]
+        }
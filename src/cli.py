@@ -0,0 +1,344 @@
+"""
+Interface de linha de comando, sem Tk, para importações e relatórios agendados (ex.: cron).
+
+Uso:
+  python -m src.cli import <diretório|arquivo>... [--workers N] [--on-conflict skip|replace|fail] [--items]
+  python -m src.cli watch <diretório> [--poll 0.25] [--settle 0.3] [--batch-size 50] [--once] [--items]
+  python -m src.cli report [--from AAAA-MM-DD --to AAAA-MM-DD] [--fornecedor NOME] [--format csv|jsonl|json]
+  python -m src.cli search <texto> [--limit N] [--format csv|jsonl|json]
+  python -m src.cli summary|monthly|suppliers [--from ... --to ...] [--fornecedor NOME] [--format json|csv]
+  python -m src.cli ncm|products [--from ... --to ...] [--fornecedor NOME] [--limit N] [--format json|csv]
+  python -m src.cli archive [--year AAAA ...] [--batch-size 5000]
+
+Todos os comandos usam o perfil "padrao"; "--profile importacao" acelera cargas grandes, mas
+desliga o fsync (synchronous=OFF) e só deve ser usado em cargas que possam ser refeitas.
+Com --query-stats ARQUIVO.json, o tempo de cada query é medido e gravado ao final (ver QueryInstrumentation).
+A saída padrão contém apenas dados (JSON ou CSV); mensagens e progresso vão para stderr.
+Códigos de saída: 0 sucesso, 1 importação com arquivos ou lançamentos com erro,
+2 argumentos inválidos, 3 erro de banco de dados, 4 arquivo ou diretório inexistente.
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, TextIO
+from src.database.manager import DatabaseManager, DATABASE_PATH, DEFAULT_PROFILE, PRAGMA_PROFILES, CONFLICT_POLICIES
+from src.analysis.analytics import FinancialAnalyticsProtocol, SQLFinancialAnalytics
+import argparse
+import csv
+import json
+import sys
+
+EXIT_OK = 0
+EXIT_PARTIAL = 1
+EXIT_USAGE = 2
+EXIT_DATABASE = 3
+EXIT_INPUT = 4
+
+def _iso_date(value: str) -> str:
+    """Valida uma data AAAA-MM-DD recebida pela linha de comando."""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"data inválida: {value} (use AAAA-MM-DD)")
+
+def _write_json(data: Any, out: TextIO) -> None:
+    json.dump(data, out, ensure_ascii=False, indent=2)
+    out.write("\n")
+
+def _write_csv(header: Sequence[str], rows: Iterable[Sequence[Any]], out: TextIO) -> None:
+    # Mesmo delimitador do relatório de erros da importação, aberto diretamente no Excel em pt-BR.
+    writer = csv.writer(out, delimiter=";")
+    writer.writerow(header)
+    writer.writerows(rows)
+
+def _analytics(db_manager: DatabaseManager, engine: str) -> FinancialAnalyticsProtocol:
+    if engine == "columnar":
+        from src.analysis.columnar import ColumnarFinancialAnalytics
+        return ColumnarFinancialAnalytics(db_manager)
+    return SQLFinancialAnalytics(db_manager)
+
+def _filters(args: argparse.Namespace) -> Dict[str, str]:
+    return {"start_date": args.start_date or "", "end_date": args.end_date or "", "fornecedor": args.fornecedor or ""}
+
+def cmd_import(args: argparse.Namespace, db_manager: DatabaseManager, out: TextIO) -> int:
+    """Importa arquivos XML de NF-e de diretórios e/ou arquivos."""
+    from src.services.batch_importer import BatchXMLImporter, ImportProgress, find_xml_files
+
+    files: List[str] = []
+    for path in args.paths:
+        if Path(path).is_dir():
+            files.extend(find_xml_files(path, recursive=not args.no_recursive))
+        elif Path(path).is_file():
+            files.append(path)
+        else:
+            print(f"Arquivo ou diretório não encontrado: {path}", file=sys.stderr)
+            return EXIT_INPUT
+
+    def on_progress(progress: ImportProgress) -> None:
+        print(
+            f"{progress['files_done']}/{progress['files_total']} arquivos "
+            f"({progress['files_per_second']:.0f} arquivos/s, {progress['files_failed']} com erro)",
+            file=sys.stderr,
+        )
+
+    importer = BatchXMLImporter(
+        db_manager,
+        max_workers=args.workers,
+        batch_size=args.batch_size,
+        on_conflict=args.on_conflict,
+        parser_mode=args.parser_mode,
+        progress_callback=on_progress if args.progress else None,
+        items=args.items,
+    )
+    report = importer.import_files(files, args.error_report)
+    _write_json(report, out)
+    return EXIT_PARTIAL if report["files_failed"] or report["failed"] else EXIT_OK
+
+def cmd_watch(args: argparse.Namespace, db_manager: DatabaseManager, out: TextIO) -> int:
+    """Monitora um diretório e importa os XMLs novos ou alterados, até Ctrl+C."""
+    from src.services.folder_watcher import FolderWatcher, WatchBatch
+
+    totals = {"files": 0, "inserted": 0, "errors": 0}
+
+    def on_batch(batch: WatchBatch) -> None:
+        for key in totals:
+            totals[key] += batch[key]  # type: ignore[literal-required]
+        print(
+            f"{batch['files']} arquivo(s): {batch['inserted']} lançamento(s) gravado(s), {batch['errors']} com erro, "
+            f"{batch['unchanged']} sem alteração; fila {batch['backlog']}; latência {batch['latency'] * 1000:.0f} ms",
+            file=sys.stderr,
+        )
+
+    watcher = FolderWatcher(
+        db_manager, args.directory,
+        recursive=not args.no_recursive,
+        parser_mode=args.parser_mode,
+        on_conflict=args.on_conflict,
+        poll_interval=args.poll,
+        settle_time=args.settle,
+        batch_size=args.batch_size,
+        max_backlog=args.max_backlog,
+        on_batch=on_batch,
+        items=args.items,
+    )
+    try:
+        if args.once:
+            # Processa o que já está estável e sai: útil em agendamentos (ex.: cron).
+            watcher.settle_time = 0.0
+            watcher.poll()
+        else:
+            print(f"Monitorando {watcher.directory} (Ctrl+C para sair)", file=sys.stderr)
+            watcher.run()
+    except KeyboardInterrupt:
+        pass
+    _write_json(totals, out)
+    return EXIT_PARTIAL if totals["errors"] else EXIT_OK
+
+def cmd_report(args: argparse.Namespace, db_manager: DatabaseManager, out: TextIO) -> int:
+    """Lista os lançamentos filtrados. CSV e JSONL são gravados à medida que as linhas são lidas."""
+    if args.format == "json":
+        _write_json(db_manager.get_lancamentos(limit=args.limit, **_filters(args)), out)
+        return EXIT_OK
+
+    from src.services.exporter import WRITERS
+    WRITERS[args.format](db_manager.iter_lancamentos(limit=args.limit, **_filters(args)), out)
+    return EXIT_OK
+
+def cmd_search(args: argparse.Namespace, db_manager: DatabaseManager, out: TextIO) -> int:
+    """Busca textual nos lançamentos, dos mais relevantes para os menos."""
+    rows = db_manager.search_lancamentos(args.text, limit=args.limit, **_filters(args))
+    if args.format == "json":
+        _write_json(rows, out)
+    else:
+        from src.services.exporter import WRITERS
+        WRITERS[args.format](rows, out)
+    return EXIT_OK
+
+def cmd_summary(args: argparse.Namespace, db_manager: DatabaseManager, out: TextIO) -> int:
+    """Totais de entradas e saídas e saldo."""
+    summary = _analytics(db_manager, args.engine).get_financial_summary(None, **_filters(args))
+    if args.format == "json":
+        _write_json(summary, out)
+    else:
+        _write_csv(("indicador", "valor"), summary.items(), out)
+    return EXIT_OK
+
+def cmd_monthly(args: argparse.Namespace, db_manager: DatabaseManager, out: TextIO) -> int:
+    """Totais por mês e tipo."""
+    monthly = _analytics(db_manager, args.engine).get_monthly_totals(None, **_filters(args))
+    monthly = dict(sorted(monthly.items()))
+    if args.format == "json":
+        _write_json(monthly, out)
+    else:
+        _write_csv(
+            ("mes", "tipo", "total"),
+            ((mes, tipo, total) for mes, totais in monthly.items() for tipo, total in sorted(totais.items())),
+            out,
+        )
+    return EXIT_OK
+
+def cmd_suppliers(args: argparse.Namespace, db_manager: DatabaseManager, out: TextIO) -> int:
+    """Total por fornecedor, do maior para o menor."""
+    suppliers = _analytics(db_manager, args.engine).get_supplier_analysis(None, **_filters(args))
+    ranked = sorted(suppliers.items(), key=lambda item: item[1], reverse=True)
+    if args.format == "json":
+        _write_json(dict(ranked), out)
+    else:
+        _write_csv(("fornecedor", "total"), ranked, out)
+    return EXIT_OK
+
+def _write_item_totals(totals: Dict[str, Any], key: str, args: argparse.Namespace, out: TextIO) -> None:
+    if args.format == "json":
+        _write_json(totals, out)
+    else:
+        _write_csv(
+            (key, "descricao", "itens", "quantidade", "valor_total", "preco_medio"),
+            ((chave, t["descricao"], t["itens"], t["quantidade"], t["valor_total"], t["preco_medio"]) for chave, t in totals.items()),
+            out,
+        )
+
+def cmd_ncm(args: argparse.Namespace, db_manager: DatabaseManager, out: TextIO) -> int:
+    """Totais dos itens das notas por NCM, do maior valor para o menor."""
+    _write_item_totals(SQLFinancialAnalytics(db_manager).get_ncm_analysis(None, limit=args.limit, **_filters(args)), "ncm", args, out)
+    return EXIT_OK
+
+def cmd_products(args: argparse.Namespace, db_manager: DatabaseManager, out: TextIO) -> int:
+    """Totais dos itens das notas por código de produto, do maior valor para o menor."""
+    _write_item_totals(SQLFinancialAnalytics(db_manager).get_product_analysis(None, limit=args.limit, **_filters(args)), "codigo", args, out)
+    return EXIT_OK
+
+def cmd_archive(args: argparse.Namespace, db_manager: DatabaseManager, out: TextIO) -> int:
+    """Move anos encerrados para arquivos separados (ver DatabaseManager.archive_year)."""
+    years = args.year or db_manager.archivable_years()
+    moved: Dict[int, int] = {}
+    for year in years:
+        print(f"Arquivando {year}...", file=sys.stderr)
+        moved[year] = db_manager.archive_year(
+            year, args.batch_size,
+            progress=lambda n: print(f"  {n} lançamento(s) movido(s)", file=sys.stderr),
+        )
+    _write_json(moved, out)
+    return EXIT_OK
+
+COMMANDS: Dict[str, Callable[[argparse.Namespace, DatabaseManager, TextIO], int]] = {
+    "import": cmd_import,
+    "watch": cmd_watch,
+    "report": cmd_report,
+    "search": cmd_search,
+    "summary": cmd_summary,
+    "monthly": cmd_monthly,
+    "suppliers": cmd_suppliers,
+    "ncm": cmd_ncm,
+    "products": cmd_products,
+    "archive": cmd_archive,
+}
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="FiscalizeCórtex em linha de comando.")
+    parser.add_argument("--db", type=Path, default=DATABASE_PATH, help="Caminho do banco SQLite.")
+    parser.add_argument(
+        "--profile", choices=list(PRAGMA_PROFILES), default=DEFAULT_PROFILE,
+        help=(
+            f"Perfil de PRAGMAs (padrão: {DEFAULT_PROFILE}, em todos os comandos). Atenção: importacao usa "
+            "synchronous=OFF e uma queda de energia ou do sistema durante a carga pode corromper o banco; "
+            "use só em cargas que possam ser refeitas a partir de um backup."
+        ),
+    )
+    parser.add_argument("-o", "--output", type=Path, help="Grava a saída neste arquivo em vez da saída padrão.")
+    parser.add_argument("--query-stats", type=Path, help="Mede as queries executadas e grava as estatísticas neste JSON.")
+    parser.add_argument("--slow-query-ms", type=float, default=100.0, help="Limite do log de queries lentas (com --query-stats).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Importa XMLs de NF-e.")
+    import_parser.add_argument("paths", nargs="+", help="Diretórios e/ou arquivos XML.")
+    import_parser.add_argument("--workers", type=int, default=None, help="Processos de parsing (0 = no próprio processo).")
+    import_parser.add_argument("--batch-size", type=int, default=2000)
+    import_parser.add_argument("--on-conflict", choices=list(CONFLICT_POLICIES), default="skip")
+    import_parser.add_argument(
+        "--parser-mode", default="xpath", choices=("padrao", "xpath", "iterparse"),
+        help="iterparse usa menos memória, mas é mais lento: só para XMLs muito grandes.",
+    )
+    import_parser.add_argument("--error-report", help="Caminho do CSV com os arquivos que falharam.")
+    import_parser.add_argument("--no-recursive", action="store_true", help="Não percorre subdiretórios.")
+    import_parser.add_argument("--progress", action="store_true", help="Exibe o andamento em stderr.")
+    import_parser.add_argument("--items", action="store_true", help="Também grava os itens (det/prod) das notas.")
+
+    watch_parser = subparsers.add_parser("watch", help="Monitora um diretório e importa os XMLs que chegarem.")
+    watch_parser.add_argument("directory", help="Diretório monitorado.")
+    watch_parser.add_argument("--poll", type=float, default=0.25, help="Intervalo entre varreduras, em segundos.")
+    watch_parser.add_argument("--settle", type=float, default=0.3, help="Tempo sem alteração antes de ler um arquivo, em segundos.")
+    watch_parser.add_argument("--batch-size", type=int, default=50, help="Arquivos por transação.")
+    watch_parser.add_argument("--max-backlog", type=int, default=1000, help="Arquivos na fila antes de suspender a varredura.")
+    watch_parser.add_argument("--on-conflict", choices=list(CONFLICT_POLICIES), default="replace")
+    watch_parser.add_argument(
+        "--parser-mode", default="xpath", choices=("padrao", "xpath", "iterparse"),
+        help="iterparse usa menos memória, mas é mais lento: só para XMLs muito grandes.",
+    )
+    watch_parser.add_argument("--no-recursive", action="store_true", help="Não monitora subdiretórios.")
+    watch_parser.add_argument("--once", action="store_true", help="Processa os arquivos pendentes e sai.")
+    watch_parser.add_argument("--items", action="store_true", help="Também grava os itens (det/prod) das notas.")
+
+    archive_parser = subparsers.add_parser("archive", help="Move anos encerrados para arquivos separados (notas_AAAA.db).")
+    archive_parser.add_argument("--year", type=int, nargs="+", help="Anos a arquivar (padrão: todos os anteriores ao atual).")
+    archive_parser.add_argument("--batch-size", type=int, default=5000, help="Lançamentos movidos por transação.")
+
+    for name, help_text in (
+        ("report", "Lista os lançamentos."),
+        ("search", "Busca textual (fornecedor, loja, documento, NF-e, chave, observação)."),
+        ("summary", "Resumo financeiro."),
+        ("monthly", "Totais mensais por tipo."),
+        ("suppliers", "Totais por fornecedor."),
+        ("ncm", "Totais dos itens das notas por NCM."),
+        ("products", "Totais dos itens das notas por código de produto."),
+    ):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("--from", dest="start_date", type=_iso_date, help="Data inicial (AAAA-MM-DD).")
+        sub.add_argument("--to", dest="end_date", type=_iso_date, help="Data final (AAAA-MM-DD).")
+        sub.add_argument("--fornecedor", help="Filtra por fornecedor.")
+        if name == "report":
+            sub.add_argument("--limit", type=int, default=0, help="Máximo de lançamentos (0 = todos).")
+            sub.add_argument("--format", choices=("csv", "jsonl", "json"), default="csv")
+        elif name == "search":
+            sub.add_argument("text", help="Palavras buscadas; cada uma é tratada como prefixo.")
+            sub.add_argument("--limit", type=int, default=100, help="Máximo de lançamentos.")
+            sub.add_argument("--format", choices=("csv", "jsonl", "json"), default="csv")
+        elif name in ("ncm", "products"):
+            sub.add_argument("--limit", type=int, default=0, help="Máximo de linhas (0 = todas).")
+            sub.add_argument("--format", choices=("json", "csv"), default="json")
+        else:
+            sub.add_argument("--format", choices=("json", "csv"), default="json")
+            sub.add_argument("--engine", choices=("sql", "columnar"), default="sql", help="columnar requer NumPy.")
+
+    return parser
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command not in ("import", "watch", "archive") and bool(args.start_date) != bool(args.end_date):
+        parser.error("--from e --to devem ser informados juntos")
+
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    db_manager: Optional[DatabaseManager] = None
+    try:
+        db_manager = DatabaseManager(profile=args.profile, db_path=args.db)
+        if args.query_stats:
+            db_manager.enable_instrumentation(args.slow_query_ms)
+        return COMMANDS[args.command](args, db_manager, out)
+    except RuntimeError as e:
+        print(f"Erro de banco de dados: {e}", file=sys.stderr)
+        return EXIT_DATABASE
+    except (FileNotFoundError, NotADirectoryError) as e:
+        print(str(e), file=sys.stderr)
+        return EXIT_INPUT
+    except (ImportError, ValueError) as e:
+        print(str(e), file=sys.stderr)
+        return EXIT_USAGE
+    finally:
+        if db_manager is not None:
+            if db_manager.instrumentation is not None:
+                db_manager.instrumentation.dump(args.query_stats)
+            db_manager.close()
+        if out is not sys.stdout:
+            out.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
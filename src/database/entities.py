@@ -0,0 +1,196 @@
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# A partir da versão 8 do esquema, loja e fornecedor de cada lançamento ficam nos cadastros
+# (lojas, fornecedores) e a tabela lancamentos_base guarda apenas os ids. A view lancamentos
+# junta nomes e CNPJs de volta, com as mesmas colunas de antes, e aceita INSERT, UPDATE e
+# DELETE por triggers INSTEAD OF; o DatabaseManager grava direto em lancamentos_base.
+# Os cadastros são únicos pelo par (nome, CNPJ): notas de um mesmo CNPJ com razões sociais
+# diferentes continuam exibindo o nome que veio em cada uma.
+BASE_TABLE = "lancamentos_base"
+
+# (cadastro, coluna do nome, coluna do CNPJ, coluna do id em lancamentos_base)
+ENTITY_COLUMNS: Tuple[Tuple[str, str, str, str], ...] = (
+    ("lojas", "loja", "cnpj_loja", "loja_id"),
+    ("fornecedores", "fornecedor", "cnpj_forn", "fornecedor_id"),
+)
+# Demais colunas, gravadas como estão; com as de ENTITY_COLUMNS, na ordem de LANCAMENTO_COLUMNS.
+VALUE_COLUMNS = ("documento", "nfe", "chave_nfe", "valor", "data_lancamento", "vencimento", "observacao", "tipo")
+
+def entity_table_sql(table: str, name: Optional[str] = None) -> str:
+    """CREATE TABLE de um cadastro (lojas ou fornecedores), opcionalmente com outro nome."""
+    return f"""
+        CREATE TABLE IF NOT EXISTS {name or table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            cnpj TEXT NOT NULL,
+            UNIQUE (nome, cnpj)
+        )
+    """
+
+def entity_id_sql(table: str, nome: str, cnpj: str) -> str:
+    """
+    Expressão SQL com o id do cadastro para o par (nome, cnpj) de um lançamento em texto.
+    Um dos dois em branco (NULL) é tratado como '', e o lançamento sem nenhum dos dois fica sem id.
+    """
+    return (
+        f"(SELECT id FROM {table} WHERE nome = COALESCE({nome}, '') AND cnpj = COALESCE({cnpj}, '')"
+        f" AND ({nome} IS NOT NULL OR {cnpj} IS NOT NULL))"
+    )
+
+def entity_name_sql(table: str, entity_id: str) -> str:
+    """Expressão SQL com o nome do cadastro de um id (NULL para id NULL)."""
+    return f"(SELECT nome FROM {table} WHERE id = {entity_id})"
+
+BASE_SCHEMA: List[str] = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {BASE_TABLE} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        loja_id INTEGER REFERENCES lojas (id),
+        fornecedor_id INTEGER REFERENCES fornecedores (id),
+        documento TEXT, nfe TEXT, chave_nfe TEXT,
+        valor REAL NOT NULL, data_lancamento TEXT, vencimento TEXT,
+        observacao TEXT, tipo TEXT NOT NULL
+    )
+    """,
+]
+
+# Mesmos índices da tabela lancamentos até a versão 7, com o fornecedor pelo id.
+BASE_INDEXES: List[str] = [
+    f"CREATE INDEX IF NOT EXISTS idx_lancamentos_data_fornecedor ON {BASE_TABLE} (data_lancamento, fornecedor_id)",
+    f"CREATE INDEX IF NOT EXISTS idx_lancamentos_fornecedor_data ON {BASE_TABLE} (fornecedor_id, data_lancamento)",
+    f"CREATE INDEX IF NOT EXISTS idx_lancamentos_tipo ON {BASE_TABLE} (tipo)",
+    f"CREATE INDEX IF NOT EXISTS idx_lancamentos_vencimento ON {BASE_TABLE} (vencimento)",
+    f"""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_lancamentos_chave_nfe ON {BASE_TABLE} (chave_nfe)
+    WHERE chave_nfe IS NOT NULL AND chave_nfe <> ''
+    """,
+]
+
+# O par (nome, CNPJ) já é indexado pelo UNIQUE; o CNPJ sozinho serve à checagem do cadastro manual.
+ENTITY_INDEXES: List[str] = [
+    "CREATE INDEX IF NOT EXISTS idx_lojas_cnpj ON lojas (cnpj)",
+    "CREATE INDEX IF NOT EXISTS idx_fornecedores_cnpj ON fornecedores (cnpj)",
+]
+
+_VALUES = ", ".join(VALUE_COLUMNS)
+_ENTITY_IDS = ", ".join(id_column for _, _, _, id_column in ENTITY_COLUMNS)
+
+def _new_entities(row: str) -> str:
+    """
+    SQL que cadastra a loja e o fornecedor de um lançamento (NEW) ainda não cadastrados.
+    Sem cláusula de conflito: um INSERT OR REPLACE na view substituiria o cadastro existente.
+    """
+    return "".join(
+        f"""
+        INSERT INTO {table} (nome, cnpj)
+        SELECT COALESCE({row}.{nome}, ''), COALESCE({row}.{cnpj}, '')
+        WHERE ({row}.{nome} IS NOT NULL OR {row}.{cnpj} IS NOT NULL)
+          AND NOT EXISTS (SELECT 1 FROM {table} WHERE nome = COALESCE({row}.{nome}, '') AND cnpj = COALESCE({row}.{cnpj}, ''));
+        """
+        for table, nome, cnpj, _ in ENTITY_COLUMNS
+    )
+
+def _entity_ids(row: str) -> str:
+    return ", ".join(entity_id_sql(table, f"{row}.{nome}", f"{row}.{cnpj}") for table, nome, cnpj, _ in ENTITY_COLUMNS)
+
+def _entity_assignments(row: str) -> str:
+    return ", ".join(
+        f"{id_column} = {entity_id_sql(table, f'{row}.{nome}', f'{row}.{cnpj}')}" for table, nome, cnpj, id_column in ENTITY_COLUMNS
+    )
+
+VIEW_SCHEMA: List[str] = [
+    f"""
+    CREATE VIEW IF NOT EXISTS lancamentos AS
+    SELECT l.id AS id, lo.nome AS loja, lo.cnpj AS cnpj_loja, f.nome AS fornecedor, f.cnpj AS cnpj_forn,
+           l.documento AS documento, l.nfe AS nfe, l.chave_nfe AS chave_nfe, l.valor AS valor,
+           l.data_lancamento AS data_lancamento, l.vencimento AS vencimento,
+           l.observacao AS observacao, l.tipo AS tipo
+    FROM {BASE_TABLE} AS l
+    LEFT JOIN lojas AS lo ON lo.id = l.loja_id
+    LEFT JOIN fornecedores AS f ON f.id = l.fornecedor_id
+    """,
+    # A política de conflito de quem grava na view (ex.: INSERT OR REPLACE) vale para o INSERT abaixo.
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_lancamentos_view_insert INSTEAD OF INSERT ON lancamentos
+    BEGIN
+        {_new_entities("NEW")}
+        INSERT INTO {BASE_TABLE} (id, {_ENTITY_IDS}, {_VALUES})
+        VALUES (NEW.id, {_entity_ids("NEW")}, {", ".join(f"NEW.{column}" for column in VALUE_COLUMNS)});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_lancamentos_view_update INSTEAD OF UPDATE ON lancamentos
+    BEGIN
+        {_new_entities("NEW")}
+        UPDATE {BASE_TABLE} SET
+            id = NEW.id,
+            {_entity_assignments("NEW")},
+            {", ".join(f"{column} = NEW.{column}" for column in VALUE_COLUMNS)}
+        WHERE id = OLD.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_lancamentos_view_delete INSTEAD OF DELETE ON lancamentos
+    BEGIN DELETE FROM {BASE_TABLE} WHERE id = OLD.id; END
+    """,
+]
+
+# Inserção usada pelo DatabaseManager: parâmetros com os ids já resolvidos por resolve_rows.
+def insert_sql(verb: str, upsert: str = "") -> str:
+    """INSERT em lancamentos_base com o verbo (ex.: INSERT OR REPLACE) e a cláusula de conflito informados."""
+    return f"""
+        {verb} INTO {BASE_TABLE} ({_ENTITY_IDS}, {_VALUES})
+        VALUES (?, ?, {", ".join("?" for _ in VALUE_COLUMNS)}) {upsert}
+    """
+
+def prepare_row(values: Sequence[Any]) -> Tuple[Any, ...]:
+    """
+    Ajusta os valores de um lançamento (ordem de LANCAMENTO_COLUMNS) às regras de entity_id_sql:
+    em um par (nome, CNPJ) com só um dos dois preenchido, o outro vira ''.
+    """
+    loja, cnpj_loja, fornecedor, cnpj_forn = values[:4]
+    if (loja is None) == (cnpj_loja is None) and (fornecedor is None) == (cnpj_forn is None):
+        return tuple(values)
+    if (loja is None) != (cnpj_loja is None):
+        loja, cnpj_loja = loja or "", cnpj_loja or ""
+    if (fornecedor is None) != (cnpj_forn is None):
+        fornecedor, cnpj_forn = fornecedor or "", cnpj_forn or ""
+    return (loja, cnpj_loja, fornecedor, cnpj_forn, *values[4:])
+
+def resolve_rows(conn: sqlite3.Connection, rows: Sequence[Sequence[Any]]) -> Tuple[List[Tuple[Any, ...]], List[str]]:
+    """
+    Troca nome e CNPJ de loja e fornecedor dos lançamentos (já preparados) pelos ids dos cadastros,
+    cadastrando os pares que ainda não existem: uma consulta por par distinto do lote, não por linha.
+    Retorna as linhas na ordem de insert_sql e os cadastros que ganharam linhas. Os ids só valem
+    dentro da transação em que foram resolvidos, que deve ser a mesma da inserção.
+    """
+    changed: List[str] = []
+    columns: List[List[Optional[int]]] = []
+    for position, (table, _, _, _) in enumerate(ENTITY_COLUMNS):
+        ids: Dict[Tuple[Any, Any], Optional[int]] = {(None, None): None}
+        pairs = [(row[2 * position], row[2 * position + 1]) for row in rows]
+        for pair in pairs:
+            if pair in ids:
+                continue
+            found = conn.execute(f"SELECT id FROM {table} WHERE nome = ? AND cnpj = ?", pair).fetchone()
+            if found is None:
+                ids[pair] = conn.execute(f"INSERT INTO {table} (nome, cnpj) VALUES (?, ?)", pair).lastrowid
+                if table not in changed:
+                    changed.append(table)
+            else:
+                ids[pair] = found[0]
+        columns.append([ids[pair] for pair in pairs])
+    return [(loja_id, fornecedor_id, *row[4:]) for loja_id, fornecedor_id, row in zip(*columns, rows)], changed
+
+# Cargas em lote (insert_lancamentos_many, record_imported_files) gravam em carga_em_lote o maior
+# id de lancamentos_base no início da transação. Os triggers dos resumos e da busca não rodam para
+# as linhas de id maior, que o DatabaseManager soma de uma vez antes do commit (ver
+# rollups.add_rows_after e search.index_rows_after). A linha é apagada na mesma transação, então
+# nenhuma outra conexão a vê e uma carga interrompida não deixa os triggers desligados.
+BULK_TABLE = "carga_em_lote"
+BULK_SCHEMA = f"CREATE TABLE IF NOT EXISTS {BULK_TABLE} (apos_id INTEGER NOT NULL)"
+
+def per_row_sql(row: str) -> str:
+    """Cláusula WHEN dos triggers em lancamentos_base que uma carga em lote assume para a linha `row` (NEW ou OLD)."""
+    return f"WHEN NOT EXISTS (SELECT 1 FROM {BULK_TABLE} WHERE apos_id < {row}.id)"
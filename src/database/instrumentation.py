@@ -0,0 +1,149 @@
+import collections
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, TypedDict
+
+# Gera o EXPLAIN QUERY PLAN de uma query: (query, parâmetros) -> linhas do plano.
+PlanExplainer = Callable[[str, Sequence[Any]], List[str]]
+
+class StatementStats(TypedDict):
+    """Estatísticas acumuladas de um formato de query."""
+    query: str
+    calls: int
+    errors: int
+    rows: int
+    total_ms: float
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+
+class SlowQuery(TypedDict):
+    """Uma execução que passou do limite de query lenta."""
+    timestamp: str
+    query: str
+    params: str
+    ms: float
+    rows: int
+    plan: List[str]
+
+class _Accumulator:
+    """Contadores de um formato de query. As latências recentes ficam em uma amostra limitada."""
+    __slots__ = ("calls", "errors", "rows", "total", "max", "samples")
+
+    def __init__(self, sample_size: int) -> None:
+        self.calls = self.errors = self.rows = 0
+        self.total = self.max = 0.0
+        self.samples: Deque[float] = collections.deque(maxlen=sample_size)
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    """Percentil pelo método do posto mais próximo, sobre uma lista já ordenada."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+class QueryInstrumentation:
+    """
+    Coleta tempos de execução por formato de query (texto com espaços normalizados)
+    e mantém um log das queries lentas com o respectivo EXPLAIN QUERY PLAN.
+    Percentis são calculados sobre as `sample_size` execuções mais recentes de cada formato.
+    """
+
+    def __init__(self, slow_threshold_ms: float = 100.0, slow_log_size: int = 200, sample_size: int = 1024, explain: Optional[PlanExplainer] = None) -> None:
+        self.slow_threshold = slow_threshold_ms / 1000
+        self.sample_size = sample_size
+        self.explain = explain
+        self._stats: Dict[str, _Accumulator] = {}
+        self._shapes: Dict[str, str] = {}
+        self._plans: Dict[str, List[str]] = {}
+        self._slow: Deque[SlowQuery] = collections.deque(maxlen=slow_log_size)
+        self._lock = threading.Lock()
+
+    def record(self, query: str, params: Optional[Sequence[Any]], seconds: float, rows: int, error: bool = False) -> None:
+        """Registra uma execução. Chamado pelo DatabaseManager após cada query instrumentada."""
+        shape = self._shapes.get(query)
+        if shape is None:
+            shape = self._shapes.setdefault(query, " ".join(query.split()))
+
+        with self._lock:
+            acc = self._stats.get(shape)
+            if acc is None:
+                acc = self._stats[shape] = _Accumulator(self.sample_size)
+            acc.calls += 1
+            acc.errors += error
+            acc.rows += max(rows, 0)
+            acc.total += seconds
+            acc.max = max(acc.max, seconds)
+            acc.samples.append(seconds)
+
+        if seconds >= self.slow_threshold and not error:
+            entry: SlowQuery = {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "query": shape,
+                "params": repr(tuple(params or ()))[:200],
+                "ms": seconds * 1000,
+                "rows": rows,
+                "plan": self._plan(shape, query, params),
+            }
+            with self._lock:
+                self._slow.append(entry)
+
+    def _plan(self, shape: str, query: str, params: Optional[Sequence[Any]]) -> List[str]:
+        """
+        EXPLAIN QUERY PLAN da query, guardado por formato. O EXPLAIN roda fora do lock; se duas
+        threads o calcularem ao mesmo tempo, fica o primeiro plano guardado.
+        """
+        if self.explain is None:
+            return []
+        with self._lock:
+            plan = self._plans.get(shape)
+        if plan is None:
+            try:
+                plan = self.explain(query, params or ())
+            except Exception as e:
+                plan = [f"(plano indisponível: {e})"]
+            with self._lock:
+                plan = self._plans.setdefault(shape, plan)
+        return plan
+
+    def stats(self) -> List[StatementStats]:
+        """Estatísticas por formato de query, da maior para a menor soma de tempo."""
+        with self._lock:
+            snapshot = [(shape, acc.calls, acc.errors, acc.rows, acc.total, acc.max, sorted(acc.samples)) for shape, acc in self._stats.items()]
+
+        result: List[StatementStats] = [
+            {
+                "query": shape, "calls": calls, "errors": errors, "rows": rows,
+                "total_ms": total * 1000,
+                "p50_ms": _percentile(samples, 0.50) * 1000,
+                "p95_ms": _percentile(samples, 0.95) * 1000,
+                "max_ms": maximum * 1000,
+            }
+            for shape, calls, errors, rows, total, maximum, samples in snapshot
+        ]
+        return sorted(result, key=lambda s: s["total_ms"], reverse=True)
+
+    def slow_queries(self) -> List[SlowQuery]:
+        """Queries lentas mais recentes, da mais nova para a mais antiga."""
+        with self._lock:
+            return list(reversed(self._slow))
+
+    def reset(self) -> None:
+        """Descarta as estatísticas e o log de queries lentas."""
+        with self._lock:
+            self._stats.clear()
+            self._slow.clear()
+            self._plans.clear()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "slow_threshold_ms": self.slow_threshold * 1000,
+            "statements": self.stats(),
+            "slow_queries": self.slow_queries(),
+        }
+
+    def dump(self, path: Path) -> None:
+        """Grava as estatísticas e o log de queries lentas em JSON."""
+        Path(path).write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
@@ -0,0 +1,75 @@
+import sqlite3
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
+
+# Itens (det/prod) das NF-e importadas, ligados ao lançamento pela chave de acesso.
+# Os valores de impostos são os destacados em cada item (vICMS, vIPI, vPIS, vCOFINS).
+ITEMS_TABLE = "lancamento_itens"
+ITEM_COLUMNS = (
+    "chave_nfe", "n_item", "codigo", "gtin", "descricao", "ncm", "cfop", "unidade",
+    "quantidade", "valor_unitario", "valor_total", "valor_icms", "valor_ipi", "valor_pis", "valor_cofins",
+)
+
+# Um item já gravado (mesma chave e nItem) é substituído: reimportar uma nota é seguro.
+INSERT_ITEM = f"""
+    INSERT OR REPLACE INTO {ITEMS_TABLE} ({', '.join(ITEM_COLUMNS)})
+    VALUES ({', '.join('?' for _ in ITEM_COLUMNS)})
+"""
+
+def rows_by_chave(itens: Iterable[Mapping[str, Any]]) -> Dict[str, List[Tuple[Any, ...]]]:
+    """Parâmetros de INSERT_ITEM agrupados pela chave da nota, para gravar só os itens das notas gravadas."""
+    grouped: Dict[str, List[Tuple[Any, ...]]] = {}
+    for item in itens:
+        grouped.setdefault(item["chave_nfe"], []).append(tuple(map(item.get, ITEM_COLUMNS)))
+    return grouped
+
+# Agrupamentos aceitos por aggregate_itens e a coluna de cada um.
+ITEM_GROUPS = {"ncm": "ncm", "produto": "codigo"}
+
+def item_table_sql(schema: str = "main") -> str:
+    """CREATE TABLE da tabela de itens em um banco (o principal ou um arquivo anexado)."""
+    return f"""
+        CREATE TABLE IF NOT EXISTS {schema}.{ITEMS_TABLE} (
+            id INTEGER PRIMARY KEY,
+            chave_nfe TEXT NOT NULL,
+            n_item INTEGER NOT NULL,
+            codigo TEXT, gtin TEXT, descricao TEXT, ncm TEXT, cfop TEXT, unidade TEXT,
+            quantidade REAL NOT NULL DEFAULT 0,
+            valor_unitario REAL NOT NULL DEFAULT 0,
+            valor_total REAL NOT NULL DEFAULT 0,
+            valor_icms REAL NOT NULL DEFAULT 0,
+            valor_ipi REAL NOT NULL DEFAULT 0,
+            valor_pis REAL NOT NULL DEFAULT 0,
+            valor_cofins REAL NOT NULL DEFAULT 0,
+            UNIQUE (chave_nfe, n_item)
+        )
+    """
+
+def item_indexes_sql(schema: str = "main") -> List[str]:
+    """
+    Índices das agregações: cobrem as colunas lidas (chave, quantidade, valor e, por produto,
+    a descrição), então os totais por NCM e por produto vêm apenas do índice, na ordem do GROUP BY.
+    """
+    return [
+        f"CREATE INDEX IF NOT EXISTS {schema}.idx_itens_ncm ON {ITEMS_TABLE} (ncm, quantidade, valor_total)",
+        f"CREATE INDEX IF NOT EXISTS {schema}.idx_itens_produto ON {ITEMS_TABLE} (codigo, quantidade, valor_total, descricao)",
+    ]
+
+def item_trigger_sql(table: str) -> str:
+    """Trigger em `table` (lancamentos até a versão 8 do esquema, depois lancamentos_base)."""
+    # Excluir (ou substituir, com INSERT OR REPLACE) um lançamento remove os itens da nota.
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS trg_lancamentos_itens_delete AFTER DELETE ON {table}
+        WHEN OLD.chave_nfe IS NOT NULL AND OLD.chave_nfe <> ''
+        BEGIN DELETE FROM {ITEMS_TABLE} WHERE chave_nfe = OLD.chave_nfe; END
+    """
+
+ITEMS_SCHEMA: List[str] = [
+    item_table_sql(),
+    *item_indexes_sql(),
+    item_trigger_sql("lancamentos"),
+]
+
+def create_items_table(conn: sqlite3.Connection) -> None:
+    """Cria a tabela de itens, seus índices e o trigger que a mantém ligada aos lançamentos."""
+    for query in ITEMS_SCHEMA:
+        conn.execute(query)
@@ -1,7 +1,18 @@
+import calendar
+import collections
+import os
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Tuple, Any, Dict, TypedDict, Optional
+from typing import List, Tuple, Any, Callable, Deque, Dict, Set, TypedDict, Optional, Iterator, Iterable, Sequence, Union
 from pathlib import Path
+from src.database.migrations import apply_migrations, get_schema_version
+from src.database import entities, items, partitions, rollups, search
+from src.database.partitions import MAX_ATTACHED_ARCHIVES
+from src.database.rows import LancamentoRow, ROW_COLUMNS, RowFactory, lancamento_row_factory
+from src.database.instrumentation import QueryInstrumentation
 
 class LancamentoData(TypedDict):
     """Representa a estrutura de dados de um lançamento."""
@@ -19,33 +30,303 @@ class LancamentoData(TypedDict):
     observacao: str
     tipo: str
 
+class BatchResult(TypedDict):
+    """Contagem de linhas de um lote processado por insert_lancamentos_many."""
+    inserted: int
+    skipped: int
+    failed: int
+    items: int  # itens de NF-e gravados com as notas do lote
+
+class DuplicateEntityError(RuntimeError):
+    """Loja ou fornecedor com nome ou CNPJ já cadastrado (insert_entity)."""
+
+class ImportedFile(TypedDict):
+    """Arquivo processado pela pasta monitorada, com o estado usado para detectar alterações."""
+    caminho: str
+    tamanho: int
+    mtime_ns: int
+    hash: str
+    status: str  # "ok" ou "erro"
+    erro: str
+
+class ItemData(TypedDict):
+    """Item (det/prod) de uma NF-e, ligado ao lançamento pela chave_nfe."""
+    chave_nfe: str
+    n_item: int
+    codigo: str
+    gtin: Optional[str]
+    descricao: str
+    ncm: str
+    cfop: str
+    unidade: str
+    quantidade: float
+    valor_unitario: float
+    valor_total: float
+    valor_icms: float
+    valor_ipi: float
+    valor_pis: float
+    valor_cofins: float
+
+class ItemTotals(TypedDict):
+    """Totais dos itens de um NCM ou de um produto."""
+    descricao: str  # descrição do produto; vazia no agrupamento por NCM
+    itens: int
+    quantidade: float
+    valor_total: float
+    preco_medio: float  # valor_total / quantidade
+
+class ChangeSet(TypedDict):
+    """Alterações no banco desde uma versão informada a get_changes."""
+    version: int  # versão atual, a ser informada na próxima chamada
+    tables: List[str]  # tabelas alteradas por este gerenciador
+    external: bool  # outra conexão ou processo gravou no banco (PRAGMA data_version mudou)
+    append_only: bool  # os lançamentos só ganharam linhas novas: basta somar as de id maior (ver aggregate_by_tipo_since)
+
+# Resultado de get_lancamentos e afins: dicionários (padrão) ou, com compact=True, LancamentoRow.
+Lancamento = Union[LancamentoData, LancamentoRow]
+
+LANCAMENTO_COLUMNS: Tuple[str, ...] = (
+    'loja', 'cnpj_loja', 'fornecedor', 'cnpj_forn', 'documento', 'nfe', 'chave_nfe',
+    'valor', 'data_lancamento', 'vencimento', 'observacao', 'tipo'
+)
+
+# Política para chaves NF-e duplicadas na inserção em lote:
+# "skip" ignora a linha, "replace" substitui o lançamento existente e
+# "fail" conta a linha como falha sem interromper o restante do lote.
+CONFLICT_POLICIES: Dict[str, Tuple[str, str]] = {
+    "skip": ("INSERT", "ON CONFLICT DO NOTHING"),
+    "replace": ("INSERT OR REPLACE", ""),
+    "fail": ("INSERT", ""),
+}
+
+# Tabelas de cadastro aceitas por insert_entity e get_entities.
+ENTITY_TABLES: Tuple[str, ...] = ("lojas", "fornecedores")
+
+# Colunas lidas quando compact=True, na ordem dos campos de LancamentoRow.
+_ROW_SELECT = ", ".join(ROW_COLUMNS)
+
+# Escritas lembradas por get_changes; quem estiver mais atrasado que isso recarrega tudo.
+CHANGE_LOG_SIZE = 1000
+
 DATABASE_DIR = Path("data")
 DATABASE_PATH = DATABASE_DIR / "notas.db"
 
+# Perfis de PRAGMA aplicados a cada conexão aberta pelo DatabaseManager.
+# "padrao" é seguro para uso diário; "desempenho" troca memória por velocidade;
+# "seguro" garante durabilidade total a cada commit; "importacao" desliga o
+# fsync e só deve ser usado em cargas em lote que possam ser refeitas.
+PRAGMA_PROFILES: Dict[str, Dict[str, Any]] = {
+    "padrao": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,  # ~16 MB
+        "temp_store": "MEMORY",
+        "mmap_size": 0,
+    },
+    "desempenho": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -131072,  # ~128 MB
+        "temp_store": "MEMORY",
+        "mmap_size": 268435456,  # 256 MB
+    },
+    "seguro": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -8000,
+        "temp_store": "DEFAULT",
+        "mmap_size": 0,
+    },
+    "importacao": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -262144,  # ~256 MB
+        "temp_store": "MEMORY",
+        "mmap_size": 268435456,
+    },
+}
+DEFAULT_PROFILE = "padrao"
+
 class DatabaseManager:
     """Gerencia as operações de persistência de dados."""
 
-    def __init__(self) -> None:
-        DATABASE_DIR.mkdir(exist_ok=True)
-        self.db_path = DATABASE_PATH
+    def __init__(self, profile: str = DEFAULT_PROFILE, db_path: Path = DATABASE_PATH) -> None:
+        if profile not in PRAGMA_PROFILES:
+            raise ValueError(f"Perfil de banco desconhecido: {profile}. Opções: {', '.join(PRAGMA_PROFILES)}")
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = Path(db_path)
+        self.profile = profile
+
+        # Uma conexão persistente por thread: evita o custo de abrir e fechar
+        # o arquivo a cada query sem compartilhar conexões entre threads.
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        # Contador de escritas por tabela, usado pelas telas para saber se precisam recarregar.
+        self._data_versions: collections.Counter[str] = collections.Counter()
+        self._versions_lock = threading.Lock()
+        # Registro das escritas para get_changes: (versão, tabelas, só inclusões de lançamentos?).
+        # A versão também avança quando PRAGMA data_version revela uma escrita de fora.
+        self._change_version = 0
+        self._change_log: Deque[Tuple[int, Tuple[str, ...], bool]] = collections.deque(maxlen=CHANGE_LOG_SIZE)
+        self._monitor: Optional[sqlite3.Connection] = None
+        self._seen_data_version: Optional[int] = None
+
+        # Desligada por padrão; com None, cada query paga apenas uma comparação.
+        self.instrumentation: Optional[QueryInstrumentation] = None
+
         self._create_tables()
 
-    def _execute_query(self, query: str, params: Optional[Tuple[Any, ...]] = None, fetch_all: bool = False, fetch_one: bool = False) -> Any:
-        """Método utilitário para executar queries de forma segura."""
+    def enable_instrumentation(self, slow_threshold_ms: float = 100.0, slow_log_size: int = 200) -> QueryInstrumentation:
+        """Passa a medir as queries executadas, registrando as lentas com o plano de execução."""
+        if self.instrumentation is None:
+            self.instrumentation = QueryInstrumentation(slow_threshold_ms, slow_log_size, explain=self._explain_for_log)
+        else:
+            self.instrumentation.slow_threshold = slow_threshold_ms / 1000
+        return self.instrumentation
+
+    def disable_instrumentation(self) -> None:
+        """Para de medir as queries. As estatísticas já coletadas são descartadas."""
+        self.instrumentation = None
+
+    def _explain_for_log(self, query: str, params: Sequence[Any]) -> List[str]:
+        """EXPLAIN QUERY PLAN direto na conexão, sem passar pela instrumentação."""
+        rows = self._get_connection().execute(f"EXPLAIN QUERY PLAN {query}", tuple(params)).fetchall()
+        return [row["detail"] for row in rows]
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Retorna a conexão da thread atual, criando-a na primeira chamada."""
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            for pragma, value in PRAGMA_PROFILES[self.profile].items():
+                conn.execute(f"PRAGMA {pragma} = {value}")
+            # Necessário para que o DELETE implícito do INSERT OR REPLACE dispare os
+            # triggers que mantêm as tabelas de resumo.
+            conn.execute("PRAGMA recursive_triggers = ON")
+            self._local.conn = conn
+            # Anos arquivados anexados a esta conexão, do menos para o mais recentemente usado.
+            self._local.attached = collections.OrderedDict()
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self) -> None:
+        """Fecha todas as conexões abertas pelo gerenciador."""
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+        with self._versions_lock:
+            self._monitor = None
+
+    def _execute_query(self, query: str, params: Optional[Tuple[Any, ...]] = None, fetch_all: bool = False, fetch_one: bool = False, row_factory: Optional[RowFactory] = None) -> Any:
+        """
+        Método utilitário para executar queries de forma segura.
+        row_factory substitui o sqlite3.Row da conexão apenas nesta consulta.
+        """
+        conn = self._get_connection()
+        instrumentation = self.instrumentation
+        started = time.perf_counter() if instrumentation is not None else 0.0
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                cursor.execute(query, params or ())
+            cursor = conn.execute(query, params or ())
+            if row_factory is not None:
+                cursor.row_factory = row_factory
+            result = None
+            if fetch_all:
+                result = cursor.fetchall()
+            elif fetch_one:
+                result = cursor.fetchone()
+            # Leituras não abrem transação; só há commit quando houve escrita.
+            # Dentro de run_write_batch, o commit é feito uma única vez ao final do grupo.
+            if conn.in_transaction and not getattr(self._local, "batching", False):
                 conn.commit()
-                if fetch_all:
-                    return cursor.fetchall()
-                if fetch_one:
-                    return cursor.fetchone()
-                return None
+            if instrumentation is not None:
+                rows = len(result) if fetch_all else int(result is not None) if fetch_one else cursor.rowcount
+                instrumentation.record(query, params, time.perf_counter() - started, rows)
+            return result
         except sqlite3.Error as e:
+            if conn.in_transaction and not getattr(self._local, "batching", False):
+                conn.rollback()
+            if instrumentation is not None:
+                instrumentation.record(query, params, time.perf_counter() - started, 0, error=True)
             raise RuntimeError(f"Erro no banco de dados: {e}") from e
 
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Executa um bloco de escrita em uma única transação na conexão da thread."""
+        conn = self._get_connection()
+        if getattr(self._local, "batching", False):
+            with self._savepoint(conn):
+                yield conn
+            return
+        try:
+            conn.execute("BEGIN")
+            yield conn
+            conn.commit()
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.rollback()
+            raise RuntimeError(f"Erro no banco de dados: {e}") from e
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+
+    @contextmanager
+    def _savepoint(self, conn: sqlite3.Connection) -> Iterator[None]:
+        """Bloco dentro da transação atual que pode ser desfeito sem desfazer o restante."""
+        conn.execute("SAVEPOINT escrita")
+        try:
+            yield
+        except sqlite3.Error as e:
+            conn.execute("ROLLBACK TO escrita")
+            conn.execute("RELEASE escrita")
+            raise RuntimeError(f"Erro no banco de dados: {e}") from e
+        except BaseException:
+            conn.execute("ROLLBACK TO escrita")
+            conn.execute("RELEASE escrita")
+            raise
+        conn.execute("RELEASE escrita")
+
+    def run_write_batch(self, operations: Sequence[Callable[[], Any]]) -> List[Tuple[bool, Any]]:
+        """
+        Executa várias escritas (ex.: insert_lancamento) em uma única transação, com um só commit.
+        Cada operação roda em seu próprio SAVEPOINT: a falha de uma é desfeita sem afetar as demais.
+        Retorna, na ordem, (True, resultado) ou (False, exceção) de cada operação.
+        """
+        conn = self._get_connection()
+        results: List[Tuple[bool, Any]] = []
+        self._local.batching = True
+        # As alterações das operações só são registradas depois do commit (ver _mark_changed).
+        self._local.pending_changes = []
+        try:
+            conn.execute("BEGIN")
+            for operation in operations:
+                try:
+                    with self._savepoint(conn):
+                        results.append((True, operation()))
+                except Exception as e:
+                    results.append((False, e))
+            conn.commit()
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.rollback()
+            raise RuntimeError(f"Erro no banco de dados: {e}") from e
+        finally:
+            self._local.batching = False
+            pending, self._local.pending_changes = self._local.pending_changes, None
+        for tables, append_only in pending:
+            self._mark_changed(*tables, append_only=append_only)
+        return results
+
     def _create_tables(self) -> None:
         """Cria as tabelas do banco de dados, se não existirem."""
         queries = [
@@ -76,43 +357,521 @@ class DatabaseManager:
         for query in queries:
             self._execute_query(query)
 
+        try:
+            apply_migrations(self._get_connection())
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Erro ao atualizar o esquema do banco de dados: {e}") from e
+
+    def schema_version(self) -> int:
+        """Retorna a versão atual do esquema (PRAGMA user_version)."""
+        return get_schema_version(self._get_connection())
+
+    def get_data_versions(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        """Retorna a versão atual de cada tabela; a versão muda a cada escrita feita por este gerenciador."""
+        with self._versions_lock:
+            return tuple(self._data_versions[table] for table in tables)
+
+    def _mark_changed(self, *tables: str, append_only: bool = False) -> None:
+        """
+        Registra que as tabelas informadas foram alteradas. Deve ser chamado logo após o commit.
+        append_only indica que os lançamentos apenas ganharam linhas novas (nada excluído ou substituído).
+        Dentro de run_write_batch, o registro é adiado até o commit do grupo.
+        """
+        pending = getattr(self._local, "pending_changes", None)
+        if pending is not None:
+            pending.append((tables, append_only))
+            return
+        with self._versions_lock:
+            for table in tables:
+                self._data_versions[table] += 1
+            self._change_version += 1
+            self._change_log.append((self._change_version, tables, append_only))
+            # A própria escrita também muda o data_version visto pelo monitor; sem isso,
+            # get_changes a trataria como uma escrita de fora.
+            self._seen_data_version = self._read_data_version()
+
+    def _read_data_version(self) -> int:
+        """
+        PRAGMA data_version em uma conexão usada só para isso (com _versions_lock adquirido).
+        O valor muda quando qualquer outra conexão, deste ou de outro processo, faz um commit.
+        """
+        if self._monitor is None:
+            self._monitor = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            with self._connections_lock:
+                self._connections.append(self._monitor)
+        try:
+            return int(self._monitor.execute("PRAGMA data_version").fetchone()[0])
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Erro no banco de dados: {e}") from e
+
+    def get_changes(self, since: Optional[int] = None) -> ChangeSet:
+        """
+        Verificação barata de alterações para telas que fazem polling: um PRAGMA data_version
+        e a consulta ao registro de escritas, sem ler tabelas. Sem `since`, retorna apenas a
+        versão atual. Escritas feitas por este gerenciador aparecem em `tables`; escritas de
+        outros processos (ou sem registro, como rebuild_rollups) aparecem como `external`.
+        Uma escrita de fora concluída no instante entre um commit deste gerenciador e o seu
+        registro passa despercebida quando não é uma inclusão (inclusões são achadas pelo id).
+        """
+        with self._versions_lock:
+            data_version = self._read_data_version()
+            if self._seen_data_version is not None and data_version != self._seen_data_version:
+                self._change_version += 1
+                self._change_log.append((self._change_version, (), False))
+            self._seen_data_version = data_version
+            version = self._change_version
+            if since is None or since >= version:
+                return {"version": version, "tables": [], "external": False, "append_only": True}
+            entries = [entry for entry in self._change_log if entry[0] > since]
+            if len(entries) < version - since:
+                # O registro já descartou parte das escritas: trata como alteração completa.
+                return {"version": version, "tables": sorted(self._data_versions), "external": True, "append_only": False}
+
+        tables = sorted({table for _, changed, _ in entries for table in changed})
+        external = any(not changed for _, changed, _ in entries)
+        append_only = not external and all(append for _, changed, append in entries if "lancamentos" in changed)
+        return {"version": version, "tables": tables, "external": external, "append_only": append_only}
+
+    @staticmethod
+    def _check_entity_table(table: str) -> None:
+        """O nome da tabela entra no SQL; apenas as tabelas de cadastro são aceitas."""
+        if table not in ENTITY_TABLES:
+            raise ValueError(f"Tabela de cadastro inválida: {table}. Opções: {', '.join(ENTITY_TABLES)}")
+
     def insert_entity(self, table: str, nome: str, cnpj: str) -> None:
-        """Insere uma nova loja ou fornecedor."""
-        self._execute_query(f"INSERT INTO {table} (nome, cnpj) VALUES (?, ?)", (nome, cnpj))
+        """
+        Insere uma nova loja ou fornecedor. Os cadastros também recebem os pares (nome, CNPJ)
+        dos lançamentos e só o par é único no banco; aqui, nome ou CNPJ já cadastrado é recusado
+        com DuplicateEntityError.
+        """
+        self._check_entity_table(table)
+        with self._transaction() as conn:
+            inserted = conn.execute(
+                f"INSERT INTO {table} (nome, cnpj) SELECT ?, ? WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE nome = ? OR cnpj = ?)",
+                (nome, cnpj, nome, cnpj),
+            ).rowcount
+        if not inserted:
+            raise DuplicateEntityError(f"Nome ou CNPJ já cadastrado em {table}: {nome} ({cnpj}).")
+        self._mark_changed(table)
 
     def get_entities(self, table: str) -> List[Tuple[str, str]]:
         """Busca todas as entidades de uma tabela (lojas ou fornecedores)."""
-        rows = self._execute_query(f"SELECT nome, cnpj FROM {table} ORDER BY nome", fetch_all=True)
+        self._check_entity_table(table)
+        rows = self._execute_query(f"SELECT nome, cnpj FROM {table} WHERE nome <> '' ORDER BY nome", fetch_all=True)
         return [(row['nome'], row['cnpj']) for row in rows]
 
     def insert_lancamento(self, data: LancamentoData) -> None:
-        """Insere um novo lançamento de nota fiscal."""
-        query = """
-            INSERT INTO lancamentos (
-                loja, cnpj_loja, fornecedor, cnpj_forn, documento, nfe, chave_nfe,
-                valor, data_lancamento, vencimento, observacao, tipo
+        """Insere um novo lançamento de nota fiscal, cadastrando a loja e o fornecedor se preciso."""
+        row = entities.prepare_row(tuple(map(data.__getitem__, LANCAMENTO_COLUMNS)))
+        with self._transaction() as conn:
+            params, changed = entities.resolve_rows(conn, [row])
+            conn.execute(entities.insert_sql("INSERT"), params[0])
+        self._mark_changed("lancamentos", *changed, append_only=True)
+
+    def insert_lancamentos_many(self, lancamentos: Iterable[LancamentoData], batch_size: int = 5000, on_conflict: str = "skip", itens: Iterable[ItemData] = ()) -> List[BatchResult]:
+        """
+        Insere lançamentos em lote, com uma transação e um executemany por lote.
+        Os resumos e o índice de busca são atualizados uma vez por lote (ver _bulk_load).
+        Os dados são consumidos de forma incremental, então `lancamentos` pode ser um gerador.
+        Campos ausentes nos dicionários (ex.: 'vencimento' em NF-e importadas) são gravados como NULL.
+        Os `itens` das notas são gravados na transação do lote em que a nota foi gravada; itens de
+        notas ignoradas (on_conflict="skip") ou com falha são descartados.
+        Retorna as contagens de inseridos, ignorados, com falha e de itens de cada lote.
+        """
+        if on_conflict not in CONFLICT_POLICIES:
+            raise ValueError(f"Política de conflito inválida: {on_conflict}. Opções: {', '.join(CONFLICT_POLICIES)}")
+        if batch_size <= 0:
+            raise ValueError("batch_size deve ser maior que zero.")
+
+        query = entities.insert_sql(*CONFLICT_POLICIES[on_conflict])
+        item_rows = items.rows_by_chave(itens)
+        results: List[BatchResult] = []
+        batch: List[Tuple[Any, ...]] = []
+        changed: Set[str] = set()
+
+        try:
+            for data in lancamentos:
+                batch.append(entities.prepare_row(tuple(map(data.get, LANCAMENTO_COLUMNS))))
+                if len(batch) >= batch_size:
+                    results.append(self._insert_batch(query, batch, changed, item_rows))
+                    batch = []
+
+            if batch:
+                results.append(self._insert_batch(query, batch, changed, item_rows))
+        finally:
+            if any(result["inserted"] for result in results):
+                self._mark_changed("lancamentos", *sorted(changed), append_only=on_conflict != "replace")
+            if any(result["items"] for result in results):
+                self._mark_changed(items.ITEMS_TABLE)
+
+        return results
+
+    def _insert_batch(self, query: str, batch: List[Tuple[Any, ...]], changed: Set[str], item_rows: Dict[str, List[Tuple[Any, ...]]]) -> BatchResult:
+        """
+        Insere um lote em uma única transação; em caso de violação de restrição, refaz linha a linha.
+        Os cadastros que ganharem lojas ou fornecedores são incluídos em `changed`.
+        Os itens de `item_rows` (ver items.rows_by_chave) das notas gravadas vão na mesma transação.
+        """
+        instrumentation = self.instrumentation
+        started = time.perf_counter() if instrumentation is not None else 0.0
+        try:
+            with self._transaction() as conn, self._bulk_load(conn) as after_id:
+                params, new_entities = entities.resolve_rows(conn, batch)
+                # rowcount do executemany soma apenas as linhas afetadas diretamente (sem triggers).
+                inserted = conn.executemany(query, params).rowcount
+                item_count = self._insert_new_items(conn, after_id, item_rows)
+            changed.update(new_entities)
+            if instrumentation is not None:
+                instrumentation.record(query, batch[0], time.perf_counter() - started, inserted)
+            return {"inserted": inserted, "skipped": len(batch) - inserted, "failed": 0, "items": item_count}
+        except RuntimeError as e:
+            if instrumentation is not None:
+                instrumentation.record(query, batch[0], time.perf_counter() - started, 0, error=True)
+            if not isinstance(e.__cause__, sqlite3.IntegrityError):
+                raise
+
+        inserted = failed = 0
+        with self._transaction() as conn, self._bulk_load(conn) as after_id:
+            params, new_entities = entities.resolve_rows(conn, batch)
+            for row in params:
+                try:
+                    inserted += conn.execute(query, row).rowcount
+                except sqlite3.IntegrityError:
+                    failed += 1
+            item_count = self._insert_new_items(conn, after_id, item_rows)
+        changed.update(new_entities)
+        return {"inserted": inserted, "skipped": len(batch) - inserted - failed, "failed": failed, "items": item_count}
+
+    @contextmanager
+    def _bulk_load(self, conn: sqlite3.Connection) -> Iterator[int]:
+        """
+        Carga em lote dentro da transação atual: os triggers dos resumos e da busca não rodam para
+        as linhas inseridas no bloco, que ao final são somadas aos resumos com um GROUP BY e
+        indexadas com um INSERT ... SELECT (ver entities.BULK_TABLE).
+        Produz o maior id anterior ao bloco: as linhas gravadas no bloco são as de id maior.
+        """
+        after_id = conn.execute(f"SELECT IFNULL(MAX(id), 0) FROM {entities.BASE_TABLE}").fetchone()[0]
+        conn.execute(f"INSERT INTO {entities.BULK_TABLE} (apos_id) VALUES (?)", (after_id,))
+        yield after_id
+        conn.execute(f"DELETE FROM {entities.BULK_TABLE}")
+        rollups.add_rows_after(conn, after_id)
+        search.index_rows_after(conn, after_id)
+
+    @staticmethod
+    def _insert_new_items(conn: sqlite3.Connection, after_id: int, item_rows: Dict[str, List[Tuple[Any, ...]]]) -> int:
+        """
+        Grava os itens das notas gravadas no bloco de _bulk_load (id maior que `after_id`), inclusive
+        as substituídas, cujos itens antigos o trigger de DELETE removeu. Retorna quantos foram gravados.
+        """
+        if not item_rows:
+            return 0
+        keys = conn.execute(
+            f"SELECT chave_nfe FROM {entities.BASE_TABLE} WHERE id > ? AND chave_nfe <> ''", (after_id,)
+        ).fetchall()
+        rows = [row for (key,) in keys for row in item_rows.get(key, ())]
+        if rows:
+            conn.executemany(items.INSERT_ITEM, rows)
+        return len(rows)
+
+    def insert_itens_many(self, itens: Iterable[ItemData], batch_size: int = 5000) -> int:
+        """
+        Insere itens de NF-e em lote, com uma transação e um executemany por lote.
+        Os itens devem ser gravados depois do lançamento: substituir o lançamento apaga os itens da nota.
+        Retorna a quantidade de itens gravados.
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size deve ser maior que zero.")
+        query = items.INSERT_ITEM
+        inserted = 0
+        batch: List[Tuple[Any, ...]] = []
+        try:
+            for item in itens:
+                batch.append(tuple(map(item.get, items.ITEM_COLUMNS)))
+                if len(batch) >= batch_size:
+                    inserted += self._insert_itens_batch(query, batch)
+                    batch = []
+            if batch:
+                inserted += self._insert_itens_batch(query, batch)
+        finally:
+            if inserted:
+                self._mark_changed(items.ITEMS_TABLE)
+        return inserted
+
+    def _insert_itens_batch(self, query: str, batch: List[Tuple[Any, ...]]) -> int:
+        instrumentation = self.instrumentation
+        started = time.perf_counter() if instrumentation is not None else 0.0
+        with self._transaction() as conn:
+            inserted = conn.executemany(query, batch).rowcount
+        if instrumentation is not None:
+            instrumentation.record(query, batch[0], time.perf_counter() - started, inserted)
+        return inserted
+
+    def get_itens(self, chave_nfe: str = "") -> List[ItemData]:
+        """Retorna os itens de uma nota, em ordem de nItem; sem chave, todos os itens gravados."""
+        source = self._lancamentos_source(table=items.ITEMS_TABLE)
+        if chave_nfe:
+            rows = self._execute_query(
+                f"SELECT {', '.join(items.ITEM_COLUMNS)} FROM {source} WHERE chave_nfe = ? ORDER BY n_item",
+                (chave_nfe,), fetch_all=True,
+            )
+        else:
+            rows = self._execute_query(f"SELECT {', '.join(items.ITEM_COLUMNS)} FROM {source}", fetch_all=True)
+        return [dict(row) for row in rows]  # type: ignore[misc]
+
+    def aggregate_itens(self, group_by: str = "ncm", start_date: str = "", end_date: str = "", fornecedor: str = "", limit: int = 0) -> Dict[str, ItemTotals]:
+        """
+        Totais dos itens por NCM (group_by="ncm") ou por código de produto (group_by="produto"),
+        do maior valor total para o menor. Sem filtros, é lido só dos índices de lancamento_itens;
+        com filtro de datas ou fornecedor, os itens são ligados aos lançamentos pela chave da nota.
+        O código do produto é o do emitente: use `fornecedor` para separar produtos de fornecedores diferentes.
+        """
+        if group_by not in items.ITEM_GROUPS:
+            raise ValueError(f"Agrupamento inválido: {group_by}. Opções: {', '.join(items.ITEM_GROUPS)}")
+        column = f"{items.ITEMS_TABLE}.{items.ITEM_GROUPS[group_by]}"
+        descricao = f"MAX({items.ITEMS_TABLE}.descricao)" if group_by == "produto" else "''"
+        source = self._lancamentos_source(start_date, end_date, table=items.ITEMS_TABLE)
+        conditions, params = self._build_lancamentos_filter(start_date, end_date, fornecedor, table="lancamentos.")
+        if conditions:
+            source += f" JOIN {self._lancamentos_source(start_date, end_date)} ON lancamentos.chave_nfe = {items.ITEMS_TABLE}.chave_nfe"
+
+        query = f"""
+            SELECT COALESCE({column}, '') AS chave, {descricao} AS descricao, COUNT(*) AS itens,
+                   SUM({items.ITEMS_TABLE}.quantidade) AS quantidade, SUM({items.ITEMS_TABLE}.valor_total) AS valor_total
+            FROM {source}
+            WHERE 1=1{conditions}
+            GROUP BY {column}
+            ORDER BY valor_total DESC, chave
+        """
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        rows = self._execute_query(query, tuple(params), fetch_all=True)
+        return {
+            row['chave']: {
+                "descricao": row['descricao'] or "",
+                "itens": row['itens'],
+                "quantidade": row['quantidade'],
+                "valor_total": row['valor_total'],
+                "preco_medio": row['valor_total'] / row['quantidade'] if row['quantidade'] else 0.0,
+            }
+            for row in rows
+        }
+
+    def get_imported_files(self, directory: str = "") -> Dict[str, Tuple[int, int, str]]:
+        """Retorna {caminho: (tamanho, mtime_ns, hash)} dos arquivos já processados sob `directory`."""
+        query = "SELECT caminho, tamanho, mtime_ns, hash FROM arquivos_importados"
+        params: Tuple[Any, ...] = ()
+        if directory:
+            # Intervalo de prefixo: usa a chave primária em vez de percorrer a tabela.
+            prefix = str(Path(directory)) + os.sep
+            query += " WHERE caminho >= ? AND caminho < ?"
+            params = (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1))
+        rows = self._execute_query(query, params, fetch_all=True)
+        return {row['caminho']: (row['tamanho'], row['mtime_ns'], row['hash']) for row in rows}
+
+    def record_imported_files(self, files: Sequence[ImportedFile], lancamentos: Sequence[LancamentoData], on_conflict: str = "replace", itens: Sequence[ItemData] = ()) -> BatchResult:
+        """
+        Grava os lançamentos extraídos de um grupo de arquivos, seus itens e o controle desses
+        arquivos na mesma transação: após uma interrupção, ou todos foram gravados ou nenhum foi.
+        Só são gravados os itens das notas gravadas, como em insert_lancamentos_many.
+        """
+        if on_conflict not in CONFLICT_POLICIES:
+            raise ValueError(f"Política de conflito inválida: {on_conflict}. Opções: {', '.join(CONFLICT_POLICIES)}")
+        query = entities.insert_sql(*CONFLICT_POLICIES[on_conflict])
+        rows = [entities.prepare_row(tuple(map(data.get, LANCAMENTO_COLUMNS))) for data in lancamentos]
+        processed_at = datetime.now().isoformat(timespec="seconds")
+        inserted = failed = 0
+        with self._transaction() as conn, self._bulk_load(conn) as after_id:
+            params, changed = entities.resolve_rows(conn, rows)
+            for row in params:
+                try:
+                    inserted += conn.execute(query, row).rowcount
+                except sqlite3.IntegrityError:
+                    failed += 1
+            item_count = self._insert_new_items(conn, after_id, items.rows_by_chave(itens))
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO arquivos_importados (caminho, tamanho, mtime_ns, hash, status, erro, processado_em)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                [(f['caminho'], f['tamanho'], f['mtime_ns'], f['hash'], f['status'], f['erro'], processed_at) for f in files],
             )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        params = (
-            data['loja'], data['cnpj_loja'], data['fornecedor'], data['cnpj_forn'],
-            data['documento'], data['nfe'], data['chave_nfe'], data['valor'],
-            data['data_lancamento'], data['vencimento'], data['observacao'], data['tipo']
-        )
-        self._execute_query(query, params)
-
-    def get_lancamentos(self, limit: int = 0, start_date: str = "", end_date: str = "", fornecedor: str = "") -> List[LancamentoData]:
-        """Busca lançamentos com base em filtros e limite."""
-        query = "SELECT * FROM lancamentos WHERE 1=1"
+        if inserted:
+            self._mark_changed("lancamentos", *changed, append_only=on_conflict != "replace")
+        if item_count:
+            self._mark_changed(items.ITEMS_TABLE)
+        return {"inserted": inserted, "skipped": len(lancamentos) - inserted - failed, "failed": failed, "items": item_count}
+
+    def _build_lancamentos_filter(self, start_date: str = "", end_date: str = "", fornecedor: str = "", table: str = "", by_id: bool = False) -> Tuple[str, List[Any]]:
+        """
+        Monta as condições WHERE compartilhadas pelas consultas de lançamentos.
+        `table` qualifica as colunas quando a consulta tem junções (ex.: "lancamentos.").
+        by_id filtra o fornecedor pelos ids do cadastro, para consultas direto em lancamentos_base.
+        """
+        conditions = ""
         params: List[Any] = []
 
         if start_date and end_date:
-            query += " AND data_lancamento BETWEEN ? AND ?"
+            conditions += f" AND {table}data_lancamento BETWEEN ? AND ?"
             params.extend([start_date, end_date])
         
         if fornecedor:
-            query += " AND fornecedor = ?"
+            if by_id:
+                conditions += f" AND {table}fornecedor_id IN (SELECT id FROM fornecedores WHERE nome = ?)"
+            else:
+                conditions += f" AND {table}fornecedor = ?"
             params.append(fornecedor)
+
+        return conditions, params
+
+    def archived_years(self) -> List[int]:
+        """Anos movidos para arquivos separados (inclusive os com arquivamento em andamento)."""
+        try:
+            return [row[0] for row in self._get_connection().execute("SELECT ano FROM particoes ORDER BY ano")]
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Erro no banco de dados: {e}") from e
+
+    def _attach_archives(self, years: Sequence[int], create: bool = False) -> None:
+        """
+        Anexa à conexão da thread os arquivos dos anos informados que ainda não estão anexados.
+        Sem espaço, desanexa os anos usados há mais tempo que a consulta atual não precisa.
+        """
+        if len(years) > MAX_ATTACHED_ARCHIVES:
+            raise ValueError(
+                f"O período alcança {len(years)} anos arquivados; o máximo por consulta é {MAX_ATTACHED_ARCHIVES}. Restrinja o filtro de datas."
+            )
+        conn = self._get_connection()
+        attached: collections.OrderedDict[int, None] = self._local.attached
+        for year in years:
+            if year in attached:
+                attached.move_to_end(year)
+        missing = [year for year in years if year not in attached]
+        try:
+            for year in list(attached):
+                if len(attached) + len(missing) <= MAX_ATTACHED_ARCHIVES:
+                    break
+                if year not in years:
+                    conn.execute(f"DETACH DATABASE {partitions.schema_name(year)}")
+                    del attached[year]
+            for year in missing:
+                path = partitions.archive_path(self.db_path, year)
+                if not create and not path.exists():
+                    raise RuntimeError(f"Arquivo do ano {year} não encontrado: {path}")
+                conn.execute(f"ATTACH DATABASE ? AS {partitions.schema_name(year)}", (str(path),))
+                attached[year] = None
+                # Arquivos criados por versões anteriores podem não ter todas as tabelas.
+                partitions.ensure_archive_schema(conn, partitions.schema_name(year))
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Erro ao anexar os anos arquivados: {e}") from e
+
+    def _lancamentos_source(self, start_date: str = "", end_date: str = "", alias: bool = True, table: str = "lancamentos") -> str:
+        """
+        Origem dos lançamentos (ou dos itens, com table="lancamento_itens") para o filtro de datas:
+        a própria tabela ou, quando o período alcança anos arquivados, um UNION ALL com os
+        arquivos desses anos, anexados sob demanda.
+        """
+        years = partitions.years_in_range(self.archived_years(), start_date, end_date)
+        if not years:
+            return table
+        self._attach_archives(years)
+        source = partitions.union_source(years, table)
+        return f"{source} AS {table}" if alias else source
+
+    def _aggregate_source(self, start_date: str = "", end_date: str = "", fornecedor: str = "") -> Tuple[str, str, List[Any]]:
+        """
+        Origem e condições das agregações sem as tabelas de resumo: lancamentos_base, com o
+        fornecedor comparado pelo id e sem as junções da view, ou, quando o período alcança anos
+        arquivados, o UNION ALL de _lancamentos_source, com o fornecedor comparado pelo nome.
+        """
+        if partitions.years_in_range(self.archived_years(), start_date, end_date):
+            conditions, params = self._build_lancamentos_filter(start_date, end_date, fornecedor)
+            return self._lancamentos_source(start_date, end_date), conditions, params
+        conditions, params = self._build_lancamentos_filter(start_date, end_date, fornecedor, by_id=True)
+        return entities.BASE_TABLE, conditions, params
+
+    def archivable_years(self) -> List[int]:
+        """Anos encerrados (anteriores ao atual) que ainda têm lançamentos no banco principal."""
+        years: List[int] = []
+        current = datetime.now().year
+        start = "0000"
+        while True:
+            # Um salto pelo índice de data por ano, sem percorrer os lançamentos.
+            row = self._execute_query(
+                f"SELECT MIN(data_lancamento) AS data FROM {entities.BASE_TABLE} WHERE data_lancamento >= ? AND data_lancamento < ?",
+                (start, f"{current}-01-01"), fetch_one=True,
+            )
+            if row is None or row['data'] is None:
+                return years
+            try:
+                year = int(row['data'][:4])
+            except ValueError:
+                return years
+            years.append(year)
+            start = f"{year + 1}"
+
+    def archive_year(self, year: int, batch_size: int = 5000, progress: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Move os lançamentos de um ano encerrado para o arquivo notas_AAAA.db, em lotes de
+        `batch_size` linhas, cada um em sua transação: o banco principal continua disponível
+        durante o arquivamento, e uma execução interrompida pode ser retomada chamando de novo.
+        As tabelas de resumo continuam incluindo o ano; a busca textual passa a ignorá-lo.
+        `progress` recebe o total de linhas movidas após cada lote. Retorna esse total.
+        """
+        current = datetime.now().year
+        if year >= current:
+            raise ValueError(f"Só anos encerrados podem ser arquivados (ano atual: {current}).")
+        if batch_size <= 0:
+            raise ValueError("batch_size deve ser maior que zero.")
+
+        path = partitions.archive_path(self.db_path, year)
+        schema = partitions.schema_name(year)
+        start, end = f"{year}-01-01", f"{year + 1}-01-01"
+        self._attach_archives([year], create=True)
+        conn = self._get_connection()
+        try:
+            conn.execute(f"PRAGMA {schema}.journal_mode = WAL")
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Erro no banco de dados: {e}") from e
+
+        with self._transaction():
+            partitions.create_archive_schema(conn, schema)
+            conn.execute(
+                """
+                INSERT INTO particoes (ano, arquivo, status, linhas, atualizado_em) VALUES (?, ?, ?, 0, ?)
+                ON CONFLICT (ano) DO UPDATE SET status = excluded.status, atualizado_em = excluded.atualizado_em
+                """,
+                (year, path.name, partitions.ARCHIVING, datetime.now().isoformat(timespec="seconds")),
+            )
+
+        moved = 0
+        while True:
+            with self._transaction():
+                ids = [row[0] for row in conn.execute(
+                    f"SELECT id FROM main.{entities.BASE_TABLE} WHERE data_lancamento >= ? AND data_lancamento < ? LIMIT ?",
+                    (start, end, batch_size),
+                )]
+                if ids:
+                    partitions.move_batch(conn, schema, ids)
+                    # Os triggers de DELETE tiraram o lote dos resumos; o ano continua nos totais.
+                    rollups.add_rollups(conn, partitions.batch_source(schema, ids))
+            if not ids:
+                break
+            moved += len(ids)
+            self._mark_changed("lancamentos")
+            if progress:
+                progress(moved)
+
+        with self._transaction():
+            conn.execute(
+                f"UPDATE particoes SET status = ?, linhas = (SELECT COUNT(*) FROM {schema}.lancamentos), atualizado_em = ? WHERE ano = ?",
+                (partitions.ARCHIVED, datetime.now().isoformat(timespec="seconds"), year),
+            )
+        return moved
+
+    def _build_lancamentos_query(self, limit: int = 0, start_date: str = "", end_date: str = "", fornecedor: str = "", columns: str = "*") -> Tuple[str, Tuple[Any, ...]]:
+        """Monta a query e os parâmetros usados por get_lancamentos."""
+        conditions, params = self._build_lancamentos_filter(start_date, end_date, fornecedor)
+        query = f"SELECT {columns} FROM {self._lancamentos_source(start_date, end_date)} WHERE 1=1{conditions}"
             
         if limit:
             query += " ORDER BY id DESC LIMIT ?"
@@ -120,28 +879,362 @@ class DatabaseManager:
         else:
             query += " ORDER BY id DESC"
 
-        rows = self._execute_query(query, tuple(params), fetch_all=True)
+        return query, tuple(params)
+
+    def get_lancamentos(self, limit: int = 0, start_date: str = "", end_date: str = "", fornecedor: str = "", compact: bool = False) -> List[Lancamento]:
+        """
+        Busca lançamentos com base em filtros e limite.
+        Com compact=True, retorna LancamentoRow (tuplas nomeadas que também aceitam row['coluna']
+        e row.get) em vez de um dicionário por linha, com os textos repetidos compartilhados:
+        bem menos memória e menos tempo em listas grandes.
+        """
+        if compact:
+            query, params = self._build_lancamentos_query(limit, start_date, end_date, fornecedor, _ROW_SELECT)
+            return self._execute_query(query, params, fetch_all=True, row_factory=lancamento_row_factory())  # type: ignore[no-any-return]
+        query, params = self._build_lancamentos_query(limit, start_date, end_date, fornecedor)
+        rows = self._execute_query(query, params, fetch_all=True)
         return [dict(row) for row in rows]
 
-    def delete_lancamento(self, record_id: int) -> None:
-        """Exclui um lançamento pelo ID."""
-        self._execute_query("DELETE FROM lancamentos WHERE id = ?", (record_id,))
+    def iter_lancamentos(self, start_date: str = "", end_date: str = "", fornecedor: str = "", limit: int = 0, chunk_size: int = 5000, compact: bool = False) -> Iterator[Lancamento]:
+        """
+        Mesmos filtros e ordem de get_lancamentos, mas gera os lançamentos sob demanda,
+        lendo o cursor em blocos de `chunk_size` linhas. A memória usada não depende
+        do tamanho do resultado. compact=True gera LancamentoRow, como em get_lancamentos.
+        """
+        if compact:
+            query, params = self._build_lancamentos_query(limit, start_date, end_date, fornecedor, _ROW_SELECT)
+            for rows in self._iter_query(query, params, chunk_size, row_factory=lancamento_row_factory(shared_strings=False)):
+                yield from rows
+            return
+        query, params = self._build_lancamentos_query(limit, start_date, end_date, fornecedor)
+        for rows in self._iter_query(query, params, chunk_size):
+            for row in rows:
+                yield dict(row)  # type: ignore[misc]
 
-    def corrigir_datas(self) -> None:
-        """Converte datas do formato 'DD-MM-YYYY' para 'YYYY-MM-DD'."""
-        rows = self._execute_query("SELECT id, data_lancamento FROM lancamentos WHERE data_lancamento LIKE '%-%-%'", fetch_all=True)
-        
-        updates = []
+    def iter_lancamento_columns(self, columns: Sequence[str], chunk_size: int = 50000) -> Iterator[List[sqlite3.Row]]:
+        """
+        Percorre as colunas informadas de todos os lançamentos, inclusive os arquivados,
+        em ordem de id, em blocos de até `chunk_size` linhas, sem materializar a tabela inteira.
+        """
+        unknown = set(columns) - set(LANCAMENTO_COLUMNS) - {"id"}
+        if unknown:
+            raise ValueError(f"Colunas inválidas: {', '.join(sorted(unknown))}")
+        return self._iter_query(f"SELECT {', '.join(columns)} FROM {self._lancamentos_source()} ORDER BY id", (), chunk_size)
+
+    def _iter_query(self, query: str, params: Tuple[Any, ...], chunk_size: int, row_factory: Optional[RowFactory] = None) -> Iterator[List[Any]]:
+        """
+        Executa uma consulta e gera o resultado em blocos com fetchmany.
+        Com instrumentação, o tempo registrado é apenas o gasto no banco, sem o do consumidor.
+        """
+        instrumentation = self.instrumentation
+        cursor: Optional[sqlite3.Cursor] = None
+        spent = 0.0
+        total_rows = 0
+        try:
+            started = time.perf_counter()
+            cursor = self._get_connection().execute(query, params)
+            if row_factory is not None:
+                cursor.row_factory = row_factory
+            while rows := cursor.fetchmany(chunk_size):
+                if instrumentation is not None:
+                    spent += time.perf_counter() - started
+                    total_rows += len(rows)
+                yield rows
+                started = time.perf_counter()
+            if instrumentation is not None:
+                instrumentation.record(query, params, spent + time.perf_counter() - started, total_rows)
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Erro no banco de dados: {e}") from e
+        finally:
+            if cursor is not None:
+                cursor.close()
+
+    @staticmethod
+    def _rollup_month_range(start_date: str, end_date: str) -> Optional[Tuple[str, str]]:
+        """
+        Retorna o intervalo (AAAA-MM, AAAA-MM) equivalente ao filtro de datas quando ele
+        cobre meses inteiros, ou None quando as tabelas de resumo não podem ser usadas.
+        Sem filtro de datas, retorna ("", "").
+        """
+        if not (start_date and end_date):
+            return "", ""
+        try:
+            start = datetime.strptime(start_date, "%Y-%m-%d")
+            end = datetime.strptime(end_date, "%Y-%m-%d")
+        except ValueError:
+            return None
+        if start.day != 1 or end.day != calendar.monthrange(end.year, end.month)[1]:
+            return None
+        return start_date[:7], end_date[:7]
+
+    def _build_rollup_filter(self, month_range: Tuple[str, str], fornecedor: str) -> Tuple[str, str, List[Any]]:
+        """Escolhe a tabela de resumo e monta o WHERE equivalente aos filtros de lançamentos."""
+        conditions = ""
+        params: List[Any] = []
+        if month_range[0]:
+            conditions += " AND mes BETWEEN ? AND ?"
+            params.extend(month_range)
+        if fornecedor:
+            conditions += " AND fornecedor_id IN (SELECT id FROM fornecedores WHERE nome = ?)"
+            params.append(fornecedor)
+            return "resumo_fornecedor_mensal", conditions, params
+        return "resumo_mensal", conditions, params
+
+    def aggregate_by_tipo(self, start_date: str = "", end_date: str = "", fornecedor: str = "", use_rollups: bool = True) -> Dict[str, Tuple[float, int]]:
+        """
+        Retorna {tipo: (soma dos valores, quantidade)} calculado no banco.
+        Usa as tabelas de resumo quando o filtro de datas cobre meses inteiros.
+        """
+        month_range = self._rollup_month_range(start_date, end_date) if use_rollups else None
+        if month_range is not None:
+            table, conditions, params = self._build_rollup_filter(month_range, fornecedor)
+            query = f"""
+                SELECT tipo, SUM(total_centavos) / 100.0 AS total, SUM(quantidade) AS quantidade
+                FROM {table} WHERE 1=1{conditions}
+                GROUP BY tipo
+            """
+        else:
+            source, conditions, params = self._aggregate_source(start_date, end_date, fornecedor)
+            query = f"""
+                SELECT tipo, SUM(valor) AS total, COUNT(*) AS quantidade
+                FROM {source} WHERE 1=1{conditions}
+                GROUP BY tipo
+            """
+        rows = self._execute_query(query, tuple(params), fetch_all=True)
+        return {row['tipo']: (row['total'], row['quantidade']) for row in rows}
+
+    def aggregate_by_tipo_since(self, after_id: Optional[int] = None) -> Tuple[int, Dict[str, Tuple[float, int]]]:
+        """
+        Retorna (maior id, {tipo: (soma dos valores, quantidade)}), lidos em uma única consulta.
+        Sem after_id, os totais são de todos os lançamentos, inclusive os arquivados (tabelas de resumo).
+        Com after_id, são só os dos lançamentos com id maior, para somar a totais já conhecidos quando
+        get_changes indica append_only: os ids são AUTOINCREMENT, então toda inclusão recebe um id maior.
+        """
+        if after_id is None:
+            query = f"""
+                SELECT (SELECT IFNULL(MAX(id), 0) FROM {entities.BASE_TABLE}) AS ultimo,
+                       tipo, SUM(total_centavos) / 100.0 AS total, SUM(quantidade) AS quantidade
+                FROM resumo_mensal
+                GROUP BY tipo
+            """
+            rows = self._execute_query(query, fetch_all=True)
+        else:
+            # Mesmo arredondamento das tabelas de resumo, para que a soma bata com uma recarga completa.
+            query = f"""
+                SELECT m.ultimo, l.tipo, SUM(CAST(ROUND(l.valor * 100) AS INTEGER)) / 100.0 AS total, COUNT(l.id) AS quantidade
+                FROM (SELECT IFNULL(MAX(id), 0) AS ultimo FROM {entities.BASE_TABLE}) AS m
+                LEFT JOIN {entities.BASE_TABLE} AS l ON l.id > ?
+                GROUP BY l.tipo
+            """
+            rows = self._execute_query(query, (after_id,), fetch_all=True)
+        last_id = rows[0]['ultimo'] if rows else 0
+        return last_id, {row['tipo']: (row['total'], row['quantidade']) for row in rows if row['tipo'] is not None}
+
+    def aggregate_by_month(self, start_date: str = "", end_date: str = "", fornecedor: str = "", use_rollups: bool = True) -> List[Tuple[str, str, float]]:
+        """
+        Retorna (AAAA-MM, tipo, soma dos valores) em ordem de mês, calculado no banco.
+        Usa as tabelas de resumo quando o filtro de datas cobre meses inteiros.
+        """
+        month_range = self._rollup_month_range(start_date, end_date) if use_rollups else None
+        if month_range is not None:
+            table, conditions, params = self._build_rollup_filter(month_range, fornecedor)
+            query = f"""
+                SELECT mes, tipo, SUM(total_centavos) / 100.0 AS total
+                FROM {table}
+                WHERE mes <> '{rollups.NO_MONTH}' AND tipo <> ''{conditions}
+                GROUP BY mes, tipo
+                ORDER BY mes
+            """
+        else:
+            source, conditions, params = self._aggregate_source(start_date, end_date, fornecedor)
+            query = f"""
+                SELECT substr(data_lancamento, 1, 7) AS mes, tipo, SUM(valor) AS total
+                FROM {source}
+                WHERE data_lancamento IS NOT NULL AND tipo <> ''{conditions}
+                GROUP BY mes, tipo
+                ORDER BY mes
+            """
+        rows = self._execute_query(query, tuple(params), fetch_all=True)
+        return [(row['mes'], row['tipo'], row['total']) for row in rows]
+
+    def aggregate_by_fornecedor(self, start_date: str = "", end_date: str = "", fornecedor: str = "", use_rollups: bool = True) -> Dict[str, float]:
+        """
+        Retorna {fornecedor: soma dos valores} calculado no banco.
+        Usa as tabelas de resumo quando o filtro de datas cobre meses inteiros. Os lançamentos
+        são agrupados pelo id do fornecedor e só os totais recebem o nome; fornecedores com o
+        mesmo nome e CNPJs diferentes são somados juntos.
+        """
+        month_range = self._rollup_month_range(start_date, end_date) if use_rollups else None
+        if month_range is not None:
+            _, conditions, params = self._build_rollup_filter(month_range, fornecedor)
+            query = f"""
+                SELECT f.nome AS fornecedor, SUM(r.total_centavos) / 100.0 AS total
+                FROM (
+                    SELECT fornecedor_id, SUM(total_centavos) AS total_centavos
+                    FROM resumo_fornecedor_mensal WHERE 1=1{conditions}
+                    GROUP BY fornecedor_id
+                ) AS r
+                JOIN fornecedores AS f ON f.id = r.fornecedor_id
+                WHERE f.nome <> ''
+                GROUP BY f.nome
+            """
+        else:
+            source, conditions, params = self._aggregate_source(start_date, end_date, fornecedor)
+            if source == entities.BASE_TABLE:
+                # Sem filtro, ler a tabela em sequência sai mais barato que percorrer o índice
+                # do fornecedor e buscar cada linha fora de ordem.
+                hint = "" if conditions else " NOT INDEXED"
+                query = f"""
+                    SELECT f.nome AS fornecedor, SUM(l.total) AS total
+                    FROM (
+                        SELECT fornecedor_id, SUM(valor) AS total
+                        FROM {source}{hint} WHERE fornecedor_id IS NOT NULL{conditions}
+                        GROUP BY fornecedor_id
+                    ) AS l
+                    JOIN fornecedores AS f ON f.id = l.fornecedor_id
+                    WHERE f.nome <> ''
+                    GROUP BY f.nome
+                """
+            else:
+                query = f"""
+                    SELECT fornecedor, SUM(valor) AS total
+                    FROM {source}
+                    WHERE fornecedor IS NOT NULL AND fornecedor <> ''{conditions}
+                    GROUP BY fornecedor
+                """
+        rows = self._execute_query(query, tuple(params), fetch_all=True)
+        return {row['fornecedor']: row['total'] for row in rows}
+
+    def rebuild_rollups(self) -> None:
+        """Recalcula as tabelas de resumo a partir dos lançamentos, inclusive os arquivados."""
+        source = self._lancamentos_source(alias=False)
+        with self._transaction() as conn:
+            rollups.rebuild_rollups(conn, source)
+
+    def verify_rollups(self) -> List[rollups.RollupDrift]:
+        """Retorna as divergências entre as tabelas de resumo e os lançamentos, inclusive os arquivados."""
+        source = self._lancamentos_source(alias=False)
+        try:
+            return rollups.verify_rollups(self._get_connection(), source)
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Erro no banco de dados: {e}") from e
+
+    def get_lancamentos_page(self, start_date: str = "", end_date: str = "", fornecedor: str = "", before_id: Optional[int] = None, after_id: Optional[int] = None, limit: int = 200, compact: bool = False) -> List[Lancamento]:
+        """
+        Busca uma página de lançamentos por keyset, sempre em ordem de id decrescente.
+        before_id traz os lançamentos seguintes (id < before_id); after_id traz os
+        anteriores (id > after_id). O custo não depende da posição da página.
+        compact=True retorna LancamentoRow, como em get_lancamentos.
+        """
+        conditions, params = self._build_lancamentos_filter(start_date, end_date, fornecedor)
+        source = self._lancamentos_source(start_date, end_date)
+        columns, row_factory = (_ROW_SELECT, lancamento_row_factory(shared_strings=False)) if compact else ("*", None)
+        if after_id is not None:
+            query = f"SELECT {columns} FROM {source} WHERE id > ?{conditions} ORDER BY id ASC LIMIT ?"
+            rows = self._execute_query(query, (after_id, *params, limit), fetch_all=True, row_factory=row_factory)
+            rows.reverse()
+            return rows if compact else [dict(row) for row in rows]
+
+        if before_id is not None:
+            query = f"SELECT {columns} FROM {source} WHERE id < ?{conditions} ORDER BY id DESC LIMIT ?"
+            rows = self._execute_query(query, (before_id, *params, limit), fetch_all=True, row_factory=row_factory)
+        else:
+            query = f"SELECT {columns} FROM {source} WHERE 1=1{conditions} ORDER BY id DESC LIMIT ?"
+            rows = self._execute_query(query, (*params, limit), fetch_all=True, row_factory=row_factory)
+        return rows if compact else [dict(row) for row in rows]
+
+    def get_lancamentos_totals(self, start_date: str = "", end_date: str = "", fornecedor: str = "") -> Dict[str, Any]:
+        """Retorna a quantidade de lançamentos e os totais de entradas e saídas para os filtros."""
+        totals = self.aggregate_by_tipo(start_date, end_date, fornecedor)
+        return {
+            "count": sum(quantidade for _, quantidade in totals.values()),
+            "total_entradas": totals.get('Entrada', (0.0, 0))[0],
+            "total_saidas": totals.get('Saída', (0.0, 0))[0],
+        }
+
+    def search_lancamentos(self, query: str, limit: int = 100, start_date: str = "", end_date: str = "", fornecedor: str = "") -> List[LancamentoData]:
+        """
+        Busca textual em fornecedor, loja, documento, NF-e, chave e observação.
+        Cada palavra é buscada como prefixo e todas precisam aparecer. Os resultados vêm dos
+        mais relevantes (bm25) para os menos, entre os search.SEARCH_CANDIDATES lançamentos
+        mais recentes que casam com a busca. Aceita os mesmos filtros de get_lancamentos.
+        Anos arquivados (ver archive_year) não entram na busca.
+        """
+        expression = search.build_match_expression(query)
+        if not expression:
+            return []
+        conditions, params = self._build_lancamentos_filter(start_date, end_date, fornecedor, table="lancamentos.")
+        sql = f"""
+            SELECT * FROM (
+                SELECT lancamentos.*, {search.SEARCH_TABLE}.rank AS relevancia
+                FROM {search.SEARCH_TABLE} JOIN lancamentos ON lancamentos.id = {search.SEARCH_TABLE}.rowid
+                WHERE {search.SEARCH_TABLE} MATCH ?{conditions}
+                ORDER BY {search.SEARCH_TABLE}.rowid DESC
+                LIMIT ?
+            )
+            ORDER BY relevancia, id DESC
+            LIMIT ?
+        """
+        rows = self._execute_query(sql, (expression, *params, search.SEARCH_CANDIDATES, limit), fetch_all=True)
+        results = []
         for row in rows:
-            lanc_id, data_str = row['id'], row['data_lancamento']
-            try:
-                if len(data_str) == 10 and data_str[4] != '-' and data_str[7] != '-':
-                    data_formatada = datetime.strptime(data_str, "%d-%m-%Y").strftime("%Y-%m-%d")
-                    updates.append((data_formatada, lanc_id))
-            except (ValueError, IndexError):
-                continue
-        
-        if updates:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.executemany("UPDATE lancamentos SET data_lancamento = ? WHERE id = ?", updates)
-                conn.commit()
\ No newline at end of file
+            data = dict(row)
+            del data['relevancia']
+            results.append(data)
+        return results  # type: ignore[return-value]
+
+    def rebuild_search_index(self) -> None:
+        """Recria o índice de busca textual a partir dos lançamentos."""
+        with self._transaction() as conn:
+            search.rebuild_search_index(conn)
+
+    def explain_query_plan(self, query: str, params: Optional[Tuple[Any, ...]] = None) -> List[str]:
+        """Retorna as linhas de EXPLAIN QUERY PLAN de uma query."""
+        rows = self._execute_query(f"EXPLAIN QUERY PLAN {query}", params, fetch_all=True)
+        return [row['detail'] for row in rows]
+
+    def explain_lancamentos_queries(self) -> Dict[str, List[str]]:
+        """Gera o plano de execução de cada formato de query que get_lancamentos pode montar."""
+        plans: Dict[str, List[str]] = {}
+        for use_dates in (False, True):
+            for use_fornecedor in (False, True):
+                for use_limit in (False, True):
+                    query, params = self._build_lancamentos_query(
+                        limit=10 if use_limit else 0,
+                        start_date="2000-01-01" if use_dates else "",
+                        end_date="2000-12-31" if use_dates else "",
+                        fornecedor="Fornecedor" if use_fornecedor else "",
+                    )
+                    plans[query] = self.explain_query_plan(query, params)
+        return plans
+
+    def delete_lancamento(self, record_id: int) -> None:
+        """
+        Exclui um lançamento pelo ID, do banco principal ou, se ele estiver em um ano arquivado,
+        do arquivo desse ano (tirando-o também das tabelas de resumo, que incluem os anos arquivados).
+        Lança ValueError se nenhum lançamento tiver esse ID.
+        """
+        with self._transaction() as conn:
+            deleted = conn.execute(f"DELETE FROM main.{entities.BASE_TABLE} WHERE id = ?", (record_id,)).rowcount
+        if not deleted:
+            deleted = self._delete_archived_lancamento(record_id)
+        if not deleted:
+            raise ValueError(f"Lançamento {record_id} não encontrado.")
+        self._mark_changed("lancamentos")
+
+    def _delete_archived_lancamento(self, record_id: int) -> int:
+        """Procura o lançamento nos anos arquivados, um de cada vez, e o exclui. Retorna 1 se o encontrou."""
+        for year in self.archived_years():
+            self._attach_archives([year])
+            schema = partitions.schema_name(year)
+            with self._transaction() as conn:
+                if conn.execute(f"SELECT 1 FROM {schema}.lancamentos WHERE id = ?", (record_id,)).fetchone() is None:
+                    continue
+                rollups.subtract_rollups(conn, partitions.batch_source(schema, [record_id]))
+                partitions.delete_rows(conn, schema, [record_id])
+                conn.execute(
+                    "UPDATE particoes SET linhas = linhas - 1, atualizado_em = ? WHERE ano = ?",
+                    (datetime.now().isoformat(timespec="seconds"), year),
+                )
+            return 1
+        return 0
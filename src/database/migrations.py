@@ -0,0 +1,298 @@
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Callable, List, NamedTuple
+from src.database import entities, items, partitions, rollups, search
+from src.database.rollups import create_rollups
+from src.database.search import create_search_index
+from src.database.partitions import create_registry
+from src.database.items import create_items_table
+
+logger = logging.getLogger(__name__)
+
+class Migration(NamedTuple):
+    """Uma alteração versionada do esquema do banco de dados."""
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+    # Migrações não transacionais controlam as próprias transações (ex.: em blocos)
+    # e precisam poder ser retomadas se forem interrompidas.
+    transactional: bool = True
+
+# Lançamentos com chave NF-e repetida, retirados de lancamentos pela migração 1 para que o índice
+# único possa ser criado. As cópias podem diferir em valor, observação ou tipo: ficam aqui, com o id
+# do lançamento mantido, para serem conferidas e, se for o caso, corrigidas manualmente.
+DUPLICADOS_TABLE = "lancamentos_duplicados"
+_DUPLICADOS_COLUMNS = (
+    "id, loja, cnpj_loja, fornecedor, cnpj_forn, documento, nfe, chave_nfe, "
+    "valor, data_lancamento, vencimento, observacao, tipo"
+)
+
+def _separar_chaves_duplicadas(conn: sqlite3.Connection) -> None:
+    """
+    Mantém em lancamentos apenas o primeiro lançamento (menor id) de cada chave NF-e repetida e
+    move os demais para lancamentos_duplicados. Bancos anteriores às migrações aceitavam importar o
+    mesmo XML mais de uma vez. Nenhum lançamento é excluído; cada um movido é registrado no log.
+    """
+    duplicados = conn.execute(
+        """
+        SELECT l.id, l.chave_nfe, l.data_lancamento, l.fornecedor, l.valor, d.manter
+        FROM lancamentos AS l
+        JOIN (
+            SELECT chave_nfe, MIN(id) AS manter FROM lancamentos
+            WHERE chave_nfe IS NOT NULL AND chave_nfe <> ''
+            GROUP BY chave_nfe HAVING COUNT(*) > 1
+        ) AS d ON d.chave_nfe = l.chave_nfe AND l.id <> d.manter
+        ORDER BY l.id
+        """
+    ).fetchall()
+    if not duplicados:
+        return
+
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {DUPLICADOS_TABLE} (
+            id INTEGER PRIMARY KEY,
+            loja TEXT, cnpj_loja TEXT, fornecedor TEXT, cnpj_forn TEXT,
+            documento TEXT, nfe TEXT, chave_nfe TEXT,
+            valor REAL NOT NULL, data_lancamento TEXT, vencimento TEXT,
+            observacao TEXT, tipo TEXT NOT NULL,
+            id_mantido INTEGER NOT NULL,
+            movido_em TEXT NOT NULL
+        )
+        """
+    )
+    for id_, chave, data, fornecedor, valor, manter in duplicados:
+        conn.execute(
+            f"""
+            INSERT INTO {DUPLICADOS_TABLE} ({_DUPLICADOS_COLUMNS}, id_mantido, movido_em)
+            SELECT {_DUPLICADOS_COLUMNS}, ?, datetime('now', 'localtime') FROM lancamentos WHERE id = ?
+            """,
+            (manter, id_),
+        )
+        conn.execute("DELETE FROM lancamentos WHERE id = ?", (id_,))
+        logger.warning(
+            "Lançamento %s movido para %s: chave NF-e %s repetida do lançamento %s (data %s, fornecedor %s, valor %s).",
+            id_, DUPLICADOS_TABLE, chave, manter, data, fornecedor, valor,
+        )
+    logger.warning(
+        "%d lançamento(s) com chave NF-e duplicada movido(s) para a tabela %s na atualização do banco; "
+        "confira-os e, se algum for um lançamento distinto, grave-o novamente com a chave correta.",
+        len(duplicados), DUPLICADOS_TABLE,
+    )
+
+def _lancamentos_indexes(conn: sqlite3.Connection) -> None:
+    """Cria os índices usados pelos filtros e ordenações de get_lancamentos."""
+    _separar_chaves_duplicadas(conn)
+
+    queries = [
+        "CREATE INDEX IF NOT EXISTS idx_lancamentos_data_fornecedor ON lancamentos (data_lancamento, fornecedor)",
+        "CREATE INDEX IF NOT EXISTS idx_lancamentos_fornecedor_data ON lancamentos (fornecedor, data_lancamento)",
+        "CREATE INDEX IF NOT EXISTS idx_lancamentos_tipo ON lancamentos (tipo)",
+        "CREATE INDEX IF NOT EXISTS idx_lancamentos_vencimento ON lancamentos (vencimento)",
+        # Lançamentos manuais podem não ter chave; apenas chaves preenchidas são únicas.
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_lancamentos_chave_nfe ON lancamentos (chave_nfe)
+        WHERE chave_nfe IS NOT NULL AND chave_nfe <> ''
+        """,
+    ]
+    for query in queries:
+        conn.execute(query)
+
+# Datas gravadas como DD-MM-AAAA por versões antigas do sistema.
+_DATA_BR = "[0-3][0-9]-[0-1][0-9]-[0-9][0-9][0-9][0-9]"
+_DATA_ISO = "substr(data_lancamento, 7, 4) || '-' || substr(data_lancamento, 4, 2) || '-' || substr(data_lancamento, 1, 2)"
+
+def _normalizar_datas(conn: sqlite3.Connection, chunk_size: int = 50000) -> None:
+    """
+    Converte data_lancamento de DD-MM-AAAA para AAAA-MM-DD em blocos de ids, cada um em sua transação.
+    O último id processado fica em migracao_progresso, então uma execução interrompida
+    continua de onde parou. Datas inexistentes (ex.: 31-02-2024) são mantidas como estão.
+    """
+    conn.execute("CREATE TABLE IF NOT EXISTS migracao_progresso (versao INTEGER PRIMARY KEY, ultimo_id INTEGER NOT NULL)")
+    row = conn.execute("SELECT ultimo_id FROM migracao_progresso WHERE versao = 3").fetchone()
+    ultimo_id = row[0] if row else 0
+    max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM lancamentos").fetchone()[0]
+
+    while ultimo_id < max_id:
+        fim = ultimo_id + chunk_size
+        conn.execute("BEGIN")
+        try:
+            # Sem modificador, date() de SQLite antigos devolve '2024-02-31' como está; com '+0 days'
+            # a data é recalculada e dias inexistentes deixam de ser iguais ao texto original.
+            conn.execute(
+                f"""
+                UPDATE lancamentos SET data_lancamento = {_DATA_ISO}
+                WHERE id > ? AND id <= ? AND data_lancamento GLOB '{_DATA_BR}'
+                  AND date({_DATA_ISO}, '+0 days') = {_DATA_ISO}
+                """,
+                (ultimo_id, fim),
+            )
+            conn.execute("INSERT OR REPLACE INTO migracao_progresso (versao, ultimo_id) VALUES (3, ?)", (fim,))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        ultimo_id = fim
+
+    conn.execute("DELETE FROM migracao_progresso WHERE versao = 3")
+    conn.commit()
+
+def _arquivos_importados(conn: sqlite3.Connection) -> None:
+    """Cria o controle dos arquivos já processados pela pasta monitorada (FolderWatcher)."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS arquivos_importados (
+            caminho TEXT PRIMARY KEY,
+            tamanho INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            hash TEXT NOT NULL,
+            status TEXT NOT NULL,
+            erro TEXT,
+            processado_em TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_arquivos_importados_hash ON arquivos_importados (hash)")
+
+def _cadastrar_pares(conn: sqlite3.Connection, source: str) -> None:
+    """Inclui nos cadastros os pares (nome, CNPJ) de loja e fornecedor dos lançamentos de `source`."""
+    for table, nome, cnpj, _ in entities.ENTITY_COLUMNS:
+        conn.execute(
+            f"""
+            INSERT OR IGNORE INTO {table} (nome, cnpj)
+            SELECT DISTINCT COALESCE({nome}, ''), COALESCE({cnpj}, '') FROM {source}
+            WHERE {nome} IS NOT NULL OR {cnpj} IS NOT NULL
+            """
+        )
+
+def _normalizar_cadastros(conn: sqlite3.Connection) -> None:
+    """
+    Troca loja, cnpj_loja, fornecedor e cnpj_forn de cada lançamento pelos ids dos cadastros.
+    Os pares (nome, CNPJ) dos lançamentos, inclusive dos anos arquivados, entram nos cadastros,
+    que passam a ser únicos pelo par. Os lançamentos vão para lancamentos_base com os mesmos ids
+    (e a mesma sequência AUTOINCREMENT) e lancamentos vira uma view com as colunas de antes.
+    Os arquivos dos anos arquivados continuam guardando nomes e CNPJs.
+    Os arquivos são anexados antes da transação (um arquivo lido não pode ser desanexado antes
+    do commit); se a execução for interrompida, a transação é desfeita e tudo é refeito.
+    """
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (entities.BASE_TABLE,)).fetchone():
+        return
+    years = [row[0] for row in conn.execute("SELECT ano FROM particoes ORDER BY ano")]
+    if len(years) > partitions.MAX_ATTACHED_ARCHIVES:
+        raise sqlite3.OperationalError(
+            f"Existem {len(years)} anos arquivados; a atualização anexa no máximo {partitions.MAX_ATTACHED_ARCHIVES}."
+        )
+    db_path = Path(next(row[2] for row in conn.execute("PRAGMA database_list") if row[1] == "main"))
+    schemas: List[str] = []
+    try:
+        for year in years:
+            path = partitions.archive_path(db_path, year)
+            if not path.exists():
+                raise sqlite3.OperationalError(f"Arquivo do ano {year} não encontrado: {path}. Restaure-o antes de atualizar o banco.")
+            conn.execute(f"ATTACH DATABASE ? AS {partitions.schema_name(year)}", (str(path),))
+            schemas.append(partitions.schema_name(year))
+
+        conn.execute("BEGIN")
+        try:
+            _mover_para_lancamentos_base(conn, schemas)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    finally:
+        for schema in schemas:
+            conn.execute(f"DETACH DATABASE {schema}")
+
+def _mover_para_lancamentos_base(conn: sqlite3.Connection, archives: List[str]) -> None:
+    """Passos de _normalizar_cadastros, em uma transação, com os arquivos dos anos já anexados."""
+    for table, _, _, _ in entities.ENTITY_COLUMNS:
+        conn.execute(entities.entity_table_sql(table, f"{table}_nova"))
+        conn.execute(f"INSERT INTO {table}_nova (id, nome, cnpj) SELECT id, nome, cnpj FROM {table}")
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {table}_nova RENAME TO {table}")
+    for query in entities.ENTITY_INDEXES:
+        conn.execute(query)
+    for source in ["lancamentos", *(f"{schema}.lancamentos" for schema in archives)]:
+        _cadastrar_pares(conn, source)
+
+    for query in entities.BASE_SCHEMA:
+        conn.execute(query)
+    ids = ", ".join(entities.entity_id_sql(table, f"l.{nome}", f"l.{cnpj}") for table, nome, cnpj, _ in entities.ENTITY_COLUMNS)
+    conn.execute(
+        f"""
+        INSERT INTO {entities.BASE_TABLE} (id, loja_id, fornecedor_id, {", ".join(entities.VALUE_COLUMNS)})
+        SELECT l.id, {ids}, {", ".join(f"l.{column}" for column in entities.VALUE_COLUMNS)}
+        FROM main.lancamentos AS l ORDER BY l.id
+        """
+    )
+    # Ids de lançamentos excluídos não podem voltar a ser usados (ver aggregate_by_tipo_since).
+    conn.execute("DELETE FROM sqlite_sequence WHERE name = ?", (entities.BASE_TABLE,))
+    conn.execute("INSERT INTO sqlite_sequence (name, seq) SELECT ?, seq FROM sqlite_sequence WHERE name = 'lancamentos'", (entities.BASE_TABLE,))
+    # Leva junto os índices e os triggers de resumo, de busca e de itens, recriados abaixo.
+    conn.execute("DROP TABLE main.lancamentos")
+    for query in [*entities.BASE_INDEXES, *entities.VIEW_SCHEMA]:
+        conn.execute(query)
+
+    # resumo_mensal não depende do fornecedor; o resumo por fornecedor é refeito com os ids,
+    # com os anos arquivados somados a partir dos arquivos.
+    rollups.normalize_rollups(conn)
+    for schema in archives:
+        rollups.add_fornecedor_rollups(conn, f"{schema}.lancamentos")
+    search.create_search_triggers(conn)
+    conn.execute(items.item_trigger_sql(entities.BASE_TABLE))
+
+def _carga_em_lote(conn: sqlite3.Connection) -> None:
+    """Tabela de controle das cargas em lote e triggers de resumo e de busca que a respeitam."""
+    conn.execute(entities.BULK_SCHEMA)
+    rollups.create_bulk_triggers(conn)
+    search.create_bulk_triggers(conn)
+
+# Lista ordenada de migrações. Novas versões devem ser sempre adicionadas ao final.
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Índices das consultas de lançamentos", _lancamentos_indexes),
+    Migration(2, "Tabelas de resumo mensais e por fornecedor", create_rollups),
+    Migration(3, "Datas de lançamento no formato AAAA-MM-DD", _normalizar_datas, transactional=False),
+    Migration(4, "Índice de busca textual (FTS5) dos lançamentos", create_search_index),
+    Migration(5, "Controle de arquivos importados da pasta monitorada", _arquivos_importados),
+    Migration(6, "Registro dos anos arquivados em bancos separados", create_registry),
+    Migration(7, "Itens (det/prod) das NF-e importadas", create_items_table),
+    Migration(8, "Loja e fornecedor dos lançamentos pelos ids dos cadastros", _normalizar_cadastros, transactional=False),
+    Migration(9, "Resumos e busca atualizados uma vez por lote nas cargas em lote", _carga_em_lote),
+]
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Retorna a versão do esquema gravada em PRAGMA user_version."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def apply_migrations(conn: sqlite3.Connection, migrations: List[Migration] = MIGRATIONS) -> List[int]:
+    """
+    Aplica, em ordem, as migrações com versão maior que a atual.
+    Cada migração roda em sua própria transação junto com a atualização de user_version;
+    as não transacionais gravam user_version somente depois de concluídas.
+    Retorna a lista de versões aplicadas.
+    """
+    current = get_schema_version(conn)
+    applied: List[int] = []
+
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version <= current:
+            continue
+
+        if migration.transactional:
+            conn.execute("BEGIN")
+            try:
+                migration.apply(conn)
+                conn.execute(f"PRAGMA user_version = {migration.version}")
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        else:
+            migration.apply(conn)
+            conn.execute(f"PRAGMA user_version = {migration.version}")
+
+        applied.append(migration.version)
+        current = migration.version
+
+    return applied
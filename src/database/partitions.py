@@ -0,0 +1,138 @@
+import sqlite3
+from pathlib import Path
+from typing import Iterable, List, Sequence
+from src.database import entities, items
+
+# Anos encerrados podem ser movidos do banco principal para arquivos notas_AAAA.db
+# (um por ano), anexados com ATTACH somente quando uma consulta alcança o período.
+# A tabela particoes, no banco principal, registra os anos arquivados.
+# As tabelas de resumo continuam no banco principal e incluem os anos arquivados,
+# então totais por meses inteiros não precisam anexar nenhum arquivo.
+
+# O SQLite aceita até 10 bancos anexados por conexão; um fica livre para outros usos.
+MAX_ATTACHED_ARCHIVES = 9
+
+ARCHIVED = "arquivado"
+ARCHIVING = "arquivando"
+
+# Mesma ordem de colunas em todas as partições, para que o UNION ALL seja posicional.
+PARTITION_COLUMNS = (
+    "id", "loja", "cnpj_loja", "fornecedor", "cnpj_forn", "documento", "nfe", "chave_nfe",
+    "valor", "data_lancamento", "vencimento", "observacao", "tipo",
+)
+_COLUMNS = ", ".join(PARTITION_COLUMNS)
+_ITEM_COLUMNS = ", ".join(items.ITEM_COLUMNS)
+
+def schema_name(year: int) -> str:
+    """Nome usado no ATTACH do arquivo de um ano."""
+    return f"arquivo_{year}"
+
+def archive_path(db_path: Path, year: int) -> Path:
+    """Arquivo de um ano, ao lado do banco principal (data/notas.db -> data/notas_2019.db)."""
+    return db_path.parent / f"{db_path.stem}_{year}{db_path.suffix}"
+
+def create_registry(conn: sqlite3.Connection) -> None:
+    """Cria a tabela que registra os anos arquivados."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS particoes (
+            ano INTEGER PRIMARY KEY,
+            arquivo TEXT NOT NULL,
+            status TEXT NOT NULL,
+            linhas INTEGER NOT NULL DEFAULT 0,
+            atualizado_em TEXT NOT NULL
+        )
+        """
+    )
+
+def create_archive_schema(conn: sqlite3.Connection, schema: str) -> None:
+    """Cria as tabelas de lançamentos e de itens e os índices das consultas em um arquivo anexado."""
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {schema}.lancamentos (
+            id INTEGER PRIMARY KEY,
+            loja TEXT, cnpj_loja TEXT, fornecedor TEXT, cnpj_forn TEXT,
+            documento TEXT, nfe TEXT, chave_nfe TEXT,
+            valor REAL NOT NULL, data_lancamento TEXT, vencimento TEXT,
+            observacao TEXT, tipo TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_lancamentos_data_fornecedor ON lancamentos (data_lancamento, fornecedor)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_lancamentos_fornecedor_data ON lancamentos (fornecedor, data_lancamento)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_lancamentos_chave_nfe ON lancamentos (chave_nfe)")
+    conn.execute(items.item_table_sql(schema))
+    for query in items.item_indexes_sql(schema):
+        conn.execute(query)
+
+def ensure_archive_schema(conn: sqlite3.Connection, schema: str) -> None:
+    """Completa o esquema de um arquivo anexado criado antes da tabela de itens existir."""
+    exists = conn.execute(
+        f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?", (items.ITEMS_TABLE,)
+    ).fetchone()
+    if exists is None:
+        create_archive_schema(conn, schema)
+
+def union_source(years: Iterable[int], table: str = "lancamentos") -> str:
+    """
+    Subconsulta UNION ALL da tabela (lancamentos ou lancamento_itens) no banco principal
+    e nos anos anexados, para uso em um FROM.
+    """
+    columns = _ITEM_COLUMNS if table == items.ITEMS_TABLE else _COLUMNS
+    arms = [f"SELECT {columns} FROM main.{table}"]
+    arms.extend(f"SELECT {columns} FROM {schema_name(year)}.{table}" for year in years)
+    return "(" + " UNION ALL ".join(arms) + ")"
+
+def move_batch(conn: sqlite3.Connection, schema: str, ids: Sequence[int]) -> None:
+    """
+    Copia os lançamentos informados, com os itens das notas, para o arquivo anexado e os
+    remove do banco principal (o trigger de DELETE remove os itens). No arquivo, loja e
+    fornecedor ficam com nome e CNPJ, lidos da view lancamentos.
+    INSERT OR IGNORE torna o passo repetível: se uma execução anterior foi interrompida
+    entre as duas gravações, as linhas já copiadas são apenas removidas do principal.
+    Deve rodar dentro de uma transação.
+    """
+    placeholders = ", ".join("?" for _ in ids)
+    conn.execute(
+        f"INSERT OR IGNORE INTO {schema}.lancamentos ({_COLUMNS}) SELECT {_COLUMNS} FROM main.lancamentos WHERE id IN ({placeholders})",
+        tuple(ids),
+    )
+    conn.execute(
+        f"""
+        INSERT OR IGNORE INTO {schema}.{items.ITEMS_TABLE} ({_ITEM_COLUMNS})
+        SELECT {_ITEM_COLUMNS} FROM main.{items.ITEMS_TABLE}
+        WHERE chave_nfe IN (SELECT chave_nfe FROM main.{entities.BASE_TABLE} WHERE id IN ({placeholders}))
+        """,
+        tuple(ids),
+    )
+    conn.execute(f"DELETE FROM main.{entities.BASE_TABLE} WHERE id IN ({placeholders})", tuple(ids))
+
+def delete_rows(conn: sqlite3.Connection, schema: str, ids: Sequence[int]) -> int:
+    """
+    Exclui do arquivo anexado os lançamentos informados e os itens das notas deles, que no
+    arquivo não têm trigger. Não altera os resumos. Deve rodar dentro de uma transação.
+    Retorna quantos lançamentos foram excluídos.
+    """
+    placeholders = ", ".join("?" for _ in ids)
+    conn.execute(
+        f"""
+        DELETE FROM {schema}.{items.ITEMS_TABLE}
+        WHERE chave_nfe IN (SELECT chave_nfe FROM {schema}.lancamentos WHERE id IN ({placeholders}) AND chave_nfe <> '')
+        """,
+        tuple(ids),
+    )
+    return conn.execute(f"DELETE FROM {schema}.lancamentos WHERE id IN ({placeholders})", tuple(ids)).rowcount
+
+def batch_source(schema: str, ids: Sequence[int]) -> str:
+    """Subconsulta com os lançamentos de um lote já movido, usada para devolvê-los aos resumos."""
+    return f"(SELECT * FROM {schema}.lancamentos WHERE id IN ({', '.join(str(int(i)) for i in ids)}))"
+
+def years_in_range(archived: List[int], start_date: str, end_date: str) -> List[int]:
+    """Anos arquivados alcançados pelo filtro de datas; sem filtro, todos."""
+    if not (start_date and end_date):
+        return list(archived)
+    try:
+        first, last = int(start_date[:4]), int(end_date[:4])
+    except ValueError:
+        return list(archived)
+    return [year for year in archived if first <= year <= last]
@@ -0,0 +1,25 @@
+import argparse
+from pathlib import Path
+from src.database.manager import DatabaseManager, DATABASE_PATH
+
+def print_query_plans(db_manager: DatabaseManager) -> None:
+    """Imprime o EXPLAIN QUERY PLAN de cada formato de query de get_lancamentos."""
+    print(f"Banco: {db_manager.db_path} (versão do esquema {db_manager.schema_version()})")
+    for query, plan in db_manager.explain_lancamentos_queries().items():
+        print(f"\n{query}")
+        for detail in plan:
+            print(f"  -> {detail}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Exibe os planos de execução das consultas de lançamentos.")
+    parser.add_argument("--db", type=Path, default=DATABASE_PATH, help="Caminho do banco SQLite.")
+    args = parser.parse_args()
+
+    db_manager = DatabaseManager(db_path=args.db)
+    try:
+        print_query_plans(db_manager)
+    finally:
+        db_manager.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Tuple, TypedDict
+from src.database import entities
+
+# Tabelas de resumo mantidas por triggers a cada escrita em lancamentos (lancamentos_base desde a versão 8);
+# nas cargas em lote, uma vez por lote (ver entities.BULK_TABLE).
+# Os valores são acumulados em centavos (inteiros) para que somas e subtrações
+# sucessivas não acumulem erro de ponto flutuante.
+# Lançamentos sem data são agrupados no mês NO_MONTH, ignorado nos totais mensais.
+NO_MONTH = "-"
+
+_MES = "COALESCE(substr({row}.data_lancamento, 1, 7), '" + NO_MONTH + "')"
+_CENTAVOS = "CAST(ROUND({row}.valor * 100) AS INTEGER)"
+
+class _FornecedorKey(NamedTuple):
+    """Como resumo_fornecedor_mensal identifica o fornecedor."""
+    column: str  # coluna na tabela de resumo e na tabela que dispara os triggers
+    sql_type: str
+    row_value: str  # a partir de NEW ou OLD, nos triggers
+    source_value: str  # a partir de uma linha `l` com as colunas da view lancamentos
+
+# Até a versão 7 do esquema, pelo nome gravado no lançamento (usado apenas pela migração 2).
+_POR_NOME = _FornecedorKey("fornecedor", "TEXT", "COALESCE({row}.fornecedor, '')", "COALESCE(l.fornecedor, '')")
+# Desde a versão 8, pelo id do cadastro de fornecedores; 0 para lançamentos sem fornecedor.
+# Os anos arquivados guardam nome e CNPJ, convertidos no id pelo cadastro.
+_POR_ID = _FornecedorKey(
+    "fornecedor_id", "INTEGER", "COALESCE({row}.fornecedor_id, 0)",
+    f"COALESCE({entities.entity_id_sql('fornecedores', 'l.fornecedor', 'l.cnpj_forn')}, 0)",
+)
+# O mesmo, somando linhas lidas direto de lancamentos_base.
+_POR_ID_BASE = _POR_ID._replace(source_value="COALESCE(l.fornecedor_id, 0)")
+
+def _add(row: str, key: _FornecedorKey) -> str:
+    """SQL que soma um lançamento (NEW ou OLD) às tabelas de resumo."""
+    mes, fornecedor, centavos = (expr.format(row=row) for expr in (_MES, key.row_value, _CENTAVOS))
+    return f"""
+        INSERT INTO resumo_mensal (mes, tipo, total_centavos, quantidade)
+        VALUES ({mes}, {row}.tipo, {centavos}, 1)
+        ON CONFLICT (mes, tipo) DO UPDATE SET
+            total_centavos = total_centavos + excluded.total_centavos,
+            quantidade = quantidade + 1;
+        INSERT INTO resumo_fornecedor_mensal (mes, {key.column}, tipo, total_centavos, quantidade)
+        VALUES ({mes}, {fornecedor}, {row}.tipo, {centavos}, 1)
+        ON CONFLICT (mes, {key.column}, tipo) DO UPDATE SET
+            total_centavos = total_centavos + excluded.total_centavos,
+            quantidade = quantidade + 1;
+    """
+
+def _subtract(row: str, key: _FornecedorKey) -> str:
+    """SQL que remove um lançamento (OLD) das tabelas de resumo."""
+    mes, fornecedor, centavos = (expr.format(row=row) for expr in (_MES, key.row_value, _CENTAVOS))
+    return f"""
+        UPDATE resumo_mensal
+        SET total_centavos = total_centavos - {centavos}, quantidade = quantidade - 1
+        WHERE mes = {mes} AND tipo = {row}.tipo;
+        DELETE FROM resumo_mensal
+        WHERE mes = {mes} AND tipo = {row}.tipo AND quantidade <= 0;
+        UPDATE resumo_fornecedor_mensal
+        SET total_centavos = total_centavos - {centavos}, quantidade = quantidade - 1
+        WHERE mes = {mes} AND {key.column} = {fornecedor} AND tipo = {row}.tipo;
+        DELETE FROM resumo_fornecedor_mensal
+        WHERE mes = {mes} AND {key.column} = {fornecedor} AND tipo = {row}.tipo AND quantidade <= 0;
+    """
+
+def _fornecedor_table(key: _FornecedorKey) -> List[str]:
+    return [
+        f"""
+        CREATE TABLE IF NOT EXISTS resumo_fornecedor_mensal (
+            mes TEXT NOT NULL,
+            {key.column} {key.sql_type} NOT NULL,
+            tipo TEXT NOT NULL,
+            total_centavos INTEGER NOT NULL DEFAULT 0,
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (mes, {key.column}, tipo)
+        ) WITHOUT ROWID
+        """,
+        f"CREATE INDEX IF NOT EXISTS idx_resumo_fornecedor ON resumo_fornecedor_mensal ({key.column}, mes)",
+    ]
+
+# Nomes dos triggers de resumo, na ordem de _triggers.
+_TRIGGER_NAMES = ("trg_lancamentos_resumo_insert", "trg_lancamentos_resumo_delete", "trg_lancamentos_resumo_update")
+
+def _triggers(table: str, key: _FornecedorKey, bulk: bool = False) -> List[str]:
+    """Triggers de resumo em `table`; com bulk, eles ignoram as linhas de uma carga em lote."""
+    new, old = (entities.per_row_sql(row) if bulk else "" for row in ("NEW", "OLD"))
+    insert, delete, update = _TRIGGER_NAMES
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {insert} AFTER INSERT ON {table} {new}
+        BEGIN {_add("NEW", key)} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {delete} AFTER DELETE ON {table} {old}
+        BEGIN {_subtract("OLD", key)} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {update}
+        AFTER UPDATE OF data_lancamento, {key.column}, tipo, valor ON {table} {old}
+        BEGIN {_subtract("OLD", key)} {_add("NEW", key)} END
+        """,
+    ]
+
+ROLLUP_SCHEMA: List[str] = [
+    """
+    CREATE TABLE IF NOT EXISTS resumo_mensal (
+        mes TEXT NOT NULL,
+        tipo TEXT NOT NULL,
+        total_centavos INTEGER NOT NULL DEFAULT 0,
+        quantidade INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (mes, tipo)
+    ) WITHOUT ROWID
+    """,
+    *_fornecedor_table(_POR_NOME),
+    *_triggers("lancamentos", _POR_NOME),
+]
+
+# {source} é a view lancamentos ou uma subconsulta com as mesmas colunas
+# (ex.: o UNION ALL com os anos arquivados, ver src.database.partitions).
+_EXPECTED_MENSAL = f"""
+    SELECT {_MES.format(row='l')} AS mes, l.tipo AS tipo,
+           SUM({_CENTAVOS.format(row='l')}) AS total_centavos, COUNT(*) AS quantidade
+    FROM {{source}} AS l
+    WHERE true
+    GROUP BY 1, 2
+"""
+
+def _expected_fornecedor(source: str, key: _FornecedorKey = _POR_ID) -> str:
+    return f"""
+        SELECT {_MES.format(row='l')} AS mes, {key.source_value} AS {key.column}, l.tipo AS tipo,
+               SUM({_CENTAVOS.format(row='l')}) AS total_centavos, COUNT(*) AS quantidade
+        FROM {source} AS l
+        WHERE true
+        GROUP BY 1, 2, 3
+    """
+
+class RollupDrift(TypedDict):
+    """Diferença encontrada entre uma tabela de resumo e os lançamentos."""
+    tabela: str
+    chave: Tuple[Any, ...]
+    esperado_centavos: int
+    atual_centavos: int
+    esperado_quantidade: int
+    atual_quantidade: int
+
+def create_rollups(conn: sqlite3.Connection) -> None:
+    """
+    Migração 2: cria as tabelas de resumo (com o fornecedor pelo nome) e seus triggers e as
+    popula a partir dos lançamentos. A migração 8 passa a tabela por fornecedor para o id.
+    """
+    for query in ROLLUP_SCHEMA:
+        conn.execute(query)
+    conn.execute("DELETE FROM resumo_mensal")
+    conn.execute("DELETE FROM resumo_fornecedor_mensal")
+    _add_mensal(conn, "lancamentos")
+    _add_fornecedor(conn, "lancamentos", _POR_NOME)
+
+def normalize_rollups(conn: sqlite3.Connection) -> None:
+    """
+    Migração 8: recria resumo_fornecedor_mensal com o id do fornecedor, a partir da view
+    lancamentos, e os triggers em lancamentos_base. resumo_mensal não muda. Os anos
+    arquivados devem ser somados em seguida com add_fornecedor_rollups.
+    """
+    conn.execute("DROP TABLE IF EXISTS resumo_fornecedor_mensal")
+    for query in [*_fornecedor_table(_POR_ID), *_triggers(entities.BASE_TABLE, _POR_ID)]:
+        conn.execute(query)
+    _add_fornecedor(conn, "lancamentos", _POR_ID)
+
+def rebuild_rollups(conn: sqlite3.Connection, source: str = "lancamentos") -> None:
+    """Recalcula as tabelas de resumo do zero. Deve rodar dentro de uma transação."""
+    conn.execute("DELETE FROM resumo_mensal")
+    conn.execute("DELETE FROM resumo_fornecedor_mensal")
+    add_rollups(conn, source)
+
+def create_bulk_triggers(conn: sqlite3.Connection) -> None:
+    """Migração 9: recria os triggers em lancamentos_base para que ignorem as linhas das cargas em lote."""
+    for name in _TRIGGER_NAMES:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    for query in _triggers(entities.BASE_TABLE, _POR_ID, bulk=True):
+        conn.execute(query)
+
+def add_rows_after(conn: sqlite3.Connection, after_id: int) -> None:
+    """Soma às tabelas de resumo, com um GROUP BY por tabela, as linhas de lancamentos_base com id maior que `after_id`."""
+    source = f"(SELECT * FROM {entities.BASE_TABLE} WHERE id > {int(after_id)})"
+    _add_mensal(conn, source)
+    _add_fornecedor(conn, source, _POR_ID_BASE)
+
+def add_rollups(conn: sqlite3.Connection, source: str) -> None:
+    """
+    Soma às tabelas de resumo os lançamentos de `source`, em uma instrução por tabela.
+    Usado ao arquivar um ano: os triggers de DELETE subtraem as linhas movidas, que
+    continuam fazendo parte dos totais.
+    """
+    _add_mensal(conn, source)
+    _add_fornecedor(conn, source, _POR_ID)
+
+def subtract_rollups(conn: sqlite3.Connection, source: str) -> None:
+    """
+    Tira das tabelas de resumo os lançamentos de `source`, em uma instrução por tabela.
+    Usado ao excluir lançamentos de um ano arquivado, que não tem triggers.
+    """
+    _add_mensal(conn, source, sign=-1)
+    _add_fornecedor(conn, source, _POR_ID, sign=-1)
+    conn.execute("DELETE FROM resumo_mensal WHERE quantidade <= 0")
+    conn.execute("DELETE FROM resumo_fornecedor_mensal WHERE quantidade <= 0")
+
+def add_fornecedor_rollups(conn: sqlite3.Connection, source: str) -> None:
+    """Soma a resumo_fornecedor_mensal os lançamentos de `source` (ex.: um ano arquivado)."""
+    _add_fornecedor(conn, source, _POR_ID)
+
+def _add_mensal(conn: sqlite3.Connection, source: str, sign: int = 1) -> None:
+    conn.execute(
+        f"""
+        INSERT INTO resumo_mensal (mes, tipo, total_centavos, quantidade)
+        SELECT mes, tipo, {sign} * total_centavos, {sign} * quantidade FROM ({_EXPECTED_MENSAL.format(source=source)})
+        WHERE true
+        ON CONFLICT (mes, tipo) DO UPDATE SET
+            total_centavos = total_centavos + excluded.total_centavos,
+            quantidade = quantidade + excluded.quantidade
+        """
+    )
+
+def _add_fornecedor(conn: sqlite3.Connection, source: str, key: _FornecedorKey, sign: int = 1) -> None:
+    conn.execute(
+        f"""
+        INSERT INTO resumo_fornecedor_mensal (mes, {key.column}, tipo, total_centavos, quantidade)
+        SELECT mes, {key.column}, tipo, {sign} * total_centavos, {sign} * quantidade FROM ({_expected_fornecedor(source, key)})
+        WHERE true
+        ON CONFLICT (mes, {key.column}, tipo) DO UPDATE SET
+            total_centavos = total_centavos + excluded.total_centavos,
+            quantidade = quantidade + excluded.quantidade
+        """
+    )
+
+def verify_rollups(conn: sqlite3.Connection, source: str = "lancamentos") -> List[RollupDrift]:
+    """Compara as tabelas de resumo com os totais recalculados e retorna as divergências."""
+    drifts: List[RollupDrift] = []
+    checks = [
+        ("resumo_mensal", _EXPECTED_MENSAL.format(source=source), "SELECT mes, tipo, total_centavos, quantidade FROM resumo_mensal"),
+        (
+            "resumo_fornecedor_mensal",
+            _expected_fornecedor(source),
+            "SELECT mes, fornecedor_id, tipo, total_centavos, quantidade FROM resumo_fornecedor_mensal",
+        ),
+    ]
+    for table, expected_query, actual_query in checks:
+        expected = _by_key(conn.execute(expected_query).fetchall())
+        actual = _by_key(conn.execute(actual_query).fetchall())
+        for key in sorted(expected.keys() | actual.keys()):
+            exp_centavos, exp_qtd = expected.get(key, (0, 0))
+            act_centavos, act_qtd = actual.get(key, (0, 0))
+            if (exp_centavos, exp_qtd) != (act_centavos, act_qtd):
+                drifts.append({
+                    "tabela": table, "chave": key,
+                    "esperado_centavos": exp_centavos, "atual_centavos": act_centavos,
+                    "esperado_quantidade": exp_qtd, "atual_quantidade": act_qtd,
+                })
+    return drifts
+
+def _by_key(rows: List[Any]) -> Dict[Tuple[Any, ...], Tuple[int, int]]:
+    """Indexa linhas (chave..., total_centavos, quantidade) pela chave."""
+    return {tuple(row[:-2]): (row[-2], row[-1]) for row in rows}
+
+def main() -> None:
+    from src.database.manager import DatabaseManager, DATABASE_PATH
+
+    parser = argparse.ArgumentParser(description="Verifica ou recalcula as tabelas de resumo dos lançamentos.")
+    parser.add_argument("command", choices=("verify", "rebuild"))
+    parser.add_argument("--db", type=Path, default=DATABASE_PATH, help="Caminho do banco SQLite.")
+    args = parser.parse_args()
+
+    db_manager = DatabaseManager(db_path=args.db)
+    try:
+        if args.command == "rebuild":
+            db_manager.rebuild_rollups()
+            print("Tabelas de resumo recalculadas.")
+        drifts = db_manager.verify_rollups()
+    finally:
+        db_manager.close()
+
+    for drift in drifts:
+        print(
+            f"{drift['tabela']} {drift['chave']}: "
+            f"esperado {drift['esperado_centavos'] / 100:.2f} ({drift['esperado_quantidade']}), "
+            f"atual {drift['atual_centavos'] / 100:.2f} ({drift['atual_quantidade']})"
+        )
+    print(f"{len(drifts)} divergência(s) encontrada(s).")
+    sys.exit(1 if drifts else 0)
+
+if __name__ == "__main__":
+    main()
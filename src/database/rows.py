@@ -0,0 +1,82 @@
+import sqlite3
+from collections import namedtuple
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, Tuple
+from src.database.partitions import PARTITION_COLUMNS
+
+# Registro compacto de um lançamento: uma tupla com as colunas na ordem de PARTITION_COLUMNS,
+# sem o dicionário de 13 chaves criado por linha. Continua aceitando row['valor'] e
+# row.get('valor'), então quem lê um LancamentoData também lê um LancamentoRow.
+ROW_COLUMNS = PARTITION_COLUMNS
+_INDEX: Dict[str, int] = {name: i for i, name in enumerate(ROW_COLUMNS)}
+_tuple_new = tuple.__new__
+_tuple_getitem = tuple.__getitem__
+
+# Colunas com poucos valores distintos (cadastros, tipo e datas): com shared_strings,
+# as linhas de uma mesma consulta passam a apontar para uma única cópia de cada texto.
+SHARED_COLUMNS = ("loja", "cnpj_loja", "fornecedor", "cnpj_forn", "data_lancamento", "vencimento", "tipo")
+
+class LancamentoRow(namedtuple("LancamentoRow", ROW_COLUMNS)):
+    """
+    Lançamento como tupla nomeada: row.valor, row[8] e row['valor'] retornam o mesmo valor.
+    Somente leitura; dict(row) ou row.to_dict() produz o LancamentoData equivalente.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key: Any) -> Any:
+        if key.__class__ is str:
+            try:
+                key = _INDEX[key]
+            except KeyError:
+                raise KeyError(key) from None
+        return _tuple_getitem(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        index = _INDEX.get(key)
+        return default if index is None else _tuple_getitem(self, index)
+
+    def keys(self) -> Tuple[str, ...]:
+        return ROW_COLUMNS
+
+    def values(self) -> Tuple[Any, ...]:
+        return tuple(self)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return zip(ROW_COLUMNS, self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(zip(ROW_COLUMNS, self))
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "LancamentoRow":
+        """Converte um LancamentoData (ex.: recebido do servidor) em LancamentoRow."""
+        return _tuple_new(cls, [data.get(column) for column in ROW_COLUMNS])
+
+RowFactory = Callable[[sqlite3.Cursor, Tuple[Any, ...]], LancamentoRow]
+
+def lancamento_row(cursor: sqlite3.Cursor, row: Tuple[Any, ...]) -> LancamentoRow:
+    """row_factory que cria um LancamentoRow direto da tupla lida pelo sqlite3."""
+    return _tuple_new(LancamentoRow, row)
+
+def lancamento_row_factory(shared_strings: bool = True) -> RowFactory:
+    """
+    row_factory de LancamentoRow para uma consulta com as colunas de ROW_COLUMNS.
+    Com shared_strings, os textos repetidos das SHARED_COLUMNS são reaproveitados entre
+    as linhas (um dicionário por consulta), o que reduz bastante a memória de listas grandes.
+    """
+    if not shared_strings:
+        return lancamento_row
+    cache: Dict[Optional[str], Optional[str]] = {}
+    shared = cache.setdefault
+    loja, cnpj_loja, fornecedor, cnpj_forn, data, vencimento, tipo = (_INDEX[c] for c in SHARED_COLUMNS)
+
+    def factory(cursor: sqlite3.Cursor, row: Tuple[Any, ...]) -> LancamentoRow:
+        values = list(row)
+        values[loja] = shared(row[loja], row[loja])
+        values[cnpj_loja] = shared(row[cnpj_loja], row[cnpj_loja])
+        values[fornecedor] = shared(row[fornecedor], row[fornecedor])
+        values[cnpj_forn] = shared(row[cnpj_forn], row[cnpj_forn])
+        values[data] = shared(row[data], row[data])
+        values[vencimento] = shared(row[vencimento], row[vencimento])
+        values[tipo] = shared(row[tipo], row[tipo])
+        return _tuple_new(LancamentoRow, values)
+    return factory
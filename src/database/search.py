@@ -0,0 +1,106 @@
+import re
+import sqlite3
+from typing import Dict, List, Sequence
+from src.database import entities
+
+# Índice FTS5 de conteúdo externo: o texto fica apenas em lancamentos (a view, desde a versão 8
+# do esquema) e o índice guarda só os termos, mantidos pelos triggers abaixo. remove_diacritics
+# faz "agua" encontrar "água"; os índices de prefixo de 2 e 3 caracteres deixam as buscas por
+# início de palavra rápidas.
+SEARCH_TABLE = "lancamentos_busca"
+SEARCH_COLUMNS = ("fornecedor", "loja", "documento", "nfe", "chave_nfe", "observacao")
+
+_COLUMNS = ", ".join(SEARCH_COLUMNS)
+
+# Nomes dos triggers da busca, na ordem de _triggers.
+_TRIGGER_NAMES = ("trg_lancamentos_busca_insert", "trg_lancamentos_busca_delete", "trg_lancamentos_busca_update")
+
+def _triggers(table: str, values: Dict[str, str], columns: Sequence[str], bulk: bool = False) -> List[str]:
+    """
+    Triggers que mantêm o índice a partir de `table`: `values` dá a expressão SQL de cada coluna
+    de SEARCH_COLUMNS em função da linha ({row} = NEW ou OLD), lida das colunas `columns`.
+    Com bulk, os triggers ignoram as linhas de uma carga em lote (ver index_rows_after).
+    """
+    new = ", ".join(values[column].format(row="NEW") for column in SEARCH_COLUMNS)
+    old = ", ".join(values[column].format(row="OLD") for column in SEARCH_COLUMNS)
+    insert = f"INSERT INTO {SEARCH_TABLE} (rowid, {_COLUMNS}) VALUES (NEW.id, {new});"
+    # Em tabelas de conteúdo externo, a remoção de uma linha exige os valores antigos.
+    delete = f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, {_COLUMNS}) VALUES ('delete', OLD.id, {old});"
+    when_new, when_old = (entities.per_row_sql(row) if bulk else "" for row in ("NEW", "OLD"))
+    insert_name, delete_name, update_name = _TRIGGER_NAMES
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {insert_name} AFTER INSERT ON {table} {when_new}
+        BEGIN {insert} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {delete_name} AFTER DELETE ON {table} {when_old}
+        BEGIN {delete} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {update_name} AFTER UPDATE OF {', '.join(columns)} ON {table} {when_old}
+        BEGIN {delete} {insert} END
+        """,
+    ]
+
+SEARCH_SCHEMA: List[str] = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        {_COLUMNS},
+        content='lancamentos', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    *_triggers("lancamentos", {column: f"{{row}}.{column}" for column in SEARCH_COLUMNS}, SEARCH_COLUMNS),
+]
+
+def _base_triggers(bulk: bool) -> List[str]:
+    """Triggers em lancamentos_base, com loja e fornecedor lidos dos cadastros."""
+    values = {column: f"{{row}}.{column}" for column in SEARCH_COLUMNS}
+    values["loja"] = entities.entity_name_sql("lojas", "{row}.loja_id")
+    values["fornecedor"] = entities.entity_name_sql("fornecedores", "{row}.fornecedor_id")
+    columns = [column for column in SEARCH_COLUMNS if column not in ("loja", "fornecedor")]
+    return _triggers(entities.BASE_TABLE, values, ["loja_id", "fornecedor_id", *columns], bulk)
+
+def create_search_triggers(conn: sqlite3.Connection) -> None:
+    """
+    Migração 8: recria os triggers em lancamentos_base, com loja e fornecedor lidos dos cadastros.
+    O índice não muda: a view lancamentos tem as mesmas colunas e os mesmos ids.
+    """
+    for query in _base_triggers(bulk=False):
+        conn.execute(query)
+
+def create_bulk_triggers(conn: sqlite3.Connection) -> None:
+    """Migração 9: recria os triggers em lancamentos_base para que ignorem as linhas das cargas em lote."""
+    for name in _TRIGGER_NAMES:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    for query in _base_triggers(bulk=True):
+        conn.execute(query)
+
+def index_rows_after(conn: sqlite3.Connection, after_id: int) -> None:
+    """Indexa, em uma só instrução, os lançamentos com id maior que `after_id` (o fim de uma carga em lote)."""
+    conn.execute(f"INSERT INTO {SEARCH_TABLE} (rowid, {_COLUMNS}) SELECT id, {_COLUMNS} FROM lancamentos WHERE id > ?", (after_id,))
+
+def create_search_index(conn: sqlite3.Connection) -> None:
+    """Cria o índice de busca e seus triggers e o popula a partir dos lançamentos."""
+    for query in SEARCH_SCHEMA:
+        conn.execute(query)
+    rebuild_search_index(conn)
+
+def rebuild_search_index(conn: sqlite3.Connection) -> None:
+    """Recria o índice de busca a partir do conteúdo atual de lancamentos."""
+    conn.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('rebuild')")
+
+# Termos muito comuns (ex.: "nf") casam com boa parte da base; ordenar todos por relevância
+# custaria O(ocorrências). A relevância é calculada apenas entre os lançamentos mais recentes
+# que casam com a busca, e o custo fica limitado qualquer que seja o tamanho da base.
+SEARCH_CANDIDATES = 2000
+
+def build_match_expression(text: str) -> str:
+    """
+    Converte o texto digitado em uma expressão MATCH: cada palavra vira um prefixo entre aspas
+    e todas precisam aparecer ("tech sul" -> "tech"* "sul"*). Palavras de uma letra são buscadas
+    inteiras, pois como prefixo casariam com quase todos os termos do índice.
+    Pontuação é ignorada. Retorna "" se não houver palavras.
+    """
+    return " ".join(f'"{term}"*' if len(term) > 1 else f'"{term}"' for term in re.findall(r"\w+", text))
@@ -1,32 +1,120 @@
+import time
+_PROCESS_STARTED = time.perf_counter()
+
+import argparse
+import importlib
+import os
 import tkinter as tk
 from tkinter import ttk
-from typing import Dict, Any
-from src.database.manager import DatabaseManager
-from src.ui.screens import WelcomeScreen, GenericCadastroScreen, NotaFiscalEntryScreen, RelatorioScreen
-from src.ui.dashboard_screen import DashboardScreen
-from src.analysis.analytics import FinancialAnalytics
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple
+from src.database.manager import DatabaseManager, DEFAULT_PROFILE
+from src.ui.query_executor import QueryExecutor
+from src.analysis.analytics import SQLFinancialAnalytics
+
+if TYPE_CHECKING:
+    from src.ui.screens import BaseScreen
+    from src.services.xml_importer import XMLImporter
+
+# Nome da tela -> (módulo, classe, argumentos extras).
+# Os módulos são importados e as telas criadas somente na primeira exibição.
+SCREENS: Dict[str, Tuple[str, str, Tuple[Any, ...]]] = {
+    "Dashboard": ("src.ui.dashboard_screen", "DashboardScreen", ()),
+    "Welcome": ("src.ui.screens", "WelcomeScreen", ()),
+    "CadastroFornecedor": ("src.ui.screens", "GenericCadastroScreen", ("Cadastro de Fornecedor", "fornecedores")),
+    "CadastroLoja": ("src.ui.screens", "GenericCadastroScreen", ("Cadastro de Loja", "lojas")),
+    "EntradaNotaFiscal": ("src.ui.screens", "NotaFiscalEntryScreen", ()),
+    "RelatorioNotas": ("src.ui.screens", "RelatorioScreen", ()),
+    # Fora do menu: aberta com Ctrl+Shift+D.
+    "Diagnostico": ("src.ui.diagnostics_screen", "DiagnosticsScreen", ()),
+}
+
+class StartupProfile:
+    """Mede a duração de cada fase da inicialização da aplicação."""
+
+    def __init__(self, started: float) -> None:
+        self.started = self.last = started
+        self.phases: List[Tuple[str, float]] = []
+
+    def mark(self, phase: str) -> None:
+        """Encerra a fase atual, registrando o tempo desde a marcação anterior."""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self) -> str:
+        """Tabela com o tempo de cada fase e o total acumulado."""
+        lines = [f"{'fase':<32}{'ms':>9}{'acumulado':>12}"]
+        elapsed = 0.0
+        for phase, seconds in self.phases:
+            elapsed += seconds
+            lines.append(f"{phase:<32}{seconds * 1000:>9.1f}{elapsed * 1000:>12.1f}")
+        return "\n".join(lines)
 
 class MainApplication(tk.Tk):
-    def __init__(self) -> None:
+    def __init__(self, startup: Optional[StartupProfile] = None) -> None:
+        self.startup = startup or StartupProfile(time.perf_counter())
+        self.startup.mark("importação dos módulos")
         super().__init__()
         self.title("Sistema de Controle de Notas Fiscais")
         self.geometry("1400x900")
+        self.startup.mark("criação da janela (Tk)")
         
-        self.db_manager = DatabaseManager()
-        self.db_manager.corrigir_datas()
-        self.financial_analytics = FinancialAnalytics(self.db_manager)
+        # Com FISCALIZE_SERVER_URL, os dados vêm do servidor compartilhado (python -m src.remote.server).
+        server_url = os.environ.get("FISCALIZE_SERVER_URL")
+        if server_url:
+            from src.remote.client import RemoteDatabaseManager, RemoteFinancialAnalytics
+            remote = RemoteDatabaseManager(server_url, token=os.environ.get("FISCALIZE_SERVER_TOKEN", ""))
+            self.db_manager: Any = remote
+            self.financial_analytics: Any = RemoteFinancialAnalytics(remote)
+        else:
+            # O perfil de PRAGMAs pode ser escolhido na inicialização, ex.: FISCALIZE_DB_PROFILE=desempenho
+            self.db_manager = DatabaseManager(profile=os.environ.get("FISCALIZE_DB_PROFILE", DEFAULT_PROFILE))
+            self.financial_analytics = SQLFinancialAnalytics(self.db_manager)
+        # Medição das queries, ex.: FISCALIZE_SLOW_QUERY_MS=50 registra as que levarem 50 ms ou mais.
+        if slow_query_ms := os.environ.get("FISCALIZE_SLOW_QUERY_MS"):
+            self.db_manager.enable_instrumentation(float(slow_query_ms))
+        self._xml_importer: Optional["XMLImporter"] = None
+        self.startup.mark("abertura do banco e migrações")
         
         self.current_theme = "dark"
         self.style = ttk.Style()
         
+        # Consultas ao banco rodam fora da thread do Tk; a janela não congela durante buscas longas.
+        self.executor = QueryExecutor(self, on_busy_change=self._set_busy)
+
         self._configure_styles()
+        self._create_status_bar()
         self._create_main_container_frame()
-        self.screens: Dict[str, ttk.Frame] = self._initialize_screens()
+        self.screens: Dict[str, "BaseScreen"] = {}
+        # Tela exibida no momento; telas com polling (ex.: o dashboard) param quando deixam de ser esta.
+        self.current_screen: Optional["BaseScreen"] = None
         
         self.set_theme(self.current_theme)
         self._create_menu()
+        self.startup.mark("estilos, menu e layout")
         
         self.show_screen("Dashboard")
+        self.startup.mark("criação da primeira tela")
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.bind_all("<Control-Shift-D>", lambda event: self.show_screen("Diagnostico"))
+
+    @property
+    def xml_importer(self) -> "XMLImporter":
+        """XMLImporter criado no primeiro uso, adiando a importação do lxml."""
+        if self._xml_importer is None:
+            from src.services.xml_importer import XMLImporter
+            self._xml_importer = XMLImporter(mode="xpath")
+        return self._xml_importer
+
+    def close(self) -> None:
+        """Encerra as consultas em andamento, fecha as conexões com o banco e a janela."""
+        self.executor.shutdown()
+        self.db_manager.close()
+        self.destroy()
+
+    def _on_close(self) -> None:
+        """Fechamento da janela pelo gerenciador de janelas (WM_DELETE_WINDOW)."""
+        self.close()
 
     def _configure_styles(self) -> None:
         """Configura os estilos globais da aplicação."""
@@ -56,6 +144,25 @@ class MainApplication(tk.Tk):
         menu_tema.add_command(label="Tema Escuro", command=lambda: self.set_theme("dark"))
         menubar.add_cascade(label="Tema", menu=menu_tema)
 
+    def _create_status_bar(self) -> None:
+        """Cria a barra de status que indica consultas em andamento."""
+        self.status_bar = ttk.Frame(self)
+        self.status_bar.pack(side="bottom", fill="x")
+        self.status_label = ttk.Label(self.status_bar, text="")
+        self.status_label.pack(side="left", padx=10, pady=2)
+        self.status_progress = ttk.Progressbar(self.status_bar, mode="indeterminate", length=120)
+
+    def _set_busy(self, busy: bool) -> None:
+        """Mostra ou esconde o indicador de carregamento."""
+        if busy:
+            self.status_label.config(text="Carregando...")
+            self.status_progress.pack(side="right", padx=10, pady=2)
+            self.status_progress.start(15)
+        else:
+            self.status_label.config(text="")
+            self.status_progress.stop()
+            self.status_progress.pack_forget()
+
     def _create_main_container_frame(self) -> None:
         """Cria o frame principal para as telas."""
         self.container = ttk.Frame(self)
@@ -63,31 +170,25 @@ class MainApplication(tk.Tk):
         self.container.grid_rowconfigure(0, weight=1)
         self.container.grid_columnconfigure(0, weight=1)
 
-    def _initialize_screens(self) -> Dict[str, ttk.Frame]:
-        """Instancia as telas e as posiciona na grade, retornando-as em um dicionário."""
-        screens = {
-            "Dashboard": DashboardScreen(self.container, self),
-            "Welcome": WelcomeScreen(self.container, self),
-            "CadastroFornecedor": GenericCadastroScreen(self.container, self, "Cadastro de Fornecedor", "fornecedores"),
-            "CadastroLoja": GenericCadastroScreen(self.container, self, "Cadastro de Loja", "lojas"),
-            "EntradaNotaFiscal": NotaFiscalEntryScreen(self.container, self),
-            "RelatorioNotas": RelatorioScreen(self.container, self),
-        }
-        
-        for screen in screens.values():
-            screen.grid(row=0, column=0, sticky="nsew")
+    def _get_screen(self, screen_name: str) -> Optional["BaseScreen"]:
+        """Retorna a tela, criando-a e posicionando-a na grade na primeira chamada."""
+        if screen := self.screens.get(screen_name):
+            return screen
+        if screen_name not in SCREENS:
+            return None
 
-        return screens
+        module_name, class_name, args = SCREENS[screen_name]
+        screen_class = getattr(importlib.import_module(module_name), class_name)
+        screen = screen_class(self.container, self, *args)
+        screen.grid(row=0, column=0, sticky="nsew")
+        self.screens[screen_name] = screen
+        return screen
 
     def show_screen(self, screen_name: str) -> None:
-        if frame := self.screens.get(screen_name):
-            all_lancamentos = self.db_manager.get_lancamentos()
-            
-            if screen_name == "Dashboard" and hasattr(frame, 'load_data'):
-                frame.load_data(all_lancamentos)
-            elif hasattr(frame, 'load_data'):
-                frame.load_data()
-            
+        """Exibe a tela, recarregando seus dados somente se eles mudaram desde a última exibição."""
+        if frame := self._get_screen(screen_name):
+            self.current_screen = frame
+            frame.activate()
             frame.tkraise()
 
     def set_theme(self, theme_name: str) -> None:
@@ -113,6 +214,28 @@ class MainApplication(tk.Tk):
 
         self.event_generate("<<ThemeChanged>>")
 
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sistema de Controle de Notas Fiscais.")
+    parser.add_argument(
+        "--startup-profile", action="store_true",
+        help="Mede o tempo de cada fase da inicialização até o dashboard carregado e encerra.",
+    )
+    args = parser.parse_args()
+
+    startup = StartupProfile(_PROCESS_STARTED)
+    app = MainApplication(startup)
+    if not args.startup_profile:
+        app.mainloop()
+        return
+
+    app.update()
+    startup.mark("primeira pintura")
+    while app.executor.busy:
+        app.update()
+        time.sleep(0.001)
+    startup.mark("dados do dashboard")
+    print(startup.report())
+    app.close()
+
 if __name__ == "__main__":
-    app = MainApplication()
-    app.mainloop()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,244 @@
+"""
+Cliente do servidor HTTP/JSON (ver src.remote.server), com a mesma interface usada pelas
+telas, pelos serviços e pela análise financeira. O MainApplication usa este cliente no lugar
+do DatabaseManager local quando FISCALIZE_SERVER_URL está definida.
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+from src.database.manager import DATABASE_PATH, BatchResult, ChangeSet, DuplicateEntityError, ItemData, ItemTotals, Lancamento, LancamentoData
+from src.database.rows import LancamentoRow
+from src.database.instrumentation import QueryInstrumentation
+from src.remote.server import ANALYTICS_METHODS, READ_METHODS
+import http.client
+import json
+import threading
+import time
+
+class RemoteDatabaseManager:
+    """
+    Implementa as operações do DatabaseManager chamando o servidor.
+    Cada thread mantém sua própria conexão HTTP persistente (keep-alive).
+    Erros do servidor são levantados como RuntimeError (DuplicateEntityError nos cadastros
+    duplicados), como no acesso local.
+    """
+
+    def __init__(self, url: str, token: str = "", timeout: float = 60.0) -> None:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"URL do servidor inválida: {url}")
+        self.url = url
+        self._scheme = parts.scheme
+        self._host = parts.hostname
+        self._port = parts.port
+        self._base = parts.path.rstrip("/")
+        self._headers = {"Content-Type": "application/json"}
+        if token:
+            self._headers["Authorization"] = f"Bearer {token}"
+        self.timeout = timeout
+        # Diretório local para arquivos gerados pelas telas (ex.: relatório de erros da importação).
+        self.db_path = DATABASE_PATH
+        self._local = threading.local()
+        self._connections: List[http.client.HTTPConnection] = []
+        self._connections_lock = threading.Lock()
+        # Com a medição ativada, registra a latência de cada chamada ao servidor.
+        self.instrumentation: Optional[QueryInstrumentation] = None
+
+    def enable_instrumentation(self, slow_threshold_ms: float = 100.0, slow_log_size: int = 200) -> QueryInstrumentation:
+        """Passa a medir o tempo de resposta de cada chamada ao servidor."""
+        if self.instrumentation is None:
+            self.instrumentation = QueryInstrumentation(slow_threshold_ms, slow_log_size)
+        else:
+            self.instrumentation.slow_threshold = slow_threshold_ms / 1000
+        return self.instrumentation
+
+    def disable_instrumentation(self) -> None:
+        self.instrumentation = None
+
+    def _get_connection(self) -> http.client.HTTPConnection:
+        """Retorna a conexão HTTP da thread atual, criando-a na primeira chamada."""
+        conn: Optional[http.client.HTTPConnection] = getattr(self._local, "conn", None)
+        if conn is None:
+            conn_class = http.client.HTTPSConnection if self._scheme == "https" else http.client.HTTPConnection
+            conn = conn_class(self._host, self._port, timeout=self.timeout)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self) -> None:
+        """Fecha todas as conexões abertas pelo cliente."""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def call(self, target: str, method: str, **kwargs: Any) -> Any:
+        """Chama /<target>/<method> no servidor e retorna o resultado."""
+        path = f"{self._base}/{target}/{method}"
+        body = json.dumps(kwargs, ensure_ascii=False).encode("utf-8")
+        instrumentation = self.instrumentation
+        started = time.perf_counter()
+
+        conn = self._get_connection()
+        try:
+            try:
+                conn.request("POST", path, body, self._headers)
+                response = conn.getresponse()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # A conexão persistente pode ter caído (ex.: servidor reiniciado). Só leituras são
+                # refeitas, uma vez, em uma nova conexão: uma escrita pode já ter sido gravada.
+                conn.close()
+                if method not in (ANALYTICS_METHODS if target == "analytics" else READ_METHODS):
+                    raise
+                conn.request("POST", path, body, self._headers)
+                response = conn.getresponse()
+            payload = json.loads(response.read() or b"{}")
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            conn.close()
+            if instrumentation is not None:
+                instrumentation.record(path, None, time.perf_counter() - started, 0, error=True)
+            raise RuntimeError(f"Erro de comunicação com o servidor {self.url}: {e}") from e
+
+        if instrumentation is not None:
+            result = payload.get("result")
+            rows = len(result) if isinstance(result, list) else 1
+            instrumentation.record(path, tuple(kwargs.values()), time.perf_counter() - started, rows, error=response.status != 200)
+        if response.status == 400:
+            raise ValueError(payload.get("error", "Requisição inválida."))
+        if response.status == 409:
+            raise DuplicateEntityError(payload.get("error", "Cadastro duplicado."))
+        if response.status != 200:
+            raise RuntimeError(payload.get("error", f"Erro {response.status} no servidor."))
+        return payload["result"]
+
+    def schema_version(self) -> int:
+        return self.call("db", "schema_version")
+
+    def get_data_versions(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(self.call("db", "get_data_versions", tables=list(tables)))
+
+    def get_changes(self, since: Optional[int] = None) -> ChangeSet:
+        """As versões são as do servidor, que registra as escritas de todas as estações."""
+        return self.call("db", "get_changes", since=since)
+
+    def insert_entity(self, table: str, nome: str, cnpj: str) -> None:
+        self.call("db", "insert_entity", table=table, nome=nome, cnpj=cnpj)
+
+    def get_entities(self, table: str) -> List[Tuple[str, str]]:
+        return [(nome, cnpj) for nome, cnpj in self.call("db", "get_entities", table=table)]
+
+    def insert_lancamento(self, data: LancamentoData) -> None:
+        self.call("db", "insert_lancamento", data=data)
+
+    def insert_lancamentos_many(self, lancamentos: Iterable[LancamentoData], batch_size: int = 5000, on_conflict: str = "skip", itens: Iterable[ItemData] = ()) -> List[BatchResult]:
+        """Envia os lançamentos em lotes de `batch_size`, uma requisição por lote, cada um com os itens das suas notas."""
+        by_key: Dict[str, List[ItemData]] = {}
+        for item in itens:
+            by_key.setdefault(item["chave_nfe"], []).append(item)
+        results: List[BatchResult] = []
+        batch: List[LancamentoData] = []
+
+        def send() -> None:
+            batch_items = [item for data in batch for item in by_key.get(data.get("chave_nfe") or "", ())]
+            results.extend(self.call(
+                "db", "insert_lancamentos_many", lancamentos=batch, batch_size=batch_size, on_conflict=on_conflict, itens=batch_items,
+            ))
+
+        for data in lancamentos:
+            batch.append(data)
+            if len(batch) >= batch_size:
+                send()
+                batch = []
+        if batch:
+            send()
+        return results
+
+    def get_lancamentos(self, limit: int = 0, start_date: str = "", end_date: str = "", fornecedor: str = "", compact: bool = False) -> List[Lancamento]:
+        """compact=True converte aqui as linhas recebidas em LancamentoRow; o servidor sempre envia objetos JSON."""
+        rows = self.call("db", "get_lancamentos", limit=limit, start_date=start_date, end_date=end_date, fornecedor=fornecedor)
+        return [LancamentoRow.from_dict(row) for row in rows] if compact else rows
+
+    def iter_lancamentos(self, start_date: str = "", end_date: str = "", fornecedor: str = "", limit: int = 0, chunk_size: int = 5000, compact: bool = False) -> Iterator[Lancamento]:
+        """Mesmo resultado de get_lancamentos, buscado em páginas de `chunk_size` por keyset."""
+        remaining = limit or float("inf")
+        before_id: Optional[int] = None
+        while remaining > 0:
+            page_size = int(min(chunk_size, remaining))
+            page = self.get_lancamentos_page(start_date, end_date, fornecedor, before_id=before_id, limit=page_size, compact=compact)
+            yield from page
+            if len(page) < page_size:
+                return
+            remaining -= len(page)
+            before_id = page[-1]['id']
+
+    def get_lancamentos_page(self, start_date: str = "", end_date: str = "", fornecedor: str = "", before_id: Optional[int] = None, after_id: Optional[int] = None, limit: int = 200, compact: bool = False) -> List[Lancamento]:
+        rows = self.call(
+            "db", "get_lancamentos_page", start_date=start_date, end_date=end_date, fornecedor=fornecedor,
+            before_id=before_id, after_id=after_id, limit=limit,
+        )
+        return [LancamentoRow.from_dict(row) for row in rows] if compact else rows
+
+    def get_lancamentos_totals(self, start_date: str = "", end_date: str = "", fornecedor: str = "") -> Dict[str, Any]:
+        return self.call("db", "get_lancamentos_totals", start_date=start_date, end_date=end_date, fornecedor=fornecedor)
+
+    def search_lancamentos(self, query: str, limit: int = 100, start_date: str = "", end_date: str = "", fornecedor: str = "") -> List[LancamentoData]:
+        return self.call("db", "search_lancamentos", query=query, limit=limit, start_date=start_date, end_date=end_date, fornecedor=fornecedor)
+
+    def aggregate_by_tipo(self, start_date: str = "", end_date: str = "", fornecedor: str = "", use_rollups: bool = True) -> Dict[str, Tuple[float, int]]:
+        result = self.call("db", "aggregate_by_tipo", start_date=start_date, end_date=end_date, fornecedor=fornecedor, use_rollups=use_rollups)
+        return {tipo: (total, quantidade) for tipo, (total, quantidade) in result.items()}
+
+    def aggregate_by_tipo_since(self, after_id: Optional[int] = None) -> Tuple[int, Dict[str, Tuple[float, int]]]:
+        last_id, result = self.call("db", "aggregate_by_tipo_since", after_id=after_id)
+        return last_id, {tipo: (total, quantidade) for tipo, (total, quantidade) in result.items()}
+
+    def aggregate_by_month(self, start_date: str = "", end_date: str = "", fornecedor: str = "", use_rollups: bool = True) -> List[Tuple[str, str, float]]:
+        result = self.call("db", "aggregate_by_month", start_date=start_date, end_date=end_date, fornecedor=fornecedor, use_rollups=use_rollups)
+        return [(mes, tipo, total) for mes, tipo, total in result]
+
+    def aggregate_by_fornecedor(self, start_date: str = "", end_date: str = "", fornecedor: str = "", use_rollups: bool = True) -> Dict[str, float]:
+        return self.call("db", "aggregate_by_fornecedor", start_date=start_date, end_date=end_date, fornecedor=fornecedor, use_rollups=use_rollups)
+
+    def delete_lancamento(self, record_id: int) -> None:
+        self.call("db", "delete_lancamento", record_id=record_id)
+
+    def insert_itens_many(self, itens: Iterable[ItemData], batch_size: int = 5000) -> int:
+        """Envia os itens em lotes de `batch_size`, uma requisição por lote."""
+        inserted = 0
+        batch: List[ItemData] = []
+        for item in itens:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                inserted += self.call("db", "insert_itens_many", itens=batch, batch_size=batch_size)
+                batch = []
+        if batch:
+            inserted += self.call("db", "insert_itens_many", itens=batch, batch_size=batch_size)
+        return inserted
+
+    def get_itens(self, chave_nfe: str = "") -> List[ItemData]:
+        return self.call("db", "get_itens", chave_nfe=chave_nfe)
+
+    def aggregate_itens(self, group_by: str = "ncm", start_date: str = "", end_date: str = "", fornecedor: str = "", limit: int = 0) -> Dict[str, ItemTotals]:
+        return self.call("db", "aggregate_itens", group_by=group_by, start_date=start_date, end_date=end_date, fornecedor=fornecedor, limit=limit)
+
+class RemoteFinancialAnalytics:
+    """Análise financeira calculada pelo servidor (SQLFinancialAnalytics), uma chamada por método."""
+
+    def __init__(self, client: RemoteDatabaseManager) -> None:
+        self.client = client
+
+    def get_financial_summary(self, lancamentos: None = None, start_date: str = "", end_date: str = "", fornecedor: str = "") -> Dict[str, Any]:
+        return self.client.call("analytics", "get_financial_summary", start_date=start_date, end_date=end_date, fornecedor=fornecedor)
+
+    def get_monthly_totals(self, lancamentos: None = None, start_date: str = "", end_date: str = "", fornecedor: str = "") -> Dict[str, Dict[str, float]]:
+        return self.client.call("analytics", "get_monthly_totals", start_date=start_date, end_date=end_date, fornecedor=fornecedor)
+
+    def get_supplier_analysis(self, lancamentos: None = None, start_date: str = "", end_date: str = "", fornecedor: str = "") -> Dict[str, float]:
+        return self.client.call("analytics", "get_supplier_analysis", start_date=start_date, end_date=end_date, fornecedor=fornecedor)
+
+    def get_ncm_analysis(self, itens: None = None, start_date: str = "", end_date: str = "", fornecedor: str = "", limit: int = 0) -> Dict[str, ItemTotals]:
+        return self.client.call("analytics", "get_ncm_analysis", start_date=start_date, end_date=end_date, fornecedor=fornecedor, limit=limit)
+
+    def get_product_analysis(self, itens: None = None, start_date: str = "", end_date: str = "", fornecedor: str = "", limit: int = 0) -> Dict[str, ItemTotals]:
+        return self.client.call("analytics", "get_product_analysis", start_date=start_date, end_date=end_date, fornecedor=fornecedor, limit=limit)
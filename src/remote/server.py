@@ -0,0 +1,250 @@
+"""
+Servidor HTTP/JSON para que várias estações compartilhem um único banco.
+
+Uso:
+  python -m src.remote.server [--host 0.0.0.0] [--port 8765] [--db data/notas.db] [--token SEGREDO]
+
+As estações apontam para o servidor com FISCALIZE_SERVER_URL=http://servidor:8765
+(e FISCALIZE_SERVER_TOKEN, se o servidor exigir um token).
+
+Cada chamada é um POST /db/<método> ou /analytics/<método> com os argumentos nomeados em um
+objeto JSON; a resposta é {"result": ...} ou {"error": "..."}. GET /health informa o estado.
+Um cadastro duplicado (DuplicateEntityError) responde 409, para o cliente levantar o mesmo erro.
+Leituras rodam em paralelo em um conjunto fixo de threads, cada uma com sua conexão SQLite
+(modo WAL). Escritas vão para uma fila e são gravadas por uma única thread: as que chegam
+enquanto um grupo está sendo gravado entram no grupo seguinte, com um só commit para todas.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.database.manager import DatabaseManager, DuplicateEntityError, DATABASE_PATH, DEFAULT_PROFILE, PRAGMA_PROFILES
+from src.analysis.analytics import SQLFinancialAnalytics
+import argparse
+import asyncio
+import functools
+import hmac
+import json
+import sys
+import time
+
+DEFAULT_PORT = 8765
+MAX_BODY_SIZE = 64 * 1024 * 1024
+# Limite de escritas gravadas em uma mesma transação.
+MAX_WRITE_BATCH = 500
+
+# Métodos expostos. Leituras podem rodar em paralelo; escritas passam pela fila do gravador.
+READ_METHODS = frozenset({
+    "get_entities", "get_lancamentos", "get_lancamentos_page", "get_lancamentos_totals",
+    "search_lancamentos", "aggregate_by_tipo", "aggregate_by_month", "aggregate_by_fornecedor",
+    "get_data_versions", "schema_version", "verify_rollups", "get_itens", "aggregate_itens",
+    "get_changes", "aggregate_by_tipo_since",
+})
+WRITE_METHODS = frozenset({
+    "insert_entity", "insert_lancamento", "insert_lancamentos_many", "delete_lancamento", "insert_itens_many",
+})
+ANALYTICS_METHODS = frozenset({
+    "get_financial_summary", "get_monthly_totals", "get_supplier_analysis", "get_ncm_analysis", "get_product_analysis",
+})
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found", 405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+class HTTPError(Exception):
+    """Erro devolvido ao cliente com o status HTTP informado."""
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+class FiscalizeServer:
+    """Atende as requisições JSON, repartindo leituras e escritas entre os executores."""
+
+    def __init__(self, db_manager: DatabaseManager, read_workers: int = 4, token: str = "", max_write_batch: int = MAX_WRITE_BATCH) -> None:
+        self.db_manager = db_manager
+        self.analytics = SQLFinancialAnalytics(db_manager)
+        self.token = token
+        self.max_write_batch = max_write_batch
+        # Cada thread do DatabaseManager mantém a própria conexão: as threads de leitura
+        # formam o conjunto de conexões de leitura e a thread de escrita tem a sua.
+        self._readers = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="leitura")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="escrita")
+        self._write_queue: "asyncio.Queue[Tuple[Callable[[], Any], asyncio.Future[Any]]]" = asyncio.Queue()
+        self._writer_task: Optional["asyncio.Task[None]"] = None
+        self.started = time.time()
+        self.requests = 0
+        self.write_batches = 0
+        self.writes = 0
+
+    async def start(self, host: str, port: int) -> asyncio.AbstractServer:
+        """Abre a porta e inicia o gravador em lote."""
+        self._writer_task = asyncio.create_task(self._write_loop())
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    def close(self) -> None:
+        """Encerra o gravador e os executores; o grupo de escritas em andamento é concluído."""
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+        self._readers.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+
+    async def _write_loop(self) -> None:
+        """Grava as escritas da fila em grupos, um commit por grupo."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._write_queue.get()]
+            while len(batch) < self.max_write_batch and not self._write_queue.empty():
+                batch.append(self._write_queue.get_nowait())
+
+            operations = [operation for operation, _ in batch]
+            try:
+                results = await loop.run_in_executor(self._writer, self.db_manager.run_write_batch, operations)
+            except Exception as e:
+                results = [(False, e)] * len(batch)
+            self.write_batches += 1
+            self.writes += len(batch)
+
+            for (_, future), (ok, value) in zip(batch, results):
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    async def call(self, target: str, method: str, kwargs: Dict[str, Any]) -> Any:
+        """Executa um método exposto com os argumentos recebidos."""
+        if target == "analytics" and method in ANALYTICS_METHODS:
+            fn = functools.partial(getattr(self.analytics, method), None, **kwargs)
+        elif target == "db" and (method in READ_METHODS or method in WRITE_METHODS):
+            # LancamentoRow viraria uma lista no JSON: o cliente faz a conversão do lado dele.
+            kwargs.pop("compact", None)
+            fn = functools.partial(getattr(self.db_manager, method), **kwargs)
+        else:
+            raise HTTPError(404, f"Método desconhecido: /{target}/{method}")
+
+        if target == "db" and method in WRITE_METHODS:
+            future: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+            await self._write_queue.put((fn, future))
+            return await future
+        return await asyncio.get_running_loop().run_in_executor(self._readers, fn)
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "db_path": str(self.db_manager.db_path),
+            "uptime": time.time() - self.started,
+            "requests": self.requests,
+            "writes": self.writes,
+            "write_batches": self.write_batches,
+        }
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Atende as requisições de uma conexão (HTTP/1.1 com keep-alive) até o cliente fechá-la."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    http_method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+
+                headers: Dict[str, str] = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY_SIZE:
+                    await self._respond(writer, 413, {"error": "Requisição muito grande."}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                self.requests += 1
+                status, payload = await self._dispatch(http_method, path, headers, body)
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, http_method: str, path: str, headers: Dict[str, str], body: bytes) -> Tuple[int, Dict[str, Any]]:
+        """Resolve a rota e converte erros em respostas JSON."""
+        try:
+            if self.token and not hmac.compare_digest(headers.get("authorization", ""), f"Bearer {self.token}"):
+                raise HTTPError(401, "Token inválido ou ausente.")
+            if path == "/health":
+                return 200, self.health()
+            if http_method != "POST":
+                raise HTTPError(405, "Use POST.")
+
+            parts = path.strip("/").split("/")
+            if len(parts) != 2:
+                raise HTTPError(404, f"Rota desconhecida: {path}")
+            try:
+                kwargs = json.loads(body) if body else {}
+            except ValueError:
+                raise HTTPError(400, "Corpo da requisição não é um JSON válido.")
+            if not isinstance(kwargs, dict):
+                raise HTTPError(400, "Os argumentos devem ser um objeto JSON.")
+
+            return 200, {"result": await self.call(parts[0], parts[1], kwargs)}
+        except HTTPError as e:
+            return e.status, {"error": str(e)}
+        except (TypeError, ValueError, KeyError) as e:
+            return 400, {"error": f"Argumentos inválidos: {e}"}
+        except DuplicateEntityError as e:
+            return 409, {"error": str(e)}
+        except RuntimeError as e:
+            return 500, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": f"Erro inesperado: {e!r}"}
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any], keep_alive: bool) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+async def serve(db_manager: DatabaseManager, host: str, port: int, read_workers: int = 4, token: str = "", ready: Optional[Callable[[int], None]] = None) -> None:
+    """Executa o servidor até ser cancelado. `ready` recebe a porta aberta (útil com port=0)."""
+    server = FiscalizeServer(db_manager, read_workers, token)
+    tcp_server = await server.start(host, port)
+    bound_port = tcp_server.sockets[0].getsockname()[1]
+    print(f"Servidor em http://{host}:{bound_port} (banco: {db_manager.db_path})", file=sys.stderr)
+    if ready:
+        ready(bound_port)
+    try:
+        async with tcp_server:
+            await tcp_server.serve_forever()
+    finally:
+        server.close()
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Servidor HTTP/JSON do banco do FiscalizeCórtex.")
+    parser.add_argument("--host", default="127.0.0.1", help="Use 0.0.0.0 para aceitar outras estações.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--db", type=Path, default=DATABASE_PATH, help="Caminho do banco SQLite.")
+    parser.add_argument("--profile", choices=list(PRAGMA_PROFILES), default=DEFAULT_PROFILE)
+    parser.add_argument("--read-workers", type=int, default=4, help="Threads (e conexões) de leitura.")
+    parser.add_argument("--token", default="", help="Exige 'Authorization: Bearer <token>' em todas as requisições.")
+    args = parser.parse_args(argv)
+
+    db_manager = DatabaseManager(profile=args.profile, db_path=args.db)
+    try:
+        asyncio.run(serve(db_manager, args.host, args.port, args.read_workers, args.token))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        db_manager.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+from concurrent.futures import ProcessPoolExecutor, Future, FIRST_COMPLETED, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple, TypedDict
+from src.database.manager import DatabaseManager, ItemData, LancamentoData
+from src.services.xml_importer import XMLImporter, XMLImportError
+import csv
+import os
+import time
+
+class ImportProgress(TypedDict):
+    """Andamento de uma importação em lote."""
+    files_done: int
+    files_total: int
+    files_failed: int
+    elapsed: float
+    files_per_second: float
+
+class ImportReport(TypedDict):
+    """Resultado final de uma importação em lote."""
+    files_total: int
+    files_ok: int
+    files_failed: int
+    inserted: int
+    skipped: int
+    failed: int
+    items: int
+    elapsed: float
+    files_per_second: float
+    error_report: str
+
+# Resultado do parsing de um arquivo: (caminho, dados ou None, mensagem de erro, itens)
+ParseResult = Tuple[str, Optional[Dict[str, Any]], str, List[Dict[str, Any]]]
+
+# Itens acumulados antes de uma gravação, mesmo que o lote de notas não esteja completo.
+ITEM_BATCH_SIZE = 50000
+
+_worker_importer: Optional[XMLImporter] = None
+_worker_items = False
+
+def _init_worker(parser_mode: str = "xpath", items: bool = False) -> None:
+    """Cria um XMLImporter por processo, reaproveitado por todos os arquivos do worker."""
+    global _worker_importer, _worker_items
+    _worker_importer = XMLImporter(parser_mode)
+    _worker_items = items
+
+def _parse_chunk(paths: List[str]) -> List[ParseResult]:
+    """Faz o parsing de um bloco de arquivos dentro de um processo do pool."""
+    importer = _worker_importer or XMLImporter()
+    results: List[ParseResult] = []
+    for path in paths:
+        try:
+            if _worker_items:
+                data, itens = importer.parse_xml_with_items(path)
+                results.append((path, data, "", itens))
+            else:
+                results.append((path, importer.parse_xml(path), "", []))
+        except XMLImportError as e:
+            results.append((path, None, str(e), []))
+    return results
+
+def find_xml_files(directory: str, recursive: bool = True) -> List[str]:
+    """Lista os arquivos .xml de um diretório, em ordem estável."""
+    base = Path(directory)
+    if not base.is_dir():
+        raise NotADirectoryError(f"Diretório não encontrado: {directory}")
+    pattern = "**/*" if recursive else "*"
+    return sorted(str(p) for p in base.glob(pattern) if p.is_file() and p.suffix.lower() == ".xml")
+
+class BatchXMLImporter:
+    """
+    Importa muitos arquivos XML de NF-e de uma vez.
+    O parsing roda em um ProcessPoolExecutor e os dados são gravados no banco
+    em lotes limitados, sem acumular o diretório inteiro em memória.
+    """
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        max_workers: Optional[int] = None,
+        chunksize: int = 64,
+        batch_size: int = 2000,
+        on_conflict: str = "skip",
+        parser_mode: str = "xpath",
+        progress_callback: Optional[Callable[[ImportProgress], None]] = None,
+        progress_interval: float = 1.0,
+        items: bool = False,
+    ) -> None:
+        """
+        max_workers=0 faz o parsing no próprio processo (útil em máquinas de um núcleo).
+        chunksize é a quantidade de arquivos enviada a cada tarefa do pool.
+        parser_mode é um dos modos de XMLImporter; "iterparse" limita a memória em notas com muitos
+        itens, mas é mais lento e só compensa em arquivos muito grandes.
+        items=True também grava os itens (det/prod) em lancamento_itens, lidos na mesma passada por arquivo.
+        """
+        self.db_manager = db_manager
+        self.max_workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+        self.chunksize = max(1, chunksize)
+        self.batch_size = max(1, batch_size)
+        self.on_conflict = on_conflict
+        self.parser_mode = parser_mode
+        self.progress_callback = progress_callback
+        self.progress_interval = progress_interval
+        self.items = items
+
+    def import_directory(self, directory: str, recursive: bool = True, error_report_path: Optional[str] = None) -> ImportReport:
+        """Importa todos os XMLs de um diretório."""
+        return self.import_files(find_xml_files(directory, recursive), error_report_path)
+
+    def import_files(self, files: Iterable[str], error_report_path: Optional[str] = None) -> ImportReport:
+        """
+        Importa uma lista de arquivos XML.
+        Arquivos com erro são registrados em um relatório CSV (arquivo;erro), criado apenas se houver falhas.
+        """
+        paths = [str(f) for f in files]
+        report_path = Path(error_report_path) if error_report_path else (
+            self.db_manager.db_path.parent / f"erros_importacao_{datetime.now():%Y%m%d_%H%M%S}.csv"
+        )
+        report: ImportReport = {
+            "files_total": len(paths), "files_ok": 0, "files_failed": 0,
+            "inserted": 0, "skipped": 0, "failed": 0, "items": 0,
+            "elapsed": 0.0, "files_per_second": 0.0, "error_report": "",
+        }
+        report_file: Optional[TextIO] = None
+        report_writer: Any = None
+        buffer: List[LancamentoData] = []
+        item_buffer: List[ItemData] = []
+        started = last_progress = time.perf_counter()
+
+        try:
+            for path, data, error, itens in self._parse_all(paths):
+                if data is not None:
+                    report["files_ok"] += 1
+                    buffer.append(data)  # type: ignore[arg-type]
+                    item_buffer.extend(itens)  # type: ignore[arg-type]
+                    if len(buffer) >= self.batch_size or len(item_buffer) >= ITEM_BATCH_SIZE:
+                        self._flush(buffer, item_buffer, report)
+                else:
+                    report["files_failed"] += 1
+                    if report_writer is None:
+                        report_file = open(report_path, "w", newline="", encoding="utf-8")
+                        report_writer = csv.writer(report_file, delimiter=";")
+                        report_writer.writerow(["arquivo", "erro"])
+                        report["error_report"] = str(report_path)
+                    report_writer.writerow([path, error])
+
+                now = time.perf_counter()
+                if self.progress_callback and now - last_progress >= self.progress_interval:
+                    last_progress = now
+                    self.progress_callback(self._progress(report, now - started))
+
+            self._flush(buffer, item_buffer, report)
+        finally:
+            if report_file is not None:
+                report_file.close()
+
+        report["elapsed"] = time.perf_counter() - started
+        report["files_per_second"] = len(paths) / report["elapsed"] if report["elapsed"] else 0.0
+        if self.progress_callback:
+            self.progress_callback(self._progress(report, report["elapsed"]))
+        return report
+
+    def _parse_all(self, paths: List[str]) -> Iterator[ParseResult]:
+        """Gera os resultados de parsing à medida que os blocos são concluídos."""
+        chunks = [paths[i:i + self.chunksize] for i in range(0, len(paths), self.chunksize)]
+
+        if self.max_workers <= 0:
+            _init_worker(self.parser_mode, self.items)
+            for chunk in chunks:
+                yield from _parse_chunk(chunk)
+            return
+
+        # Limita os blocos em andamento para que os resultados não se acumulem
+        # mais rápido do que o banco consegue gravá-los.
+        max_pending = self.max_workers * 2
+        pending: Set[Future[List[ParseResult]]] = set()
+        next_chunk = 0
+
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker, initargs=(self.parser_mode, self.items)) as executor:
+            while next_chunk < len(chunks) or pending:
+                while next_chunk < len(chunks) and len(pending) < max_pending:
+                    pending.add(executor.submit(_parse_chunk, chunks[next_chunk]))
+                    next_chunk += 1
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+
+    def _flush(self, buffer: List[LancamentoData], item_buffer: List[ItemData], report: ImportReport) -> None:
+        """
+        Grava o lote acumulado no banco e atualiza as contagens. Os itens vão na transação das
+        suas notas, e só os das notas gravadas: uma nota repetida ignorada não regrava os itens.
+        """
+        if buffer:
+            results = self.db_manager.insert_lancamentos_many(
+                buffer, batch_size=self.batch_size, on_conflict=self.on_conflict, itens=item_buffer,
+            )
+            for result in results:
+                report["inserted"] += result["inserted"]
+                report["skipped"] += result["skipped"]
+                report["failed"] += result["failed"]
+                report["items"] += result["items"]
+        buffer.clear()
+        item_buffer.clear()
+
+    @staticmethod
+    def _progress(report: ImportReport, elapsed: float) -> ImportProgress:
+        done = report["files_ok"] + report["files_failed"]
+        return {
+            "files_done": done,
+            "files_total": report["files_total"],
+            "files_failed": report["files_failed"],
+            "elapsed": elapsed,
+            "files_per_second": done / elapsed if elapsed else 0.0,
+        }
@@ -0,0 +1,132 @@
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, TextIO, Tuple, TypedDict
+from src.database.manager import DatabaseManager, LancamentoData, LANCAMENTO_COLUMNS
+import csv
+import gzip
+import json
+import os
+import time
+
+EXPORT_FORMATS = ("csv", "jsonl")
+EXPORT_COLUMNS = ("id",) + LANCAMENTO_COLUMNS
+
+class ExportProgress(TypedDict):
+    """Andamento de uma exportação."""
+    rows: int
+    elapsed: float
+
+class ExportReport(TypedDict):
+    """Resultado de uma exportação."""
+    path: str
+    format: str
+    compressed: bool
+    rows: int
+    elapsed: float
+    rows_per_second: float
+
+def write_csv(rows: Iterable[LancamentoData], out: TextIO, on_row: Optional[Callable[[], None]] = None) -> int:
+    """Grava os lançamentos em CSV (delimitador ';'), um por linha. Retorna a quantidade gravada."""
+    writer = csv.writer(out, delimiter=";")
+    writer.writerow(EXPORT_COLUMNS)
+    count = 0
+    for row in rows:
+        writer.writerow([row[column] for column in EXPORT_COLUMNS])  # type: ignore[literal-required]
+        count += 1
+        if on_row:
+            on_row()
+    return count
+
+def write_jsonl(rows: Iterable[LancamentoData], out: TextIO, on_row: Optional[Callable[[], None]] = None) -> int:
+    """Grava os lançamentos em JSON Lines, um objeto por linha. Retorna a quantidade gravada."""
+    count = 0
+    for row in rows:
+        out.write(json.dumps(row, ensure_ascii=False))
+        out.write("\n")
+        count += 1
+        if on_row:
+            on_row()
+    return count
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl}
+
+def detect_format(path: str) -> Tuple[str, bool]:
+    """Deduz (formato, compactado) pela extensão: .csv, .jsonl, .csv.gz ou .jsonl.gz."""
+    suffixes = [s.lower() for s in Path(path).suffixes]
+    compressed = bool(suffixes) and suffixes[-1] == ".gz"
+    if compressed:
+        suffixes = suffixes[:-1]
+    fmt = suffixes[-1].lstrip(".") if suffixes else ""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportação não suportado: {path}. Use .csv, .jsonl ou a versão .gz.")
+    return fmt, compressed
+
+class LancamentoExporter:
+    """
+    Exporta lançamentos para CSV ou JSONL, opcionalmente compactados com gzip.
+    As linhas são lidas do banco por DatabaseManager.iter_lancamentos e gravadas
+    à medida que chegam, então a memória usada é constante.
+    O arquivo é gravado com um nome temporário e renomeado ao final, de modo que
+    uma exportação interrompida não deixa um arquivo incompleto no destino.
+    """
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        chunk_size: int = 5000,
+        progress_callback: Optional[Callable[[ExportProgress], None]] = None,
+        progress_interval: float = 1.0,
+    ) -> None:
+        self.db_manager = db_manager
+        self.chunk_size = chunk_size
+        self.progress_callback = progress_callback
+        self.progress_interval = progress_interval
+
+    def export(self, path: str, start_date: str = "", end_date: str = "", fornecedor: str = "", fmt: Optional[str] = None, compress: Optional[bool] = None) -> ExportReport:
+        """
+        Exporta os lançamentos filtrados para `path`.
+        O formato e a compactação são deduzidos da extensão quando não informados.
+        """
+        if fmt is None or compress is None:
+            detected_fmt, detected_compress = detect_format(path)
+            fmt = fmt or detected_fmt
+            compress = detected_compress if compress is None else compress
+        if fmt not in WRITERS:
+            raise ValueError(f"Formato de exportação não suportado: {fmt}. Opções: {', '.join(EXPORT_FORMATS)}")
+
+        rows = self.db_manager.iter_lancamentos(start_date, end_date, fornecedor, chunk_size=self.chunk_size)
+        temp_path = f"{path}.tmp"
+        started = last_progress = time.perf_counter()
+        done = 0
+
+        def on_row() -> None:
+            nonlocal done, last_progress
+            done += 1
+            if self.progress_callback and done % 1000 == 0:
+                now = time.perf_counter()
+                if now - last_progress >= self.progress_interval:
+                    last_progress = now
+                    self.progress_callback({"rows": done, "elapsed": now - started})
+
+        try:
+            with self._open(temp_path, compress) as out:
+                count = WRITERS[fmt](rows, out, on_row)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        elapsed = time.perf_counter() - started
+        if self.progress_callback:
+            self.progress_callback({"rows": count, "elapsed": elapsed})
+        return {
+            "path": str(path), "format": fmt, "compressed": compress, "rows": count,
+            "elapsed": elapsed, "rows_per_second": count / elapsed if elapsed else 0.0,
+        }
+
+    @staticmethod
+    def _open(path: str, compress: bool) -> Any:
+        if compress:
+            # Nível 6: quase a mesma compressão do 9, bem mais rápido em arquivos grandes.
+            return gzip.open(path, "wt", compresslevel=6, newline="", encoding="utf-8")
+        return open(path, "w", newline="", encoding="utf-8")
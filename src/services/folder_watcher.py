@@ -0,0 +1,232 @@
+from collections import deque
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple, TypedDict
+from src.database.manager import DatabaseManager, ImportedFile, ItemData, LancamentoData
+from src.services.xml_importer import XMLImporter, XMLImportError
+import hashlib
+import os
+import threading
+import time
+
+class WatchBatch(TypedDict):
+    """Resultado de um grupo de arquivos gravado pela pasta monitorada."""
+    files: int
+    inserted: int
+    skipped: int
+    failed: int
+    errors: int
+    unchanged: int
+    backlog: int
+    latency: float  # segundos entre a última gravação do arquivo mais antigo do grupo e o commit
+
+def file_hash(path: str) -> str:
+    """SHA-256 do conteúdo do arquivo."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class FolderWatcher:
+    """
+    Monitora um diretório e importa os XMLs de NF-e novos ou alterados.
+
+    A cada `poll_interval` segundos, relista apenas os diretórios cujo mtime mudou (arquivos
+    criados, removidos ou renomeados); uma varredura completa a cada `full_scan_interval`
+    segundos encontra arquivos reescritos no lugar. Um arquivo só é lido quando não é
+    modificado há `settle_time` segundos, para não pegar um XML ainda sendo gravado.
+
+    O estado de cada arquivo processado (tamanho, mtime e hash) fica em arquivos_importados,
+    gravado na mesma transação dos lançamentos: após reiniciar, nada é lido de novo, e um
+    arquivo com mtime alterado mas conteúdo igual não é reimportado.
+
+    Os arquivos prontos entram em uma fila limitada a `max_backlog`; com a fila cheia, a
+    varredura é suspensa até que os grupos pendentes sejam gravados, cada um em sua transação
+    de até `batch_size` arquivos.
+    """
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        directory: str,
+        recursive: bool = True,
+        parser_mode: str = "xpath",
+        on_conflict: str = "replace",
+        poll_interval: float = 0.25,
+        settle_time: float = 0.3,
+        batch_size: int = 50,
+        max_backlog: int = 1000,
+        full_scan_interval: float = 30.0,
+        on_batch: Optional[Callable[[WatchBatch], None]] = None,
+        items: bool = False,
+    ) -> None:
+        """
+        on_conflict="replace" substitui o lançamento de mesma chave NF-e, pois um XML reenviado
+        pelo ERP é uma versão corrigida da nota. items=True também grava os itens (det/prod).
+        """
+        if not Path(directory).is_dir():
+            raise NotADirectoryError(f"Diretório não encontrado: {directory}")
+        self.db_manager = db_manager
+        # Caminho absoluto: o controle precisa casar mesmo que o diretório de trabalho mude entre execuções.
+        self.directory = os.path.abspath(directory)
+        self.recursive = recursive
+        self.importer = XMLImporter(parser_mode)
+        self.on_conflict = on_conflict
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time
+        self.batch_size = max(1, batch_size)
+        self.max_backlog = max(self.batch_size, max_backlog)
+        self.full_scan_interval = full_scan_interval
+        self.on_batch = on_batch
+        self.items = items
+
+        self._known: Dict[str, Tuple[int, int, str]] = db_manager.get_imported_files(self.directory)
+        self._dir_mtimes: Dict[str, int] = {}
+        self._subdirs: Dict[str, List[str]] = {}
+        self._settling: Dict[str, Tuple[int, int]] = {}
+        self._queue: Deque[str] = deque()
+        self._queued: Set[str] = set()
+        self._last_full_scan = 0.0
+
+    def run(self, stop: Optional[threading.Event] = None) -> None:
+        """Monitora o diretório até `stop` ser sinalizado (ou até Ctrl+C, sem `stop`)."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            started = time.monotonic()
+            self.poll()
+            stop.wait(max(0.0, self.poll_interval - (time.monotonic() - started)))
+
+    def poll(self) -> int:
+        """Faz uma varredura e grava os arquivos prontos. Retorna a quantidade de arquivos processados."""
+        self.scan()
+        processed = 0
+        while self._queue:
+            processed += self._process_batch()
+        return processed
+
+    @property
+    def backlog(self) -> int:
+        """Arquivos prontos aguardando gravação."""
+        return len(self._queue)
+
+    def scan(self) -> None:
+        """Procura arquivos novos ou alterados e enfileira os que já estão estáveis."""
+        if len(self._queue) >= self.max_backlog:
+            return
+        now = time.monotonic()
+        full = now - self._last_full_scan >= self.full_scan_interval
+        if full:
+            self._last_full_scan = now
+
+        pending = [self.directory]
+        while pending:
+            directory = pending.pop()
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                self._forget_dir(directory)
+                continue
+            if full or self._dir_mtimes.get(directory) != mtime:
+                if not self._list_dir(directory, mtime):
+                    # Fila cheia: a próxima varredura precisa relistar tudo o que ficou para trás.
+                    self._last_full_scan = 0.0
+                    return
+            pending.extend(self._subdirs.get(directory, ()))
+
+        for path in list(self._settling):
+            try:
+                self._check_file(path, os.stat(path))
+            except OSError:
+                self._settling.pop(path, None)
+
+    def _list_dir(self, directory: str, mtime: int) -> bool:
+        """Lista um diretório. Retorna False se a fila encheu antes do fim."""
+        subdirs: List[str] = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if self.recursive:
+                            subdirs.append(entry.path)
+                    elif entry.name.lower().endswith(".xml") and not entry.name.startswith("."):
+                        self._check_file(entry.path, entry.stat())
+                        if len(self._queue) >= self.max_backlog:
+                            return False
+        except OSError:
+            self._forget_dir(directory)
+            return True
+        self._subdirs[directory] = subdirs
+        self._dir_mtimes[directory] = mtime
+        return True
+
+    def _forget_dir(self, directory: str) -> None:
+        self._dir_mtimes.pop(directory, None)
+        for subdir in self._subdirs.pop(directory, ()):
+            self._forget_dir(subdir)
+
+    def _check_file(self, path: str, stat: os.stat_result) -> None:
+        """Enfileira o arquivo se ele mudou desde o último processamento e não está mais sendo gravado."""
+        if path in self._queued:
+            return
+        known = self._known.get(path)
+        if known is not None and known[:2] == (stat.st_size, stat.st_mtime_ns):
+            self._settling.pop(path, None)
+            return
+        if time.time() - stat.st_mtime < self.settle_time:
+            self._settling[path] = (stat.st_size, stat.st_mtime_ns)
+            return
+        self._settling.pop(path, None)
+        self._queue.append(path)
+        self._queued.add(path)
+
+    def _process_batch(self) -> int:
+        """Lê até `batch_size` arquivos da fila e grava lançamentos e controle em uma transação."""
+        files: List[ImportedFile] = []
+        lancamentos: List[LancamentoData] = []
+        itens: List[ItemData] = []
+        errors = unchanged = 0
+        oldest_mtime = time.time()
+
+        while self._queue and len(files) < self.batch_size:
+            path = self._queue.popleft()
+            self._queued.discard(path)
+            try:
+                stat = os.stat(path)
+                digest = file_hash(path)
+            except OSError:
+                continue  # removido antes de ser lido
+
+            known = self._known.get(path)
+            entry: ImportedFile = {
+                "caminho": path, "tamanho": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                "hash": digest, "status": "ok", "erro": "",
+            }
+            if known is not None and known[2] == digest:
+                unchanged += 1  # apenas o mtime mudou; o controle é atualizado sem reimportar
+            else:
+                try:
+                    if self.items:
+                        data, file_items = self.importer.parse_xml_with_items(path)
+                        itens.extend(file_items)  # type: ignore[arg-type]
+                    else:
+                        data = self.importer.parse_xml(path)
+                    lancamentos.append(data)  # type: ignore[arg-type]
+                except XMLImportError as e:
+                    entry["status"], entry["erro"] = "erro", str(e)
+                    errors += 1
+            files.append(entry)
+            oldest_mtime = min(oldest_mtime, stat.st_mtime)
+
+        if not files:
+            return 0
+        result = self.db_manager.record_imported_files(files, lancamentos, self.on_conflict, itens)
+        for entry in files:
+            self._known[entry["caminho"]] = (entry["tamanho"], entry["mtime_ns"], entry["hash"])
+
+        if self.on_batch:
+            self.on_batch({
+                "files": len(files), "inserted": result["inserted"], "skipped": result["skipped"],
+                "failed": result["failed"], "errors": errors, "unchanged": unchanged,
+                "backlog": len(self._queue), "latency": max(0.0, time.time() - oldest_mtime),
+            })
+        return len(files)
@@ -1,83 +1,350 @@
 from lxml import etree
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
+import logging
 import os
 import re
 
+logger = logging.getLogger(__name__)
+
+class XMLImportError(Exception):
+    """Erro ao ler ou interpretar um arquivo XML de NF-e."""
+
+NFE_NAMESPACE = "http://www.portalfiscal.inf.br/nfe"
+
+# Modos de parsing disponíveis:
+# "padrao"    - árvore completa com buscas .//{ns} (implementação de referência);
+# "xpath"     - árvore completa com parser reutilizado e XPath pré-compilados;
+# "iterparse" - leitura incremental que para após o ICMSTot e descarta os itens (det) já lidos.
+#               Cerca de metade da velocidade do "padrao" em notas comuns: troca velocidade por
+#               memória e só compensa em arquivos muito grandes (milhares de itens). Nenhum padrão
+#               do sistema o escolhe; precisa ser pedido explicitamente.
+PARSER_MODES = ("padrao", "xpath", "iterparse")
+
+def _number(value: Optional[str]) -> float:
+    """Converte um valor numérico da NF-e; ausente ou inválido vira 0."""
+    try:
+        return float(value) if value else 0.0
+    except ValueError:
+        return 0.0
+
 class XMLImporter:
     """
     Serviço responsável por importar e processar arquivos XML de Nota Fiscal.
+    `mode` é um dos PARSER_MODES; "iterparse" é mais lento e serve apenas a arquivos muito grandes.
     """
 
-    def __init__(self):
+    def __init__(self, mode: str = "padrao"):
+        if mode not in PARSER_MODES:
+            raise ValueError(f"Modo de parsing inválido: {mode}. Opções: {', '.join(PARSER_MODES)}")
+        self.mode = mode
+
         # Namespace padrão das notas fiscais eletrônicas (NF-e)
-        self.namespace = "{http://www.portalfiscal.inf.br/nfe}"
+        self.namespace = "{%s}" % NFE_NAMESPACE
+
+        # Objetos compilados uma única vez por importador e reutilizados a cada arquivo.
+        # Cada campo tem um caminho direto (layout padrão da NF-e) e uma busca por
+        # descendentes equivalente à do modo padrão, usada só quando o caminho direto falha.
+        self._parser = etree.XMLParser(remove_blank_text=True, huge_tree=True)
+        ns = {"nfe": NFE_NAMESPACE}
+        paths = {
+            "infNFe": ("/nfe:nfeProc/nfe:NFe/nfe:infNFe | /nfe:NFe/nfe:infNFe", ".//nfe:infNFe"),
+            "ide": ("nfe:ide", ".//nfe:ide"),
+            "emit": ("nfe:emit", ".//nfe:emit"),
+            "dest": ("nfe:dest", ".//nfe:dest"),
+            "ICMSTot": ("nfe:total/nfe:ICMSTot", ".//nfe:ICMSTot"),
+            "dhEmi": ("nfe:dhEmi", ".//nfe:dhEmi"),
+            "nNF": ("nfe:nNF", ".//nfe:nNF"),
+            "vNF": ("nfe:vNF", ".//nfe:vNF"),
+            "xNome": ("nfe:xNome", ".//nfe:xNome"),
+            "CNPJ": ("nfe:CNPJ", ".//nfe:CNPJ"),
+        }
+        self._xpaths = {
+            name: (etree.XPath(direct, namespaces=ns), etree.XPath(descendant, namespaces=ns))
+            for name, (direct, descendant) in paths.items()
+        }
+        self._iter_tags = tuple(self.namespace + tag for tag in ("ide", "emit", "dest", "det", "ICMSTot"))
+        # Impostos destacados em det/imposto: grupo do imposto -> coluna, e coluna -> campo do valor.
+        taxes = {"ICMS": "valor_icms", "IPI": "valor_ipi", "PIS": "valor_pis", "COFINS": "valor_cofins"}
+        self._item_taxes = {self.namespace + group: column for group, column in taxes.items()}
+        self._tax_values = {column: f"{self.namespace}v{group}" for group, column in taxes.items()}
 
     def import_xml(self, file_path: str) -> Optional[Dict[str, Any]]:
         """
         Lê e extrai dados de um arquivo XML de NF-e.
         Retorna um dicionário com os dados extraídos ou None em caso de erro.
         """
-        if not Path(file_path).is_file():
-            print(f"Erro: Arquivo não encontrado em {file_path}")
+        try:
+            return self.parse_xml(file_path)
+        except XMLImportError as e:
+            logger.error("%s: %s", file_path, e)
             return None
 
+    def parse_xml(self, file_path: str) -> Dict[str, Any]:
+        """
+        Lê e extrai dados de um arquivo XML de NF-e.
+        Lança XMLImportError descrevendo o motivo quando o arquivo não pode ser importado.
+        """
+        if not Path(file_path).is_file():
+            raise XMLImportError(f"Arquivo não encontrado em {file_path}")
+
         try:
-            tree = etree.parse(file_path)
-            root = tree.getroot()
-
-            # Extração dos dados principais do cabeçalho da NF-e
-            ide = root.find(f'.//{self.namespace}ide')
-            emit = root.find(f'.//{self.namespace}emit')
-            dest = root.find(f'.//{self.namespace}dest')
-            v_total = root.find(f'.//{self.namespace}ICMSTot')
-            
-            if not all([ide, emit, dest, v_total]):
-                print("Erro: Estrutura XML incompleta. Elementos essenciais não encontrados.")
-                return None
-            
-            # Formata a data para AAAA-MM-DD
-            data_emissao_str = ide.find(f'.//{self.namespace}dhEmi').text
-            data_emissao = datetime.fromisoformat(data_emissao_str).strftime('%Y-%m-%d')
-            
-            # Extrai a chave de acesso do atributo 'Id' do elemento 'infNFe'
-            chave_nfe = root.find(f'.//{self.namespace}infNFe').attrib['Id'].replace("NFe", "")
-
-            # Converte o valor para float
-            try:
-                valor_total = float(v_total.find(f'.//{self.namespace}vNF').text)
-            except (ValueError, AttributeError):
-                valor_total = 0.0
-
-            # Extração dos dados do fornecedor (emitente)
-            fornecedor_nome = emit.find(f'.//{self.namespace}xNome').text
-            fornecedor_cnpj = emit.find(f'.//{self.namespace}CNPJ').text
-
-            # Extração dos dados da loja (destinatário)
-            loja_nome = dest.find(f'.//{self.namespace}xNome').text
-            loja_cnpj = dest.find(f'.//{self.namespace}CNPJ').text
-            
-            # Documento e NFE são geralmente o mesmo número da nota
-            nfe_number = ide.find(f'.//{self.namespace}nNF').text
-
-            # Criação do dicionário de dados
-            return {
-                "chave_nfe": chave_nfe,
-                "nfe": nfe_number,
-                "documento": nfe_number,
-                "data_lancamento": data_emissao,
-                "valor": valor_total,
-                "fornecedor": fornecedor_nome,
-                "cnpj_forn": fornecedor_cnpj,
-                "loja": loja_nome,
-                "cnpj_loja": loja_cnpj,
-                "tipo": "Entrada",  # Presumimos que NF-e importada é de entrada
-            }
-        
+            if self.mode == "iterparse":
+                return self._parse_iterparse(file_path)
+            if self.mode == "xpath":
+                return self._parse_xpath(file_path)
+            return self._parse_tree(file_path)
+        except XMLImportError:
+            raise
         except etree.XMLSyntaxError as e:
-            print(f"Erro de sintaxe no XML: {e}")
-            return None
+            raise XMLImportError(f"Erro de sintaxe no XML: {e}") from e
+        except Exception as e:
+            raise XMLImportError(f"Erro inesperado ao processar o XML: {e}") from e
+
+    def parse_xml_with_items(self, file_path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Extrai, em uma única leitura, o cabeçalho (como parse_xml) e os itens (det/prod) da nota,
+        no formato de ItemData. Segue o modo do importador: só no modo iterparse a leitura é
+        incremental, com cada det descartado logo após ser lido.
+        """
+        if not Path(file_path).is_file():
+            raise XMLImportError(f"Arquivo não encontrado em {file_path}")
+        items: List[Dict[str, Any]] = []
+        try:
+            if self.mode == "iterparse":
+                return self._parse_iterparse(file_path, items), items
+            if self.mode == "xpath":
+                return self._parse_xpath(file_path, items), items
+            return self._parse_tree(file_path, items), items
+        except XMLImportError:
+            raise
+        except etree.XMLSyntaxError as e:
+            raise XMLImportError(f"Erro de sintaxe no XML: {e}") from e
         except Exception as e:
-            print(f"Erro inesperado ao processar o XML: {e}")
-            return None
\ No newline at end of file
+            raise XMLImportError(f"Erro inesperado ao processar o XML: {e}") from e
+
+    def iter_items(self, file_path: str) -> Iterator[Dict[str, Any]]:
+        """
+        Gera os itens (det/prod) da nota um a um, sem carregar a árvore: cada det é
+        descartado logo após ser lido, então a memória não cresce com a quantidade de itens.
+        """
+        if not Path(file_path).is_file():
+            raise XMLImportError(f"Arquivo não encontrado em {file_path}")
+        inf_tag, det_tag = self.namespace + "infNFe", self.namespace + "det"
+        chave = ""
+        try:
+            context = etree.iterparse(
+                file_path, events=("start", "end"), tag=(inf_tag, det_tag),
+                remove_blank_text=True, huge_tree=True,
+            )
+            for event, elem in context:
+                if elem.tag == inf_tag:
+                    if event == "start":
+                        chave = elem.get('Id', '').replace("NFe", "")
+                    continue
+                if event == "end":
+                    item = self._extract_item(elem, chave)
+                    self._discard_item(elem)
+                    yield item
+        except etree.XMLSyntaxError as e:
+            raise XMLImportError(f"Erro de sintaxe no XML: {e}") from e
+
+    def _parse_tree(self, file_path: str, items: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Implementação de referência: carrega a árvore inteira e busca cada campo.
+        Com `items`, os dados de cada det são acrescentados à lista.
+        """
+        tree = etree.parse(file_path)
+        root = tree.getroot()
+
+        # Extração dos dados principais do cabeçalho da NF-e
+        ide = root.find(f'.//{self.namespace}ide')
+        emit = root.find(f'.//{self.namespace}emit')
+        dest = root.find(f'.//{self.namespace}dest')
+        v_total = root.find(f'.//{self.namespace}ICMSTot')
+        self._check_structure(ide, emit, dest, v_total)
+        
+        # Extrai a chave de acesso do atributo 'Id' do elemento 'infNFe'
+        chave_attr = root.find(f'.//{self.namespace}infNFe').attrib['Id']
+        if items is not None:
+            chave = chave_attr.replace("NFe", "")
+            items.extend(self._extract_item(det, chave) for det in root.iter(f'{self.namespace}det'))
+
+        return self._build_record(
+            chave_attr=chave_attr,
+            dh_emi=ide.find(f'.//{self.namespace}dhEmi').text,
+            n_nf=ide.find(f'.//{self.namespace}nNF').text,
+            v_nf=v_total.find(f'.//{self.namespace}vNF'),
+            fornecedor_nome=emit.find(f'.//{self.namespace}xNome').text,
+            fornecedor_cnpj=emit.find(f'.//{self.namespace}CNPJ').text,
+            loja_nome=dest.find(f'.//{self.namespace}xNome').text,
+            loja_cnpj=dest.find(f'.//{self.namespace}CNPJ').text,
+        )
+
+    def _parse_xpath(self, file_path: str, items: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Carrega a árvore com o parser reutilizado e extrai os campos com XPath pré-compilados.
+        Com `items`, os dados de cada det (filhos do infNFe) são acrescentados à lista.
+        """
+        root = etree.parse(file_path, self._parser).getroot()
+        inf_nfe = self._find("infNFe", root)
+        ide, emit, dest, v_total = (
+            self._find(name, inf_nfe, root) for name in ("ide", "emit", "dest", "ICMSTot")
+        )
+        self._check_structure(ide, emit, dest, v_total)
+        if items is not None:
+            chave = inf_nfe.attrib['Id'].replace("NFe", "")
+            items.extend(self._extract_item(det, chave) for det in inf_nfe.iterchildren(f'{self.namespace}det'))
+        return self._extract(inf_nfe.attrib['Id'], ide, emit, dest, v_total)
+
+    def _parse_iterparse(self, file_path: str, items: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Lê o arquivo de forma incremental, recebendo eventos apenas das tags de interesse.
+        Os itens (det) são descartados assim que lidos e a leitura termina após o ICMSTot,
+        de modo que o consumo de memória não depende da quantidade de itens da nota.
+        Com `items`, os dados de cada det são acrescentados à lista antes do descarte.
+        """
+        found: Dict[str, Any] = {}
+        chave_attr: Optional[str] = None
+        headers = {self.namespace + tag: tag for tag in ("ide", "emit", "dest", "ICMSTot")}
+        det_tag = self.namespace + "det"
+
+        context = etree.iterparse(
+            file_path, events=("end",), tag=self._iter_tags,
+            remove_blank_text=True, huge_tree=True,
+        )
+        for _, elem in context:
+            if elem.tag == det_tag:
+                if items is not None:
+                    items.append(self._extract_item(elem, (chave_attr or "").replace("NFe", "")))
+                self._discard_item(elem)
+                continue
+
+            name = headers.get(elem.tag)
+            if name and name not in found:
+                found[name] = elem
+                if name == "ide":
+                    # O pai do ide é o infNFe, que carrega a chave de acesso.
+                    chave_attr = elem.getparent().get('Id')
+                if len(found) == len(headers):
+                    break
+
+        ide, emit, dest, v_total = (found.get(name) for name in ("ide", "emit", "dest", "ICMSTot"))
+        self._check_structure(ide, emit, dest, v_total)
+        if chave_attr is None:
+            raise KeyError('Id')
+        return self._extract(chave_attr, ide, emit, dest, v_total)
+
+    def _extract(self, chave_attr: str, ide: Any, emit: Any, dest: Any, v_total: Any) -> Dict[str, Any]:
+        """Extrai os campos do cabeçalho usando os XPath pré-compilados."""
+        return self._build_record(
+            chave_attr=chave_attr,
+            dh_emi=self._find("dhEmi", ide).text,
+            n_nf=self._find("nNF", ide).text,
+            v_nf=self._find("vNF", v_total),
+            fornecedor_nome=self._find("xNome", emit).text,
+            fornecedor_cnpj=self._find("CNPJ", emit).text,
+            loja_nome=self._find("xNome", dest).text,
+            loja_cnpj=self._find("CNPJ", dest).text,
+        )
+
+    def _extract_item(self, det: Any, chave_nfe: str) -> Dict[str, Any]:
+        """Extrai os campos de um det (produto e impostos destacados no item)."""
+        prefix = len(self.namespace)
+        prod: Dict[str, Optional[str]] = {}
+        taxes: Dict[str, float] = {}
+        # Uma passada pelos filhos em vez de uma busca por campo: notas com milhares de itens.
+        for child in det:
+            tag = child.tag[prefix:] if isinstance(child.tag, str) else ""
+            if tag == "prod":
+                prod = {field.tag[prefix:]: field.text for field in child if isinstance(field.tag, str)}
+            elif tag == "imposto":
+                for tax in child:
+                    column = self._item_taxes.get(tax.tag)
+                    if column is None:
+                        continue
+                    # O grupo varia com a tributação (ICMS00, ICMS20, IPITrib, PISAliq...).
+                    for group in tax:
+                        value = group.findtext(self._tax_values[column])
+                        if value is not None:
+                            taxes[column] = _number(value)
+                            break
+
+        gtin = prod.get("cEAN")
+        return {
+            "chave_nfe": chave_nfe,
+            "n_item": int(det.get("nItem") or 0),
+            "codigo": prod.get("cProd"),
+            "gtin": gtin if gtin and gtin.isdigit() else None,  # "SEM GTIN" quando o produto não tem código de barras
+            "descricao": prod.get("xProd"),
+            "ncm": prod.get("NCM"),
+            "cfop": prod.get("CFOP"),
+            "unidade": prod.get("uCom"),
+            "quantidade": _number(prod.get("qCom")),
+            "valor_unitario": _number(prod.get("vUnCom")),
+            "valor_total": _number(prod.get("vProd")),
+            "valor_icms": taxes.get("valor_icms", 0.0),
+            "valor_ipi": taxes.get("valor_ipi", 0.0),
+            "valor_pis": taxes.get("valor_pis", 0.0),
+            "valor_cofins": taxes.get("valor_cofins", 0.0),
+        }
+
+    @staticmethod
+    def _discard_item(det: Any) -> None:
+        """Libera um det já lido e os anteriores a ele, que o iterparse manteria na árvore."""
+        det.clear()
+        previous = det.getprevious()
+        while previous is not None and previous.tag == det.tag:
+            det.getparent().remove(previous)
+            previous = det.getprevious()
+
+    def _find(self, name: str, element: Any, fallback_root: Any = None) -> Any:
+        """
+        Retorna o primeiro elemento do campo `name` ou None, como Element.find.
+        Tenta o caminho direto a partir de `element` e, se não encontrar, a busca por
+        descendentes a partir de `fallback_root` (ou do próprio elemento).
+        """
+        direct, descendant = self._xpaths[name]
+        if element is not None:
+            result = direct(element)
+            if result:
+                return result[0]
+        context = fallback_root if fallback_root is not None else element
+        if context is None:
+            return None
+        result = descendant(context)
+        return result[0] if result else None
+
+    @staticmethod
+    def _check_structure(*elements: Any) -> None:
+        """Valida que os elementos essenciais existem e não estão vazios."""
+        if any(element is None or len(element) == 0 for element in elements):
+            raise XMLImportError("Estrutura XML incompleta. Elementos essenciais não encontrados.")
+
+    @staticmethod
+    def _build_record(chave_attr: str, dh_emi: str, n_nf: str, v_nf: Any, fornecedor_nome: str,
+                      fornecedor_cnpj: str, loja_nome: str, loja_cnpj: str) -> Dict[str, Any]:
+        """Monta o dicionário de lançamento a partir dos textos extraídos do XML."""
+        # Formata a data para AAAA-MM-DD
+        data_emissao = datetime.fromisoformat(dh_emi).strftime('%Y-%m-%d')
+
+        # Converte o valor para float
+        try:
+            valor_total = float(v_nf.text)
+        except (ValueError, AttributeError):
+            valor_total = 0.0
+
+        # Documento e NFE são geralmente o mesmo número da nota
+        return {
+            "chave_nfe": chave_attr.replace("NFe", ""),
+            "nfe": n_nf,
+            "documento": n_nf,
+            "data_lancamento": data_emissao,
+            "valor": valor_total,
+            "fornecedor": fornecedor_nome,
+            "cnpj_forn": fornecedor_cnpj,
+            "loja": loja_nome,
+            "cnpj_loja": loja_cnpj,
+            "tipo": "Entrada",  # Presumimos que NF-e importada é de entrada
+        }
@@ -1,26 +1,46 @@
 import tkinter as tk
 from tkinter import ttk
-from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from src.analysis.analytics import summary_from_totals
+from src.database.manager import ChangeSet
 from src.ui.screens import BaseScreen
 from datetime import datetime
+from functools import lru_cache
 import locale
 
 if TYPE_CHECKING:
     from main import MainApplication
 
-try:
-    locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
-except locale.Error:
-    locale.setlocale(locale.LC_ALL, '')
+@lru_cache(maxsize=None)
+def _setup_locale() -> None:
+    """Configura o locale brasileiro na primeira formatação de valores, e não na importação."""
+    try:
+        locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
+    except locale.Error:
+        locale.setlocale(locale.LC_ALL, '')
 
+# Intervalo entre as verificações de alterações no banco enquanto o dashboard está visível.
+POLL_INTERVAL_MS = 2000
 
 class DashboardScreen(BaseScreen):
     """
     Tela principal da aplicação, exibindo um dashboard com métricas financeiras.
+    Enquanto visível, verifica a cada POLL_INTERVAL_MS se o banco mudou (DatabaseManager.get_changes),
+    inclusive por outro processo, como uma importação em lote. Quando só houve inclusões de
+    lançamentos, soma aos totais exibidos apenas os lançamentos novos; nos demais casos, recarrega.
     """
+
+    data_dependencies = ("lancamentos",)
+
     def __init__(self, parent: ttk.Frame, controller: "MainApplication", **kwargs: Any) -> None:
         super().__init__(parent, controller, **kwargs)
         self.widgets: Dict[str, ttk.Label] = {}
+        # Totais exibidos, o maior id já somado e a versão de get_changes em que foram lidos.
+        self._totals: Dict[str, Tuple[float, int]] = {}
+        self._last_id = 0
+        self._version: Optional[int] = None
+        self._needs_reload = True
+        self._poll_job: Optional[str] = None
         self._create_widgets()
         
     def _create_widgets(self) -> None:
@@ -53,13 +73,83 @@ class DashboardScreen(BaseScreen):
         
         return value_label
 
-    def load_data(self, all_lancamentos: Optional[List[Any]] = None) -> None:
-        """Carrega e atualiza os dados do dashboard."""
-        if all_lancamentos is None:
-            all_lancamentos = self.controller.db_manager.get_lancamentos()
-            
-        summary = self.controller.financial_analytics.get_financial_summary(all_lancamentos)
-        
+    def activate(self) -> None:
+        """Ao ser exibido, recarrega na primeira vez ou verifica alterações, e retoma o polling."""
+        if self._version is None:
+            self.refresh()
+        self._poll()
+
+    def load_data(self, quiet: bool = False) -> None:
+        """Recarrega os totais do dashboard a partir das tabelas de resumo."""
+        db_manager = self.controller.db_manager
+        self._needs_reload = True
+
+        def fetch() -> Tuple[int, int, Dict[str, Tuple[float, int]]]:
+            # A versão é lida antes dos totais: uma escrita entre as duas leituras só causa
+            # uma verificação a mais, nunca uma alteração perdida.
+            version = db_manager.get_changes()["version"]
+            return (version, *db_manager.aggregate_by_tipo_since())
+
+        self.run_async(fetch, self._on_loaded, key="load", quiet=quiet,
+                       error_message="Erro ao carregar o resumo financeiro")
+
+    def _on_loaded(self, result: Tuple[int, int, Dict[str, Tuple[float, int]]]) -> None:
+        version, self._last_id, self._totals = result
+        self._version = version if self._version is None else max(self._version, version)
+        self._needs_reload = False
+        self._show_summary(summary_from_totals(self._totals))
+        if self._poll_job is None:
+            self._schedule_poll()
+
+    def _poll(self) -> None:
+        """Verifica se o banco mudou desde a última leitura, sem consultar as tabelas."""
+        if self._poll_job is not None:
+            self.after_cancel(self._poll_job)
+            self._poll_job = None
+        if self.controller.current_screen is not self or self._version is None:
+            return
+        db_manager = self.controller.db_manager
+        version = self._version
+        self.run_async(lambda: db_manager.get_changes(version), self._on_changes, key="poll",
+                       quiet=True, on_error=lambda e: self._schedule_poll())
+
+    def _schedule_poll(self) -> None:
+        """Agenda a próxima verificação, substituindo a já agendada."""
+        if self._poll_job is not None:
+            self.after_cancel(self._poll_job)
+            self._poll_job = None
+        if self.controller.current_screen is self:
+            self._poll_job = self.after(POLL_INTERVAL_MS, self._poll)
+
+    def _on_changes(self, changes: ChangeSet) -> None:
+        """Aplica só os lançamentos novos quando possível; recarrega tudo nos demais casos."""
+        self._schedule_poll()
+        if self._version is None or changes["version"] == self._version:
+            return
+        self._version = changes["version"]
+        if not changes["external"] and "lancamentos" not in changes["tables"]:
+            return
+        if self._needs_reload or not changes["append_only"]:
+            self.load_data(quiet=True)
+            return
+
+        db_manager = self.controller.db_manager
+        after_id = self._last_id
+        self.run_async(lambda: db_manager.aggregate_by_tipo_since(after_id), self._apply_delta,
+                       key="load", quiet=True, error_message="Erro ao atualizar o resumo financeiro")
+
+    def _apply_delta(self, result: Tuple[int, Dict[str, Tuple[float, int]]]) -> None:
+        """Soma aos totais exibidos os lançamentos incluídos depois do último id lido."""
+        last_id, delta = result
+        for tipo, (total, quantidade) in delta.items():
+            current_total, current_quantidade = self._totals.get(tipo, (0.0, 0))
+            self._totals[tipo] = (round(current_total + total, 2), current_quantidade + quantidade)
+        self._last_id = max(self._last_id, last_id)
+        self._show_summary(summary_from_totals(self._totals))
+
+    def _show_summary(self, summary: Dict[str, Any]) -> None:
+        """Exibe o resumo financeiro carregado."""
+        _setup_locale()
         total_entradas_br = locale.currency(summary['total_entradas'], grouping=True, symbol=True)
         total_saidas_br = locale.currency(summary['total_saidas'], grouping=True, symbol=True)
         saldo_br = locale.currency(summary['saldo_liquido'], grouping=True, symbol=True)
@@ -0,0 +1,121 @@
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+from typing import TYPE_CHECKING, Any, Dict
+from src.ui.screens import BaseScreen
+
+if TYPE_CHECKING:
+    from main import MainApplication
+
+STATS_COLUMNS = ("Query", "Chamadas", "Erros", "Linhas", "Total (ms)", "p50 (ms)", "p95 (ms)", "Máx (ms)")
+SLOW_COLUMNS = ("Horário", "ms", "Linhas", "Query")
+
+class DiagnosticsScreen(BaseScreen):
+    """
+    Tela oculta (Ctrl+Shift+D) com as estatísticas de execução das queries:
+    latência por formato de query e o log de queries lentas com o plano de execução.
+    """
+
+    def __init__(self, parent: ttk.Frame, controller: "MainApplication", **kwargs: Any) -> None:
+        super().__init__(parent, controller, **kwargs)
+        self._slow_details: Dict[str, str] = {}
+        self._create_widgets()
+
+    def _create_widgets(self) -> None:
+        """Cria os controles, a tabela de estatísticas e o log de queries lentas."""
+        self._create_label(self, "Diagnóstico do Banco de Dados", font_size=24, bold=True).pack(pady=(20, 10))
+
+        controls = ttk.Frame(self)
+        controls.pack(pady=5, padx=20, fill=tk.X)
+        self.toggle_button = ttk.Button(controls, command=self._toggle)
+        self.toggle_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls, text="Atualizar", command=self.load_data).pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls, text="Zerar", command=self._reset).pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls, text="Exportar JSON", command=self._export).pack(side=tk.LEFT, padx=5)
+        self.status_label = self._create_label(controls, "")
+        self.status_label.pack(side=tk.LEFT, padx=10)
+
+        self.stats_tree = ttk.Treeview(self, columns=STATS_COLUMNS, show="headings", height=12)
+        for col in STATS_COLUMNS:
+            self.stats_tree.heading(col, text=col)
+            self.stats_tree.column(col, anchor=tk.W if col == "Query" else tk.E, width=600 if col == "Query" else 90, stretch=col == "Query")
+        self.stats_tree.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+
+        self._create_label(self, "Queries lentas", font_size=16).pack(pady=(10, 5))
+        self.slow_tree = ttk.Treeview(self, columns=SLOW_COLUMNS, show="headings", height=8)
+        for col in SLOW_COLUMNS:
+            self.slow_tree.heading(col, text=col)
+            self.slow_tree.column(col, anchor=tk.W if col == "Query" else tk.E, width=700 if col == "Query" else 90, stretch=col == "Query")
+        self.slow_tree.pack(fill=tk.BOTH, expand=True, padx=20, pady=5)
+        self.slow_tree.bind("<<TreeviewSelect>>", self._on_slow_selected)
+
+        self.plan_text = tk.Text(self, height=8, wrap=tk.WORD)
+        self.plan_text.pack(fill=tk.X, padx=20, pady=(5, 20))
+
+    def activate(self) -> None:
+        """As estatísticas mudam a cada query, então a tela é sempre atualizada ao ser exibida."""
+        self.load_data()
+
+    def load_data(self) -> None:
+        """Exibe as estatísticas atuais. Os dados já estão em memória, não há acesso ao banco."""
+        instrumentation = self.controller.db_manager.instrumentation
+        self.toggle_button.config(text="Desativar medição" if instrumentation else "Ativar medição")
+
+        for tree in (self.stats_tree, self.slow_tree):
+            children = tree.get_children()
+            if children:
+                tree.delete(*children)
+        self._slow_details.clear()
+        self.plan_text.delete("1.0", tk.END)
+
+        if instrumentation is None:
+            self.status_label.config(text="Medição desativada.")
+            return
+
+        stats = instrumentation.stats()
+        self.status_label.config(
+            text=f"{len(stats)} formatos de query, limite de query lenta: {instrumentation.slow_threshold * 1000:.0f} ms"
+        )
+        for stat in stats:
+            self.stats_tree.insert("", tk.END, values=(
+                stat["query"], stat["calls"], stat["errors"], stat["rows"],
+                f"{stat['total_ms']:.1f}", f"{stat['p50_ms']:.2f}", f"{stat['p95_ms']:.2f}", f"{stat['max_ms']:.2f}",
+            ))
+
+        for slow in instrumentation.slow_queries():
+            item = self.slow_tree.insert("", tk.END, values=(slow["timestamp"], f"{slow['ms']:.1f}", slow["rows"], slow["query"]))
+            self._slow_details[item] = (
+                f"{slow['query']}\n\nParâmetros: {slow['params']}\n\nPlano:\n" + "\n".join(f"  -> {step}" for step in slow["plan"])
+            )
+
+    def _on_slow_selected(self, event: tk.Event) -> None:
+        """Mostra a query, os parâmetros e o plano da query lenta selecionada."""
+        selection = self.slow_tree.selection()
+        self.plan_text.delete("1.0", tk.END)
+        if selection:
+            self.plan_text.insert("1.0", self._slow_details.get(selection[0], ""))
+
+    def _toggle(self) -> None:
+        db_manager = self.controller.db_manager
+        if db_manager.instrumentation is None:
+            db_manager.enable_instrumentation()
+        else:
+            db_manager.disable_instrumentation()
+        self.load_data()
+
+    def _reset(self) -> None:
+        if instrumentation := self.controller.db_manager.instrumentation:
+            instrumentation.reset()
+        self.load_data()
+
+    def _export(self) -> None:
+        """Grava as estatísticas em um arquivo JSON."""
+        instrumentation = self.controller.db_manager.instrumentation
+        if instrumentation is None:
+            messagebox.showinfo("Diagnóstico", "Ative a medição antes de exportar.")
+            return
+        path = filedialog.asksaveasfilename(title="Exportar diagnóstico", defaultextension=".json", filetypes=(("JSON", "*.json"),))
+        if path:
+            try:
+                instrumentation.dump(path)
+            except OSError as e:
+                messagebox.showerror("Erro", f"Não foi possível gravar o arquivo: {e}")
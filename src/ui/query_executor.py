@@ -0,0 +1,149 @@
+import queue
+import threading
+import tkinter as tk
+from tkinter import messagebox
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+SuccessCallback = Callable[[Any], None]
+ErrorCallback = Callable[[Exception], None]
+
+class QueryTask:
+    """Uma chamada agendada no QueryExecutor. Tarefas canceladas não entregam resultado."""
+
+    def __init__(self, fn: Callable[[], Any], on_success: Optional[SuccessCallback], on_error: Optional[ErrorCallback], key: Optional[str], quiet: bool = False) -> None:
+        self.fn = fn
+        self.on_success = on_success
+        self.on_error = on_error
+        self.key = key
+        self.quiet = quiet
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """Descarta o resultado da tarefa. Se ela já estiver rodando, termina mas não chama os callbacks."""
+        self.cancelled = True
+
+class QueryExecutor:
+    """
+    Executa chamadas ao banco em threads de trabalho e entrega os resultados na thread do Tk.
+    Os resultados são coletados por polling com after(), pois o Tk não pode ser acessado
+    de outras threads. Tarefas enviadas com a mesma `key` cancelam a anterior, o que evita
+    que um clique antigo em "Buscar" sobrescreva o resultado de um clique mais recente.
+    """
+
+    def __init__(self, root: tk.Misc, workers: int = 2, poll_interval_ms: int = 30, on_busy_change: Optional[Callable[[bool], None]] = None) -> None:
+        self.root = root
+        self.poll_interval_ms = poll_interval_ms
+        self.on_busy_change = on_busy_change
+        self._tasks: "queue.Queue[Optional[QueryTask]]" = queue.Queue()
+        self._results: "queue.Queue[Tuple[Optional[QueryTask], Any, Optional[Exception]]]" = queue.Queue()
+        self._latest: Dict[str, QueryTask] = {}
+        self._pending = 0
+        # Tarefas pendentes que não são silenciosas: só elas acionam o indicador de carregamento.
+        self._busy = 0
+        self._polling = False
+        self._workers: List[threading.Thread] = []
+        for index in range(max(1, workers)):
+            worker = threading.Thread(target=self._run, name=f"query-worker-{index}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    @property
+    def busy(self) -> bool:
+        """Indica se há tarefas enviadas (exceto as silenciosas) cujo resultado ainda não foi entregue."""
+        return self._busy > 0
+
+    def submit(self, fn: Callable[[], Any], on_success: Optional[SuccessCallback] = None, on_error: Optional[ErrorCallback] = None, key: Optional[str] = None, quiet: bool = False) -> QueryTask:
+        """
+        Agenda `fn` em uma thread de trabalho. Os callbacks rodam na thread do Tk.
+        Tarefas com quiet=True (ex.: verificações periódicas) não acionam o indicador de carregamento.
+        """
+        task = QueryTask(fn, on_success, on_error, key, quiet)
+        if key is not None:
+            if previous := self._latest.get(key):
+                previous.cancel()
+            self._latest[key] = task
+
+        self._pending += 1
+        if not quiet:
+            self._busy += 1
+            if self._busy == 1 and self.on_busy_change:
+                self.on_busy_change(True)
+        self._tasks.put(task)
+        self._ensure_polling()
+        return task
+
+    def post(self, callback: Callable[[], None]) -> None:
+        """
+        Agenda um callback para rodar na thread do Tk a partir de uma tarefa em execução
+        (ex.: progresso de uma importação). O callback é entregue no próximo polling.
+        """
+        self._results.put((None, callback, None))
+
+    def shutdown(self) -> None:
+        """Encerra as threads de trabalho após as tarefas já enviadas."""
+        for task in self._latest.values():
+            task.cancel()
+        for _ in self._workers:
+            self._tasks.put(None)
+
+    def _run(self) -> None:
+        """Laço das threads de trabalho."""
+        while (task := self._tasks.get()) is not None:
+            if task.cancelled:
+                self._results.put((task, None, None))
+                continue
+            try:
+                self._results.put((task, task.fn(), None))
+            except Exception as e:
+                self._results.put((task, None, e))
+
+    def _ensure_polling(self) -> None:
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval_ms, self._poll)
+
+    def _poll(self) -> None:
+        """Entrega na thread do Tk os resultados prontos."""
+        was_busy = self._busy > 0
+        while True:
+            try:
+                task, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            try:
+                if task is None:
+                    # Callback enviado por post().
+                    result()
+                    continue
+
+                self._pending -= 1
+                if not task.quiet:
+                    self._busy -= 1
+                if task.key is not None and self._latest.get(task.key) is task:
+                    del self._latest[task.key]
+                if task.cancelled:
+                    continue
+                if error is not None:
+                    (task.on_error or self._default_error)(error)
+                elif task.on_success is not None:
+                    task.on_success(result)
+            except Exception as e:
+                # Um callback com erro não pode interromper a entrega dos demais resultados.
+                self._default_error(e)
+
+        if was_busy and self._busy == 0 and self.on_busy_change:
+            self.on_busy_change(False)
+
+        # Mantém o polling enquanto houver tarefas; post() de tarefas longas depende disso.
+        if self._pending > 0:
+            self.root.after(self.poll_interval_ms, self._poll)
+        else:
+            self._polling = False
+
+    @staticmethod
+    def _default_error(error: Exception) -> None:
+        if isinstance(error, RuntimeError):
+            messagebox.showerror("Erro de Banco de Dados", str(error))
+        else:
+            messagebox.showerror("Erro Inesperado", f"Ocorreu um erro: {error}")
@@ -0,0 +1,259 @@
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from src.database.manager import Lancamento
+
+# Busca uma página: (before_id, after_id, limit) -> lançamentos em ordem de id decrescente
+PageFetcher = Callable[[Optional[int], Optional[int], int], List[Lancamento]]
+# Busca os totais da consulta: () -> {"count", "total_entradas", "total_saidas"}
+TotalsFetcher = Callable[[], Dict[str, Any]]
+# Busca um resultado completo, sem paginação (ex.: busca textual limitada): () -> lançamentos
+RowsFetcher = Callable[[], List[Lancamento]]
+# Executa uma busca: (função, callback com o resultado, chave, callback de erro) -> None.
+# Buscas com a mesma chave substituem a anterior (ver QueryExecutor.submit).
+Submitter = Callable[[Callable[[], Any], Callable[[Any], None], str, Callable[[Exception], None]], Any]
+
+def _run_now(fn: Callable[[], Any], on_success: Callable[[Any], None], key: str, on_error: Callable[[Exception], None]) -> None:
+    """Submitter padrão: executa a busca de forma síncrona."""
+    try:
+        result = fn()
+    except Exception as e:
+        on_error(e)
+        return
+    on_success(result)
+
+REPORT_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("id", "ID"), ("loja", "Loja"), ("cnpj_loja", "CNPJ Loja"), ("fornecedor", "Fornecedor"),
+    ("cnpj_forn", "CNPJ Forn."), ("documento", "Documento"), ("nfe", "NFE"), ("chave_nfe", "Chave NFE"),
+    ("valor", "Valor"), ("data_lancamento", "Data"), ("vencimento", "Vencimento"),
+    ("observacao", "Observação"), ("tipo", "Tipo"),
+)
+
+def format_currency(valor: Optional[float]) -> str:
+    """Formata um valor no padrão usado nas telas (R$ 1234,56)."""
+    return f"R$ {valor or 0:.2f}".replace('.', ',')
+
+def format_date(iso_date: Optional[str]) -> str:
+    """Converte AAAA-MM-DD para DD/MM/AAAA sem passar por strptime."""
+    if not iso_date or len(iso_date) < 10:
+        return iso_date or ''
+    return f"{iso_date[8:10]}/{iso_date[5:7]}/{iso_date[:4]}"
+
+def format_row(row: Lancamento) -> Tuple[Any, ...]:
+    """
+    Converte um lançamento (dicionário ou LancamentoRow) nos valores exibidos, na ordem de REPORT_COLUMNS.
+    Os campos são lidos pelo nome, então não depende da ordem das chaves do dicionário.
+    """
+    values = (
+        row['id'], row['loja'], row['cnpj_loja'], row['fornecedor'], row['cnpj_forn'],
+        row['documento'], row['nfe'], row['chave_nfe'], format_currency(row['valor']),
+        format_date(row['data_lancamento']), format_date(row['vencimento']),
+        row['observacao'], row['tipo'],
+    )
+    # Campos ausentes (ex.: vencimento de NF-e importadas) aparecem vazios, não como "None".
+    return tuple('' if value is None else value for value in values)
+
+class VirtualReportView(ttk.Frame):
+    """
+    Treeview virtualizado para relatórios grandes.
+    Mantém no máximo `max_pages` páginas carregadas: ao rolar perto do fim, busca a
+    próxima página por keyset e descarta a mais antiga do topo (e vice-versa).
+    Limpar e recarregar custa O(tamanho da janela), não O(tamanho do relatório).
+    As buscas passam por `submit`, que pode executá-las fora da thread do Tk. Uma busca que
+    falha é informada no rodapé e não impede as seguintes: rolar de novo tenta outra vez.
+    Resultados de uma consulta anterior (ex.: os totais do relatório que chegam depois de uma
+    busca textual) são descartados.
+    """
+
+    def __init__(self, parent: tk.Misc, page_size: int = 200, max_pages: int = 3, submit: Submitter = _run_now, **kwargs: Any) -> None:
+        super().__init__(parent, **kwargs)
+        self.submit = submit
+        self.page_size = page_size
+        self.max_rows = page_size * max_pages
+        self._fetch_page: Optional[PageFetcher] = None
+        self._fetch_totals: Optional[TotalsFetcher] = None
+        self._more_below = False
+        self._more_above = False
+        self._loading = False
+        self._failed = False
+        # Incrementado a cada load/load_rows; callbacks de buscas de outra geração são ignorados.
+        self._generation = 0
+        self._create_widgets()
+
+    def _create_widgets(self) -> None:
+        """Cria o Treeview, a barra de rolagem e o rodapé com os totais."""
+        self.totals_label = ttk.Label(self, text="", style="Custom.TLabel")
+        self.totals_label.pack(side=tk.BOTTOM, anchor="w", pady=(5, 0))
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.tree = ttk.Treeview(self, columns=[title for _, title in REPORT_COLUMNS], show="headings")
+        for _, title in REPORT_COLUMNS:
+            self.tree.heading(title, text=title)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.tree.configure(yscrollcommand=self._on_yscroll)
+        self.scrollbar.configure(command=self.tree.yview)
+
+    def load(self, fetch_page: PageFetcher, fetch_totals: Optional[TotalsFetcher] = None) -> None:
+        """Inicia uma nova consulta, exibindo a primeira página e os totais."""
+        self._generation += 1
+        self._fetch_page = fetch_page
+        self._fetch_totals = fetch_totals
+        self._more_below = False
+        self._more_above = False
+        self._loading = False
+        self._failed = False
+        self.clear()
+        self.update_totals()
+        self._submit(lambda: fetch_page(None, None, self.page_size), self._show_first_page, "page")
+
+    def load_rows(self, fetch_rows: RowsFetcher) -> None:
+        """
+        Exibe um resultado já limitado, na ordem em que vier (ex.: por relevância).
+        Não há paginação por keyset; o rodapé mostra apenas a quantidade.
+        """
+        self._generation += 1
+        self._fetch_page = None
+        self._fetch_totals = None
+        self._more_below = False
+        self._more_above = False
+        self._loading = False
+        self._failed = False
+        self.clear()
+
+        def on_rows(rows: List[Lancamento]) -> None:
+            self._insert_rows(rows, at_top=False)
+            self.totals_label.config(text=f"{len(rows)} resultado(s)")
+
+        self._submit(fetch_rows, on_rows, "page")
+
+    def _submit(self, fn: Callable[[], Any], on_success: Callable[[Any], None], key: str) -> None:
+        """
+        Envia uma busca da view; depois de uma falha, o primeiro sucesso restaura os totais no rodapé.
+        O resultado (ou o erro) é ignorado se outra consulta tiver sido iniciada nesse meio tempo.
+        """
+        generation = self._generation
+
+        def success(result: Any) -> None:
+            if generation != self._generation:
+                return
+            on_success(result)
+            if self._failed:
+                self._failed = False
+                self.update_totals()
+
+        def error(e: Exception) -> None:
+            if generation == self._generation:
+                self._on_error(e)
+
+        self.submit(fn, success, key, error)
+
+    def _on_error(self, error: Exception) -> None:
+        """Libera novas buscas e mostra o erro no rodapé."""
+        self._loading = False
+        self._failed = True
+        self.totals_label.config(text=f"Erro ao carregar os lançamentos: {error}")
+
+    def _show_first_page(self, rows: List[Lancamento]) -> None:
+        """Exibe a primeira página da consulta atual."""
+        self._insert_rows(rows, at_top=False)
+        self._more_below = len(rows) == self.page_size
+
+    def clear(self) -> None:
+        """Remove todas as linhas carregadas de uma só vez."""
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+        self.totals_label.config(text="")
+
+    def update_totals(self) -> None:
+        """Atualiza o rodapé com a quantidade e as somas da consulta atual."""
+        if self._fetch_totals is None:
+            self.totals_label.config(text="")
+            return
+        self._submit(self._fetch_totals, self.show_totals, "totals")
+
+    def show_totals(self, totals: Dict[str, Any]) -> None:
+        """Exibe no rodapé os totais informados."""
+        self._failed = False
+        self.totals_label.config(
+            text=f"{totals['count']} lançamento(s)  |  Entradas: {format_currency(totals['total_entradas'])}"
+                 f"  |  Saídas: {format_currency(totals['total_saidas'])}"
+        )
+
+    def remove(self, record_id: int) -> None:
+        """Remove uma linha exibida e atualiza os totais."""
+        if self.tree.exists(str(record_id)):
+            self.tree.delete(str(record_id))
+        self.update_totals()
+
+    def _insert_rows(self, rows: Sequence[Lancamento], at_top: bool) -> None:
+        """Insere linhas no início ou no fim da janela."""
+        index: Any = 0 if at_top else tk.END
+        for row in reversed(rows) if at_top else rows:
+            self.tree.insert("", index, iid=str(row['id']), values=format_row(row))
+
+    def _on_yscroll(self, first: str, last: str) -> None:
+        """Repassa a posição à barra de rolagem e busca novas páginas perto das bordas da janela."""
+        self.scrollbar.set(first, last)
+        if self._loading or self._fetch_page is None:
+            return
+        if float(last) >= 0.9 and self._more_below:
+            self._loading = True
+            self.after_idle(self._load_below)
+        elif float(first) <= 0.1 and self._more_above:
+            self._loading = True
+            self.after_idle(self._load_above)
+
+    def _load_below(self) -> None:
+        """Carrega a próxima página (ids menores) e descarta linhas do topo se a janela exceder o limite."""
+        children = self.tree.get_children()
+        fetch_page = self._fetch_page
+        if not children or fetch_page is None:
+            self._loading = False
+            return
+        before_id = int(children[-1])
+
+        def on_rows(rows: List[Lancamento]) -> None:
+            self._loading = False
+            self._more_below = len(rows) == self.page_size
+            self._append(rows, at_top=False)
+
+        self._submit(lambda: fetch_page(before_id, None, self.page_size), on_rows, "page")
+
+    def _load_above(self) -> None:
+        """Carrega a página anterior (ids maiores) e descarta linhas do fim se a janela exceder o limite."""
+        children = self.tree.get_children()
+        fetch_page = self._fetch_page
+        if not children or fetch_page is None:
+            self._loading = False
+            return
+        after_id = int(children[0])
+
+        def on_rows(rows: List[Lancamento]) -> None:
+            self._loading = False
+            self._more_above = len(rows) == self.page_size
+            self._append(rows, at_top=True)
+
+        self._submit(lambda: fetch_page(None, after_id, self.page_size), on_rows, "page")
+
+    def _append(self, rows: Sequence[Lancamento], at_top: bool) -> None:
+        """Adiciona uma página à janela mantendo a linha visível no lugar."""
+        if not rows:
+            return
+        children = self.tree.get_children()
+        anchor = children[0] if at_top else children[-1]
+        self._insert_rows(rows, at_top)
+
+        children = self.tree.get_children()
+        excess = len(children) - self.max_rows
+        if excess > 0:
+            if at_top:
+                self.tree.delete(*children[-excess:])
+                self._more_below = True
+            else:
+                self.tree.delete(*children[:excess])
+                self._more_above = True
+        self.tree.see(anchor)
@@ -1,20 +1,68 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from typing import TYPE_CHECKING, Any, Dict, List, Optional
-from src.database.manager import LancamentoData
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+from src.database.manager import DuplicateEntityError, LancamentoData
+from src.ui.report_view import VirtualReportView
 from datetime import datetime
 import collections
 
 if TYPE_CHECKING:
     from main import MainApplication
 
+# Máximo de lançamentos exibidos pela busca textual do relatório.
+SEARCH_LIMIT = 500
+
+def entity_label(nome: str, cnpj: str) -> str:
+    """Texto de uma loja ou fornecedor nos Comboboxes: o CNPJ distingue cadastros com o mesmo nome."""
+    return f"{nome} ({cnpj})" if cnpj else nome
+
+def entity_choices(entities: List[Tuple[str, str]]) -> Dict[str, Tuple[str, str]]:
+    """Opções de um Combobox de lojas ou fornecedores, do texto exibido para o par (nome, CNPJ)."""
+    return {entity_label(nome, cnpj): (nome, cnpj) for nome, cnpj in entities}
+
 class BaseScreen(ttk.Frame):
     """Classe base para todas as telas da aplicação."""
+
+    # Tabelas lidas por load_data. A tela só é recarregada quando alguma delas mudou.
+    data_dependencies: Tuple[str, ...] = ()
+
     def __init__(self, parent: ttk.Frame, controller: "MainApplication", **kwargs: Any) -> None:
         super().__init__(parent, **kwargs)
         self.controller = controller
+        self._loaded_versions: Optional[Tuple[int, ...]] = None
         self.bind("<<ThemeChanged>>", self._on_theme_changed)
 
+    def load_data(self) -> None:
+        """Carrega os dados exibidos pela tela. Telas sem dados não precisam sobrescrever."""
+
+    def activate(self) -> None:
+        """Chamado ao exibir a tela: recarrega os dados apenas se eles mudaram desde a última carga."""
+        versions = self.controller.db_manager.get_data_versions(self.data_dependencies)
+        if versions != self._loaded_versions:
+            self.refresh(versions)
+
+    def refresh(self, versions: Optional[Tuple[int, ...]] = None) -> None:
+        """Recarrega os dados da tela e registra as versões carregadas."""
+        if versions is None:
+            versions = self.controller.db_manager.get_data_versions(self.data_dependencies)
+        self.load_data()
+        self._loaded_versions = versions
+
+    def run_async(self, fn: Callable[[], Any], on_success: Callable[[Any], None], key: Optional[str] = None, error_message: str = "Ocorreu um erro", on_error: Optional[Callable[[Exception], None]] = None, quiet: bool = False) -> Any:
+        """
+        Executa `fn` fora da thread do Tk e chama `on_success` com o resultado.
+        Chamadas com a mesma `key` na mesma tela cancelam a anterior ainda pendente.
+        Com quiet=True, a chamada não aciona o indicador de carregamento.
+        """
+        def default_error(e: Exception) -> None:
+            if isinstance(e, RuntimeError):
+                messagebox.showerror("Erro de Banco de Dados", str(e))
+            else:
+                messagebox.showerror("Erro Inesperado", f"{error_message}: {e}")
+
+        task_key = f"{id(self)}:{key}" if key else None
+        return self.controller.executor.submit(fn, on_success, on_error or default_error, task_key, quiet)
+
     def _create_label(self, parent: ttk.Frame, text: str, font_size: int = 12, bold: bool = False) -> ttk.Label:
         """Cria e retorna um Label com estilos padronizados."""
         font_style = ("Segoe UI", font_size, "bold") if bold else ("Segoe UI", font_size)
@@ -32,10 +80,11 @@ class BaseScreen(ttk.Frame):
 class WelcomeScreen(BaseScreen):
     """Tela de boas-vindas do sistema com lançamentos recentes."""
 
+    data_dependencies = ("lancamentos",)
+
     def __init__(self, parent: ttk.Frame, controller: "MainApplication", **kwargs: Any) -> None:
         super().__init__(parent, controller, **kwargs)
         self._create_widgets()
-        self.load_data()
 
     def _create_widgets(self) -> None:
         """Cria e organiza os widgets da tela."""
@@ -51,21 +100,22 @@ class WelcomeScreen(BaseScreen):
         
     def load_data(self) -> None:
         """Carrega e exibe os lançamentos mais recentes."""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        try:
-            entries: List[LancamentoData] = self.controller.db_manager.get_lancamentos(limit=10)
-            for entry in entries:
-                valor_br = f"R$ {entry['valor']:.2f}".replace('.', ',')
-                data_br = datetime.strptime(entry['data_lancamento'], '%Y-%m-%d').strftime('%d/%m/%Y')
-                self.tree.insert("", tk.END, values=(
-                    entry['id'], entry['loja'], entry['fornecedor'], valor_br, data_br
-                ))
-        except RuntimeError as e:
-            messagebox.showerror("Erro de Banco de Dados", str(e))
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao carregar lançamentos: {e}")
+        db_manager = self.controller.db_manager
+        self.run_async(lambda: db_manager.get_lancamentos(limit=10), self._show_entries,
+                       key="load", error_message="Erro ao carregar lançamentos")
+
+    def _show_entries(self, entries: List[LancamentoData]) -> None:
+        """Exibe os lançamentos carregados."""
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+
+        for entry in entries:
+            valor_br = f"R$ {entry['valor']:.2f}".replace('.', ',')
+            data_br = datetime.strptime(entry['data_lancamento'], '%Y-%m-%d').strftime('%d/%m/%Y')
+            self.tree.insert("", tk.END, values=(
+                entry['id'], entry['loja'], entry['fornecedor'], valor_br, data_br
+            ))
 
 class GenericCadastroScreen(BaseScreen):
     """Tela genérica para cadastro de Fornecedores e Lojas."""
@@ -74,8 +124,8 @@ class GenericCadastroScreen(BaseScreen):
         super().__init__(parent, controller, **kwargs)
         self.title_text = title
         self.table_name = table_name
+        self.data_dependencies = (table_name,)
         self._create_widgets()
-        self.load_data()
 
     def _create_widgets(self) -> None:
         """Cria e organiza os widgets da tela de cadastro."""
@@ -108,58 +158,69 @@ class GenericCadastroScreen(BaseScreen):
             messagebox.showerror("Erro de Validação", "Nome e CNPJ são obrigatórios.")
             return
 
-        try:
-            self.controller.db_manager.insert_entity(self.table_name, nome, cnpj)
+        def on_saved(_: Any) -> None:
             messagebox.showinfo("Sucesso", f"{self.title_text} cadastrado com sucesso!")
-            self.load_data()
+            self.refresh()
             self.nome_entry.delete(0, tk.END)
             self.cnpj_entry.delete(0, tk.END)
-        except RuntimeError as e:
-            if "UNIQUE constraint failed" in str(e):
+
+        def on_error(e: Exception) -> None:
+            if isinstance(e, DuplicateEntityError):
                 messagebox.showerror("Erro de Duplicação", "Nome ou CNPJ já existem no banco de dados.")
-            else:
+            elif isinstance(e, RuntimeError):
                 messagebox.showerror("Erro de Banco de Dados", str(e))
-        except Exception as e:
-            messagebox.showerror("Erro Inesperado", f"Ocorreu um erro: {e}")
+            else:
+                messagebox.showerror("Erro Inesperado", f"Ocorreu um erro: {e}")
+
+        db_manager = self.controller.db_manager
+        self.run_async(lambda: db_manager.insert_entity(self.table_name, nome, cnpj), on_saved, on_error=on_error)
             
     def load_data(self) -> None:
         """Carrega e exibe os dados no Treeview."""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        try:
-            data = self.controller.db_manager.get_entities(self.table_name)
-            for item in data:
-                self.tree.insert("", tk.END, values=item)
-        except RuntimeError as e:
-            messagebox.showerror("Erro de Banco de Dados", str(e))
-        except Exception as e:
-            messagebox.showerror("Erro Inesperado", f"Erro ao carregar dados: {e}")
+        db_manager = self.controller.db_manager
+        self.run_async(lambda: db_manager.get_entities(self.table_name), self._show_entities,
+                       key="load", error_message="Erro ao carregar dados")
+
+    def _show_entities(self, data: List[Tuple[str, str]]) -> None:
+        """Exibe as entidades carregadas."""
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+        for item in data:
+            self.tree.insert("", tk.END, values=item)
 
 class NotaFiscalEntryScreen(BaseScreen):
     """Tela para o lançamento de notas fiscais."""
 
+    data_dependencies = ("lojas", "fornecedores")
+
     def __init__(self, parent: ttk.Frame, controller: "MainApplication", **kwargs: Any) -> None:
         super().__init__(parent, controller, **kwargs)
-        self._fornecedores_map: Dict[str, str] = {}
-        self._lojas_map: Dict[str, str] = {}
+        # Texto exibido no Combobox -> (nome, CNPJ); ver entity_choices.
+        self._fornecedores_map: Dict[str, Tuple[str, str]] = {}
+        self._lojas_map: Dict[str, Tuple[str, str]] = {}
         self.entries: Dict[str, Any] = {}
         self._create_widgets()
     
     def load_data(self) -> None:
         """Carrega os Comboboxes com os dados do banco."""
-        try:
-            lojas = self.controller.db_manager.get_entities("lojas")
-            fornecedores = self.controller.db_manager.get_entities("fornecedores")
-
-            self._lojas_map = {nome: cnpj for nome, cnpj in lojas}
-            self._fornecedores_map = {nome: cnpj for nome, cnpj in fornecedores}
-
-            self.entries["loja"]["values"] = list(self._lojas_map.keys())
-            self.entries["fornecedor"]["values"] = list(self._fornecedores_map.keys())
-        except RuntimeError as e:
-            messagebox.showerror("Erro de Banco de Dados", str(e))
-        except Exception as e:
-            messagebox.showerror("Erro Inesperado", f"Não foi possível carregar as listas: {e}")
+        db_manager = self.controller.db_manager
+        self.run_async(lambda: (db_manager.get_entities("lojas"), db_manager.get_entities("fornecedores")),
+                       self._show_entities, key="load", error_message="Não foi possível carregar as listas")
+
+    def _show_entities(self, result: Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]) -> None:
+        """Preenche os Comboboxes com as lojas e fornecedores carregados."""
+        lojas, fornecedores = result
+        lojas_map, fornecedores_map = entity_choices(lojas), entity_choices(fornecedores)
+        # Mantém a seleção vinda de um XML ainda não salvo, que não está nos cadastros.
+        for name, old, new in (("loja", self._lojas_map, lojas_map), ("fornecedor", self._fornecedores_map, fornecedores_map)):
+            selected = self.entries[name].get()
+            if selected in old:
+                new.setdefault(selected, old[selected])
+        self._lojas_map, self._fornecedores_map = lojas_map, fornecedores_map
+
+        self.entries["loja"]["values"] = list(self._lojas_map.keys())
+        self.entries["fornecedor"]["values"] = list(self._fornecedores_map.keys())
 
     def _create_widgets(self) -> None:
         """Cria e organiza os widgets de entrada de notas fiscais."""
@@ -199,6 +260,12 @@ class NotaFiscalEntryScreen(BaseScreen):
         import_button = ttk.Button(button_frame, text="Importar XML", command=self._importar_xml_file)
         import_button.pack(side=tk.LEFT, padx=5)
 
+        import_dir_button = ttk.Button(button_frame, text="Importar Pasta", command=self._importar_xml_dir)
+        import_dir_button.pack(side=tk.LEFT, padx=5)
+
+        self.import_status = self._create_label(self, "")
+        self.import_status.pack(pady=5)
+
     def _importar_xml_file(self) -> None:
         """Abre uma janela de diálogo para selecionar um arquivo XML e preenche a tela."""
         xml_path = filedialog.askopenfilename(
@@ -208,16 +275,21 @@ class NotaFiscalEntryScreen(BaseScreen):
         if not xml_path:
             return
 
+        xml_importer = self.controller.xml_importer
+        self.run_async(lambda: xml_importer.import_xml(xml_path), self._fill_from_xml,
+                       key="xml", error_message="Ocorreu um erro inesperado")
+
+    def _fill_from_xml(self, nfe_data: Optional[Dict[str, Any]]) -> None:
+        """Preenche o formulário com os dados extraídos do XML."""
         try:
-            nfe_data = self.controller.xml_importer.import_xml(xml_path)
             if nfe_data:
                 self._clear_entries()
                 
                 data_lancamento_br = datetime.strptime(nfe_data.get('data_lancamento', ''), '%Y-%m-%d').strftime('%d/%m/%Y') if nfe_data.get('data_lancamento') else ''
                 valor_br = str(nfe_data.get('valor', '')).replace('.', ',')
 
-                self.entries["loja"].set(nfe_data.get("loja", ""))
-                self.entries["fornecedor"].set(nfe_data.get("fornecedor", ""))
+                self._set_entity("loja", self._lojas_map, nfe_data.get("loja", ""), nfe_data.get("cnpj_loja", ""))
+                self._set_entity("fornecedor", self._fornecedores_map, nfe_data.get("fornecedor", ""), nfe_data.get("cnpj_forn", ""))
                 self.entries["documento"].insert(0, nfe_data.get("documento", ""))
                 self.entries["nfe"].insert(0, nfe_data.get("nfe", ""))
                 self.entries["chave_nfe"].insert(0, nfe_data.get("chave_nfe", ""))
@@ -231,14 +303,50 @@ class NotaFiscalEntryScreen(BaseScreen):
         except Exception as e:
             messagebox.showerror("Erro", f"Ocorreu um erro inesperado: {e}")
 
+    def _set_entity(self, name: str, choices: Dict[str, Tuple[str, str]], nome: str, cnpj: str) -> None:
+        """Seleciona a loja ou o fornecedor do XML; um cadastro novo entra nas opções e é criado ao salvar."""
+        label = entity_label(nome, cnpj)
+        choices.setdefault(label, (nome, cnpj))
+        self.entries[name].set(label)
+
+    def _importar_xml_dir(self) -> None:
+        """Importa todos os XMLs de uma pasta diretamente para o banco, fora da thread do Tk."""
+        directory = filedialog.askdirectory(title="Selecione a pasta com os XMLs das Notas Fiscais")
+        if not directory:
+            return
+
+        from src.services.batch_importer import BatchXMLImporter, ImportProgress
+
+        executor = self.controller.executor
+
+        def on_progress(progress: ImportProgress) -> None:
+            text = (f"Importando: {progress['files_done']}/{progress['files_total']} arquivos "
+                    f"({progress['files_per_second']:.0f} arquivos/s)")
+            executor.post(lambda: self.import_status.config(text=text))
+
+        importer = BatchXMLImporter(self.controller.db_manager, progress_callback=on_progress)
+        self.import_status.config(text="Importando...")
+
+        def on_done(report: Dict[str, Any]) -> None:
+            self.import_status.config(text="")
+            message = (f"{report['files_ok']} de {report['files_total']} arquivos lidos.\n"
+                       f"{report['inserted']} lançamentos inseridos, {report['skipped']} já existentes.")
+            if report["error_report"]:
+                message += f"\n{report['files_failed']} arquivos com erro. Detalhes em: {report['error_report']}"
+            messagebox.showinfo("Importação Concluída", message)
+
+        self.run_async(lambda: importer.import_directory(directory), on_done,
+                       key="import_dir", error_message="Erro na importação")
 
     def _save_lancamento(self) -> None:
         """Coleta e salva os dados do formulário."""
+        loja, cnpj_loja = self._lojas_map.get(self.entries["loja"].get(), ("", ""))
+        fornecedor, cnpj_forn = self._fornecedores_map.get(self.entries["fornecedor"].get(), ("", ""))
         data_to_save: LancamentoData = {
-            'loja': self.entries["loja"].get(),
-            'cnpj_loja': self._lojas_map.get(self.entries["loja"].get(), ""),
-            'fornecedor': self.entries["fornecedor"].get(),
-            'cnpj_forn': self._fornecedores_map.get(self.entries["fornecedor"].get(), ""),
+            'loja': loja,
+            'cnpj_loja': cnpj_loja,
+            'fornecedor': fornecedor,
+            'cnpj_forn': cnpj_forn,
             'documento': self.entries["documento"].get(),
             'nfe': self.entries["nfe"].get(),
             'chave_nfe': self.entries["chave_nfe"].get(),
@@ -263,14 +371,12 @@ class NotaFiscalEntryScreen(BaseScreen):
             messagebox.showerror("Erro de Formato", "Valor inválido ou formato de data incorreto. Use DD/MM/AAAA.")
             return
 
-        try:
-            self.controller.db_manager.insert_lancamento(data_to_save)
+        def on_saved(_: Any) -> None:
             messagebox.showinfo("Sucesso", "Lançamento salvo com sucesso!")
             self._clear_entries()
-        except RuntimeError as e:
-            messagebox.showerror("Erro de Banco de Dados", str(e))
-        except Exception as e:
-            messagebox.showerror("Erro Inesperado", f"Ocorreu um erro: {e}")
+
+        db_manager = self.controller.db_manager
+        self.run_async(lambda: db_manager.insert_lancamento(data_to_save), on_saved)
 
     def _clear_entries(self) -> None:
         """Limpa os campos do formulário."""
@@ -283,6 +389,8 @@ class NotaFiscalEntryScreen(BaseScreen):
 class RelatorioScreen(BaseScreen):
     """Tela para geração de relatórios de notas fiscais."""
 
+    data_dependencies = ("fornecedores",)
+
     def __init__(self, parent: ttk.Frame, controller: "MainApplication", **kwargs: Any) -> None:
         super().__init__(parent, controller, **kwargs)
         self._create_widgets()
@@ -307,24 +415,36 @@ class RelatorioScreen(BaseScreen):
         self._create_label(filter_frame, "Fornecedor:").grid(row=1, column=0, padx=5, pady=5)
         self.fornecedor_combo = ttk.Combobox(filter_frame, state="readonly", width=40)
         self.fornecedor_combo.grid(row=1, column=1, columnspan=2, padx=5, pady=5, sticky="ew")
-        self.load_data()
 
         search_button = ttk.Button(filter_frame, text="Buscar", command=self.carregar)
         search_button.grid(row=1, column=3, padx=5, pady=5, sticky="e")
 
-        cols = [
-            "ID", "Loja", "CNPJ Loja", "Fornecedor", "CNPJ Forn.", "Documento",
-            "NFE", "Chave NFE", "Valor", "Data", "Vencimento", "Observação", "Tipo"
-        ]
-        self.tree = ttk.Treeview(self, columns=cols, show="headings")
-        for col in cols:
-            self.tree.heading(col, text=col.replace("_", " ").title())
-        self.tree.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+        export_button = ttk.Button(filter_frame, text="Exportar", command=self.exportar)
+        export_button.grid(row=1, column=4, padx=5, pady=5, sticky="e")
+
+        self._create_label(filter_frame, "Pesquisar:").grid(row=2, column=0, padx=5, pady=5)
+        self.search_entry = ttk.Entry(filter_frame, width=40)
+        self.search_entry.grid(row=2, column=1, columnspan=2, padx=5, pady=5, sticky="ew")
+        self.search_entry.bind("<Return>", lambda event: self.pesquisar())
+
+        text_search_button = ttk.Button(filter_frame, text="Pesquisar", command=self.pesquisar)
+        text_search_button.grid(row=2, column=3, padx=5, pady=5, sticky="e")
+
+        self.export_status = self._create_label(filter_frame, "")
+        self.export_status.grid(row=3, column=0, columnspan=5, padx=5, sticky="w")
+
+        # Apenas uma janela de linhas fica no Treeview; as demais são buscadas ao rolar.
+        # Os erros das buscas da view aparecem no rodapé dela (ver VirtualReportView._on_error).
+        self.report_view = VirtualReportView(self, submit=lambda fn, on_success, key, on_error: self.run_async(
+            fn, on_success, key=key, on_error=on_error
+        ))
+        self.report_view.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+        self.tree = self.report_view.tree
 
         self.tree.bind("<Double-1>", self._on_double_click)
 
-    def carregar(self) -> None:
-        """Carrega e exibe os lançamentos com base nos filtros."""
+    def _get_filters(self) -> Optional[Dict[str, str]]:
+        """Lê os filtros da tela, com as datas em AAAA-MM-DD. Retorna None se alguma data for inválida."""
         start_date_br = self.start_date_entry.get()
         end_date_br = self.end_date_entry.get()
         fornecedor = self.fornecedor_combo.get()
@@ -333,38 +453,80 @@ class RelatorioScreen(BaseScreen):
             start_date_iso = datetime.strptime(start_date_br, '%d/%m/%Y').strftime('%Y-%m-%d')
             end_date_iso = datetime.strptime(end_date_br, '%d/%m/%Y').strftime('%Y-%m-%d')
             
-            data = self.controller.db_manager.get_lancamentos(
-                start_date=start_date_iso, end_date=end_date_iso, fornecedor=fornecedor
-            )
-            self._update_treeview(data)
         except ValueError:
             messagebox.showerror("Erro de Formato", "Formato de data inválido. Use DD/MM/AAAA.")
-        except RuntimeError as e:
-            messagebox.showerror("Erro de Banco de Dados", str(e))
-        except Exception as e:
-            messagebox.showerror("Erro Inesperado", f"Erro ao carregar relatório: {e}")
+            return None
+
+        return {"start_date": start_date_iso, "end_date": end_date_iso, "fornecedor": fornecedor}
+
+    def carregar(self) -> None:
+        """Carrega e exibe os lançamentos com base nos filtros."""
+        filters = self._get_filters()
+        if filters is None:
+            return
+
+        db_manager = self.controller.db_manager
+        self.report_view.load(
+            lambda before_id, after_id, limit: db_manager.get_lancamentos_page(
+                before_id=before_id, after_id=after_id, limit=limit, compact=True, **filters
+            ),
+            lambda: db_manager.get_lancamentos_totals(**filters),
+        )
+
+    def pesquisar(self) -> None:
+        """
+        Busca textual em fornecedor, loja, documento, NF-e, chave e observação, em todo o período.
+        Com a caixa de pesquisa vazia, volta ao relatório filtrado.
+        """
+        text = self.search_entry.get().strip()
+        if not text:
+            self.carregar()
+            return
+
+        db_manager = self.controller.db_manager
+        self.report_view.load_rows(lambda: db_manager.search_lancamentos(text, limit=SEARCH_LIMIT))
+
+    def exportar(self) -> None:
+        """Exporta os lançamentos filtrados para CSV ou JSONL, fora da thread do Tk."""
+        filters = self._get_filters()
+        if filters is None:
+            return
+
+        path = filedialog.asksaveasfilename(
+            title="Exportar relatório",
+            defaultextension=".csv",
+            filetypes=(
+                ("CSV", "*.csv"), ("CSV compactado", "*.csv.gz"),
+                ("JSON Lines", "*.jsonl"), ("JSON Lines compactado", "*.jsonl.gz"),
+            ),
+        )
+        if not path:
+            return
+
+        from src.services.exporter import LancamentoExporter, ExportProgress
+
+        executor = self.controller.executor
+
+        def on_progress(progress: ExportProgress) -> None:
+            text = f"Exportando: {progress['rows']} lançamentos"
+            executor.post(lambda: self.export_status.config(text=text))
+
+        def on_done(report: Dict[str, Any]) -> None:
+            self.export_status.config(text=f"{report['rows']} lançamentos exportados para {report['path']}")
+
+        exporter = LancamentoExporter(self.controller.db_manager, progress_callback=on_progress)
+        self.export_status.config(text="Exportando...")
+        self.run_async(lambda: exporter.export(path, **filters), on_done, key="export", error_message="Erro ao exportar")
 
     def load_data(self) -> None:
-        """Carrega a lista de fornecedores."""
-        try:
-            fornecedores = self.controller.db_manager.get_entities("fornecedores")
-            self.fornecedor_combo["values"] = [f[0] for f in fornecedores]
-        except RuntimeError as e:
-            messagebox.showerror("Erro de Banco de Dados", str(e))
-        except Exception as e:
-            messagebox.showerror("Erro Inesperado", f"Erro ao carregar fornecedores: {e}")
-
-    def _update_treeview(self, data: List[LancamentoData]) -> None:
-        """Atualiza o Treeview com os dados fornecidos."""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        for row in data:
-            row_values = list(row.values())
-            row_values[8] = f"R$ {row_values[8]:.2f}".replace('.', ',')
-            row_values[9] = datetime.strptime(row_values[9], '%Y-%m-%d').strftime('%d/%m/%Y')
-            row_values[10] = datetime.strptime(row_values[10], '%Y-%m-%d').strftime('%d/%m/%Y') if row_values[10] else ''
-            
-            self.tree.insert("", tk.END, values=row_values, iid=row["id"])
+        """
+        Carrega a lista de fornecedores. O filtro é pelo nome, que inclui todos os cadastros com esse
+        nome, então cada nome aparece uma vez.
+        """
+        db_manager = self.controller.db_manager
+        self.run_async(lambda: db_manager.get_entities("fornecedores"),
+                       lambda fornecedores: self.fornecedor_combo.configure(values=list(dict.fromkeys(f[0] for f in fornecedores))),
+                       key="load", error_message="Erro ao carregar fornecedores")
 
     def _on_double_click(self, event: tk.Event) -> None:
         """Exclui um lançamento ao dar duplo clique."""
@@ -374,11 +536,9 @@ class RelatorioScreen(BaseScreen):
 
         record_id = int(self.tree.item(item_id, "values")[0])
         if messagebox.askyesno("Confirmação", f"Deseja realmente excluir o lançamento ID {record_id}?"):
-            try:
-                self.controller.db_manager.delete_lancamento(record_id)
-                self.tree.delete(item_id)
+            def on_deleted(_: Any) -> None:
+                self.report_view.remove(record_id)
                 messagebox.showinfo("Sucesso", "Lançamento excluído.")
-            except RuntimeError as e:
-                messagebox.showerror("Erro de Banco de Dados", str(e))
-            except Exception as e:
-                messagebox.showerror("Erro Inesperado", f"Erro ao excluir: {e}")
\ No newline at end of file
+
+            db_manager = self.controller.db_manager
+            self.run_async(lambda: db_manager.delete_lancamento(record_id), on_deleted, error_message="Erro ao excluir")
\ No newline at end of file
@@ -0,0 +1,34 @@
+from pathlib import Path
+import pytest
+from benchmarks.bench_analytics import assert_close
+from benchmarks.generators import lancamentos
+from src.analysis.analytics import FinancialAnalytics, SQLFinancialAnalytics
+from src.database.manager import DatabaseManager
+
+METHODS = ("get_financial_summary", "get_monthly_totals", "get_supplier_analysis")
+
+@pytest.fixture
+def db(tmp_path: Path):
+    db = DatabaseManager(db_path=tmp_path / "notas.db")
+    db.insert_lancamentos_many(lancamentos(2000, days=400, suppliers=30))
+    yield db
+    db.close()
+
+@pytest.mark.parametrize("use_rollups", [True, False])
+def test_agregacao_no_banco_igual_a_referencia_em_python(db: DatabaseManager, use_rollups: bool) -> None:
+    reference = FinancialAnalytics(db)
+    sql = SQLFinancialAnalytics(db, use_rollups=use_rollups)
+    rows = db.get_lancamentos()
+    for method in METHODS:
+        assert_close(getattr(reference, method)(rows), getattr(sql, method)(), method)
+
+def test_filtros_de_periodo_e_fornecedor(db: DatabaseManager) -> None:
+    reference = FinancialAnalytics(db)
+    sql = SQLFinancialAnalytics(db)
+    fornecedor = db.get_entities("fornecedores")[0][0]
+    # Período que não cobre meses inteiros, para não vir só das tabelas de resumo.
+    filtros = {"start_date": "2015-02-10", "end_date": "2015-09-20", "fornecedor": fornecedor}
+    rows = db.get_lancamentos(**filtros)
+    assert rows
+    for method in METHODS:
+        assert_close(getattr(reference, method)(rows), getattr(sql, method)(**filtros), method)
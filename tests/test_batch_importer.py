@@ -0,0 +1,39 @@
+from pathlib import Path
+from benchmarks.generators import write_nfe_files
+from src.database.manager import DatabaseManager
+from src.services.batch_importer import BatchXMLImporter
+from src.services.xml_importer import XMLImporter
+
+def _item_ids(db: DatabaseManager) -> list:
+    return [row[0] for row in db._get_connection().execute("SELECT id FROM lancamento_itens ORDER BY id")]
+
+def test_reimportar_xml_repetido_nao_regrava_itens(tmp_path: Path) -> None:
+    write_nfe_files(tmp_path / "lote1", 3, items=2)
+    # A mesma semente gera de novo a primeira nota: mesma chave e mesmos itens.
+    write_nfe_files(tmp_path / "lote2", 1, items=2)
+    db = DatabaseManager(db_path=tmp_path / "notas.db")
+    try:
+        importer = BatchXMLImporter(db, max_workers=0, items=True)
+        report = importer.import_directory(str(tmp_path / "lote1"))
+        assert (report["inserted"], report["items"]) == (3, 6)
+        ids = _item_ids(db)
+
+        report = importer.import_directory(str(tmp_path / "lote2"))
+        assert (report["inserted"], report["skipped"], report["items"]) == (0, 1, 0)
+        # Com INSERT OR REPLACE os itens da nota ignorada seriam regravados com ids novos.
+        assert _item_ids(db) == ids
+    finally:
+        db.close()
+
+def test_pasta_monitorada_grava_so_itens_de_notas_gravadas(tmp_path: Path) -> None:
+    importer = XMLImporter("xpath")
+    data, itens = importer.parse_xml_with_items(str(write_nfe_files(tmp_path / "xml", 1, items=2)[0]))
+    entry = {"caminho": "nfe.xml", "tamanho": 1, "mtime_ns": 1, "hash": "", "status": "ok", "erro": ""}
+    db = DatabaseManager(db_path=tmp_path / "notas.db")
+    try:
+        assert db.record_imported_files([entry], [data], "skip", itens)["items"] == 2
+        ids = _item_ids(db)
+        assert db.record_imported_files([entry], [data], "skip", itens) == {"inserted": 0, "skipped": 1, "failed": 0, "items": 0}
+        assert _item_ids(db) == ids
+    finally:
+        db.close()
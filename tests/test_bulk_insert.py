@@ -0,0 +1,67 @@
+from pathlib import Path
+from typing import Any, Dict
+import pytest
+from src.database.manager import DatabaseManager
+
+def _lancamento(chave: str, valor: float, fornecedor: str = "Forn A", observacao: str = "agua mineral") -> Dict[str, Any]:
+    return {
+        "loja": "Loja", "cnpj_loja": "1", "fornecedor": fornecedor, "cnpj_forn": "11",
+        "documento": "NF-e", "nfe": "1", "chave_nfe": chave, "valor": valor,
+        "data_lancamento": "2024-01-05", "vencimento": None, "observacao": observacao, "tipo": "Entrada",
+    }
+
+def _assert_consistente(db: DatabaseManager) -> None:
+    conn = db._get_connection()
+    assert db.verify_rollups() == []
+    assert conn.execute("INSERT INTO lancamentos_busca (lancamentos_busca) VALUES ('integrity-check')").fetchall() == []
+    conn.commit()
+    assert conn.execute("SELECT COUNT(*) FROM carga_em_lote").fetchone()[0] == 0
+
+def test_carga_em_lote_mantem_resumos_e_busca(tmp_path: Path) -> None:
+    db = DatabaseManager(db_path=tmp_path / "notas.db")
+    try:
+        # A mesma chave duas vezes no lote: a segunda substitui uma linha ainda não somada.
+        db.insert_lancamentos_many(
+            [_lancamento("A", 1.0), _lancamento("B", 2.0), _lancamento("A", 3.0, "Forn B"), _lancamento("", 4.0)],
+            on_conflict="replace",
+        )
+        _assert_consistente(db)
+        assert db.aggregate_by_fornecedor(use_rollups=False) == {"Forn A": 6.0, "Forn B": 3.0}
+
+        results = db.insert_lancamentos_many([_lancamento("B", 5.0), _lancamento("C", 6.0), _lancamento("C", 7.0)], on_conflict="fail")
+        assert results == [{"inserted": 1, "skipped": 0, "failed": 2, "items": 0}]
+        _assert_consistente(db)
+
+        db.insert_lancamento(_lancamento("D", 8.0, observacao="cafe"))
+        # O id 1 foi substituído no primeiro lote; o 2 é a chave B.
+        db.delete_lancamento(2)
+        _assert_consistente(db)
+        assert len(db.search_lancamentos("agua")) == 3
+        assert len(db.search_lancamentos("cafe")) == 1
+    finally:
+        db.close()
+
+def test_lotes_de_um_gerador_com_chaves_repetidas(tmp_path: Path) -> None:
+    db = DatabaseManager(db_path=tmp_path / "notas.db")
+    try:
+        consumidos = []
+
+        def gerar():
+            for n in range(7):
+                consumidos.append(n)
+                yield _lancamento(f"K{n % 5}", float(n))
+
+        # 7 lançamentos em lotes de 3: K0 volta no segundo lote e K1 no terceiro, e são ignoradas.
+        results = db.insert_lancamentos_many(gerar(), batch_size=3)
+        assert [r["inserted"] for r in results] == [3, 2, 0]
+        assert [r["skipped"] for r in results] == [0, 1, 1]
+        assert consumidos == list(range(7))
+        assert sorted(row["valor"] for row in db.get_lancamentos()) == [0.0, 1.0, 2.0, 3.0, 4.0]
+        _assert_consistente(db)
+
+        with pytest.raises(ValueError):
+            db.insert_lancamentos_many([], batch_size=0)
+        with pytest.raises(ValueError):
+            db.insert_lancamentos_many([], on_conflict="ignorar")
+    finally:
+        db.close()
@@ -0,0 +1,64 @@
+from pathlib import Path
+from typing import Any, Dict
+from src.database import manager
+from src.database.manager import DatabaseManager
+
+def _lancamento(chave: str, valor: float = 10.0) -> Dict[str, Any]:
+    return {
+        "loja": "Loja", "cnpj_loja": "1", "fornecedor": "Forn", "cnpj_forn": "11",
+        "documento": "NF-e", "nfe": "1", "chave_nfe": chave, "valor": valor,
+        "data_lancamento": "2024-01-10", "vencimento": None, "observacao": None, "tipo": "Entrada",
+    }
+
+def test_inclusoes_sao_append_only_e_escritas_de_fora_sao_external(tmp_path: Path) -> None:
+    db = DatabaseManager(db_path=tmp_path / "notas.db")
+    outro = DatabaseManager(db_path=tmp_path / "notas.db")
+    try:
+        version = db.get_changes()["version"]
+        assert db.get_changes(version) == {"version": version, "tables": [], "external": False, "append_only": True}
+
+        db.insert_lancamento(_lancamento("A"))
+        db.insert_lancamentos_many([_lancamento("B"), _lancamento("A", 99.0)])
+        changes = db.get_changes(version)
+        assert "lancamentos" in changes["tables"]
+        assert (changes["external"], changes["append_only"]) == (False, True)
+
+        # Substituir ou excluir muda linhas que a tela já mostrou.
+        version = changes["version"]
+        db.insert_lancamentos_many([_lancamento("A", 99.0)], on_conflict="replace")
+        changes = db.get_changes(version)
+        assert (changes["external"], changes["append_only"]) == (False, False)
+        version = changes["version"]
+        db.delete_lancamento(db.get_lancamentos()[0]["id"])
+        assert db.get_changes(version)["append_only"] is False
+
+        # Um commit de outra conexão não tem registro: aparece como external, sem tabelas.
+        version = db.get_changes()["version"]
+        outro.insert_lancamento(_lancamento("C"))
+        changes = db.get_changes(version)
+        assert changes["version"] > version
+        assert (changes["tables"], changes["external"], changes["append_only"]) == ([], True, False)
+        assert db.get_changes(changes["version"])["tables"] == []
+
+        # As escritas de um grupo só são registradas depois do commit, e como do próprio gerenciador.
+        version = changes["version"]
+        db.run_write_batch([lambda: db.insert_lancamento(_lancamento("D")), lambda: db.insert_lancamento(_lancamento("E"))])
+        changes = db.get_changes(version)
+        assert "lancamentos" in changes["tables"]
+        assert (changes["external"], changes["append_only"]) == (False, True)
+    finally:
+        outro.close()
+        db.close()
+
+def test_registro_descartado_vira_alteracao_completa(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(manager, "CHANGE_LOG_SIZE", 2)
+    db = DatabaseManager(db_path=tmp_path / "notas.db")
+    try:
+        version = db.get_changes()["version"]
+        for chave in "ABC":
+            db.insert_lancamento(_lancamento(chave))
+        changes = db.get_changes(version)
+        assert (changes["external"], changes["append_only"]) == (True, False)
+        assert "lancamentos" in changes["tables"]
+    finally:
+        db.close()
@@ -0,0 +1,7 @@
+from src.cli import build_parser
+from src.database.manager import DEFAULT_PROFILE
+
+def test_import_usa_o_perfil_padrao() -> None:
+    parser = build_parser()
+    assert parser.parse_args(["import", "notas"]).profile == DEFAULT_PROFILE
+    assert parser.parse_args(["--profile", "importacao", "import", "notas"]).profile == "importacao"
@@ -0,0 +1,36 @@
+from pathlib import Path
+from typing import Any, Dict
+import pytest
+
+pytest.importorskip("numpy")
+
+from src.analysis.columnar import ColumnarFinancialAnalytics
+from src.database.manager import DatabaseManager
+
+def _lancamento(chave: str, valor: float) -> Dict[str, Any]:
+    return {
+        "loja": "Loja", "cnpj_loja": "1", "fornecedor": "Forn", "cnpj_forn": "2",
+        "documento": "NF-e", "nfe": "1", "chave_nfe": chave, "valor": valor,
+        "data_lancamento": "2024-01-05", "vencimento": None, "observacao": None, "tipo": "Entrada",
+    }
+
+def test_snapshot_recarrega_apos_escrita_de_outro_processo(tmp_path: Path) -> None:
+    db_path = tmp_path / "notas.db"
+    db = DatabaseManager(db_path=db_path)
+    # Outro gerenciador no mesmo arquivo faz o papel da CLI, da pasta monitorada ou do servidor.
+    outro = DatabaseManager(db_path=db_path)
+    try:
+        db.insert_lancamento(_lancamento("A", 10.0))
+        analytics = ColumnarFinancialAnalytics(db)
+        assert analytics.get_financial_summary()["total_entradas"] == 10.0
+        snapshot = analytics.snapshot()
+        assert analytics.snapshot() is snapshot
+
+        outro.insert_lancamentos_many([_lancamento("B", 5.0)])
+        assert analytics.get_financial_summary()["total_entradas"] == 15.0
+
+        db.insert_lancamento(_lancamento("C", 1.0))
+        assert analytics.get_financial_summary()["total_entradas"] == 16.0
+    finally:
+        outro.close()
+        db.close()
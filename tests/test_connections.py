@@ -0,0 +1,39 @@
+import threading
+from pathlib import Path
+from typing import Any, Dict, List
+import pytest
+from src.database.manager import DatabaseManager, PRAGMA_PROFILES
+
+# Valores que o PRAGMA devolve para cada nível de synchronous.
+SYNCHRONOUS = {"OFF": 0, "NORMAL": 1, "FULL": 2}
+
+def _pragmas(db: DatabaseManager) -> Dict[str, Any]:
+    conn = db._get_connection()
+    return {name: conn.execute(f"PRAGMA {name}").fetchone()[0] for name in ("journal_mode", "synchronous", "cache_size", "recursive_triggers")}
+
+@pytest.mark.parametrize("profile", sorted(PRAGMA_PROFILES))
+def test_cada_thread_tem_sua_conexao_com_o_perfil(tmp_path: Path, profile: str) -> None:
+    db = DatabaseManager(profile=profile, db_path=tmp_path / "notas.db")
+    try:
+        expected = PRAGMA_PROFILES[profile]
+        main_conn = db._get_connection()
+        assert db._get_connection() is main_conn
+
+        seen: List[Any] = []
+
+        def worker() -> None:
+            seen.append((db._get_connection(), _pragmas(db)))
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        (worker_conn, pragmas), = seen
+        assert worker_conn is not main_conn
+        for values in (_pragmas(db), pragmas):
+            assert values["journal_mode"] == expected["journal_mode"].lower()
+            assert values["synchronous"] == SYNCHRONOUS[expected["synchronous"]]
+            assert values["cache_size"] == expected["cache_size"]
+            assert values["recursive_triggers"] == 1
+    finally:
+        db.close()
@@ -0,0 +1,51 @@
+import csv
+import gzip
+import json
+from pathlib import Path
+import pytest
+from benchmarks.generators import lancamentos
+from src.database.manager import DatabaseManager
+from src.services.exporter import EXPORT_COLUMNS, LancamentoExporter, detect_format
+
+@pytest.fixture
+def db(tmp_path: Path):
+    db = DatabaseManager(db_path=tmp_path / "notas.db")
+    db.insert_lancamentos_many(lancamentos(300, days=90, suppliers=5))
+    yield db
+    db.close()
+
+def _as_csv(value: object) -> str:
+    return "" if value is None else str(value)
+
+def test_csv_igual_aos_lancamentos_do_banco(db: DatabaseManager, tmp_path: Path) -> None:
+    path = tmp_path / "lancamentos.csv"
+    # Blocos pequenos, para a leitura passar por várias idas ao cursor.
+    report = LancamentoExporter(db, chunk_size=64).export(str(path))
+
+    expected = db.get_lancamentos()
+    assert report["rows"] == len(expected) == 300
+    assert (report["format"], report["compressed"]) == ("csv", False)
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f, delimiter=";")
+        assert tuple(next(reader)) == EXPORT_COLUMNS
+        exported = list(reader)
+    assert exported == [[_as_csv(row[column]) for column in EXPORT_COLUMNS] for row in expected]
+    assert not Path(f"{path}.tmp").exists()
+
+def test_jsonl_compactado_com_filtros(db: DatabaseManager, tmp_path: Path) -> None:
+    path = tmp_path / "lancamentos.jsonl.gz"
+    fornecedor = db.get_entities("fornecedores")[0][0]
+    filtros = {"start_date": "2015-01-10", "end_date": "2015-02-20", "fornecedor": fornecedor}
+    report = LancamentoExporter(db, chunk_size=7).export(str(path), **filtros)
+
+    expected = db.get_lancamentos(**filtros)
+    assert expected
+    assert (report["format"], report["compressed"], report["rows"]) == ("jsonl", True, len(expected))
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == expected
+
+def test_formato_desconhecido(db: DatabaseManager, tmp_path: Path) -> None:
+    assert detect_format("a.CSV.GZ") == ("csv", True)
+    with pytest.raises(ValueError):
+        LancamentoExporter(db).export(str(tmp_path / "lancamentos.xlsx"))
+    assert list(tmp_path.glob("lancamentos.*")) == []
@@ -0,0 +1,48 @@
+import os
+from pathlib import Path
+from typing import List
+from benchmarks.generators import write_nfe_files
+from src.database.manager import DatabaseManager
+from src.services.folder_watcher import FolderWatcher, WatchBatch
+
+def _watcher(db: DatabaseManager, directory: Path, batches: List[WatchBatch]) -> FolderWatcher:
+    # Sem espera de estabilização e sempre com varredura completa: cada poll vê todos os arquivos.
+    return FolderWatcher(db, str(directory), settle_time=0, full_scan_interval=0, batch_size=3, on_batch=batches.append)
+
+def _total(batches: List[WatchBatch], key: str) -> int:
+    return sum(batch[key] for batch in batches)  # type: ignore[literal-required]
+
+def test_arquivos_ja_importados_nao_sao_lidos_de_novo(tmp_path: Path) -> None:
+    pasta = tmp_path / "xml"
+    paths = write_nfe_files(pasta, 4, items=2) + write_nfe_files(pasta / "filial", 2, items=2, seed=7)
+    (pasta / "quebrado.xml").write_text("<nfeProc>", encoding="utf-8")
+
+    db = DatabaseManager(db_path=tmp_path / "notas.db")
+    try:
+        batches: List[WatchBatch] = []
+        assert _watcher(db, pasta, batches).poll() == 7
+        assert (_total(batches, "inserted"), _total(batches, "errors")) == (6, 1)
+        assert len(db.get_lancamentos()) == 6
+
+        # Um novo monitor (ex.: depois de reiniciar) parte do controle gravado no banco.
+        batches.clear()
+        watcher = _watcher(db, pasta, batches)
+        assert watcher.poll() == 0
+        assert batches == []
+
+        # Mtime alterado com o mesmo conteúdo: o controle é atualizado sem reimportar.
+        stat = paths[0].stat()
+        os.utime(paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns - 10**9))
+        assert watcher.poll() == 1
+        assert (_total(batches, "unchanged"), _total(batches, "inserted")) == (1, 0)
+        assert watcher.poll() == 0
+
+        # Conteúdo novo no mesmo caminho é importado de novo (aqui, a nota de outro arquivo, que é substituída).
+        batches.clear()
+        paths[1].write_text(paths[4].read_text(encoding="utf-8"), encoding="utf-8")
+        assert watcher.poll() == 1
+        assert (_total(batches, "unchanged"), _total(batches, "inserted")) == (0, 1)
+        assert len(db.get_lancamentos()) == 6
+        assert _watcher(db, pasta, []).poll() == 0
+    finally:
+        db.close()
@@ -0,0 +1,50 @@
+import threading
+from pathlib import Path
+from typing import Any, List, Sequence
+from src.database.instrumentation import QueryInstrumentation
+from src.database.manager import DatabaseManager
+
+def test_log_de_queries_lentas_com_plano(tmp_path: Path) -> None:
+    db = DatabaseManager(db_path=tmp_path / "notas.db")
+    try:
+        instrumentation = db.enable_instrumentation(slow_threshold_ms=0)
+        db.get_lancamentos(fornecedor="Forn")
+        slow = instrumentation.slow_queries()
+        assert slow and all(entry["ms"] >= 0 for entry in slow)
+        entry = next(entry for entry in slow if "fornecedor" in entry["query"])
+        assert entry["params"] == "('Forn',)"
+        assert entry["plan"] and not entry["plan"][0].startswith("(plano indisponível")
+        assert any(stat["calls"] >= 1 for stat in instrumentation.stats())
+    finally:
+        db.close()
+
+def test_registro_concorrente_guarda_todas_as_queries_lentas() -> None:
+    explained: List[str] = []
+
+    def explain(query: str, params: Sequence[Any]) -> List[str]:
+        explained.append(query)
+        return [f"SCAN {query}"]
+
+    instrumentation = QueryInstrumentation(slow_threshold_ms=1, slow_log_size=10_000, explain=explain)
+    queries = [f"SELECT {n} FROM lancamentos" for n in range(5)]
+
+    def worker() -> None:
+        for _ in range(200):
+            for query in queries:
+                instrumentation.record(query, (), 0.5, 1)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    slow = instrumentation.slow_queries()
+    assert len(slow) == 8 * 200 * len(queries)
+    # Cada formato fica com um único plano, mesmo que duas threads o tenham calculado juntas.
+    assert all(entry["plan"] == [f"SCAN {entry['query']}"] for entry in slow)
+    assert sorted(set(explained)) == sorted(queries)
+    assert sum(stat["calls"] for stat in instrumentation.stats()) == len(slow)
+
+    instrumentation.reset()
+    assert instrumentation.slow_queries() == [] and instrumentation.stats() == []
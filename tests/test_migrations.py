@@ -0,0 +1,94 @@
+import logging
+import sqlite3
+from pathlib import Path
+from src.database.manager import DatabaseManager
+
+# Esquema do banco antes das migrações (PRAGMA user_version = 0), sem índices.
+BASELINE_SCHEMA = """
+    CREATE TABLE lojas (id INTEGER PRIMARY KEY AUTOINCREMENT, nome TEXT NOT NULL UNIQUE, cnpj TEXT NOT NULL UNIQUE);
+    CREATE TABLE fornecedores (id INTEGER PRIMARY KEY AUTOINCREMENT, nome TEXT NOT NULL UNIQUE, cnpj TEXT NOT NULL UNIQUE);
+    CREATE TABLE lancamentos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        loja TEXT, cnpj_loja TEXT, fornecedor TEXT, cnpj_forn TEXT,
+        documento TEXT, nfe TEXT, chave_nfe TEXT,
+        valor REAL NOT NULL, data_lancamento TEXT, vencimento TEXT,
+        observacao TEXT, tipo TEXT NOT NULL
+    );
+"""
+
+def _baseline_db(path: Path, rows: list) -> None:
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.executemany(
+        "INSERT INTO lancamentos (loja, cnpj_loja, fornecedor, cnpj_forn, chave_nfe, valor, data_lancamento, tipo) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    conn.commit()
+    conn.close()
+
+def test_migracao_separa_chaves_nfe_duplicadas(tmp_path: Path, caplog) -> None:
+    db_path = tmp_path / "notas.db"
+    _baseline_db(db_path, [
+        ("Loja", "1", "Forn A", "11", "CHAVE1", 100.0, "2024-01-10", "Entrada"),
+        ("Loja", "1", "Forn A", "11", "CHAVE1", 100.0, "2024-01-10", "Entrada"),
+        ("Loja", "1", "Forn B", "22", "CHAVE2", 50.0, "2024-02-10", "Saída"),
+        ("Loja", "1", "Forn A", "11", "CHAVE1", 120.0, "2024-01-10", "Saída"),
+        ("Loja", "1", "Forn B", "22", "", 10.0, "2024-02-11", "Saída"),
+        ("Loja", "1", "Forn B", "22", "", 10.0, "2024-02-11", "Saída"),
+    ])
+
+    with caplog.at_level(logging.WARNING, logger="src.database.migrations"):
+        db = DatabaseManager(db_path=db_path)
+    try:
+        assert db.schema_version() >= 2
+        ids = sorted(row["id"] for row in db.get_lancamentos())
+        # Fica o menor id de cada chave; lançamentos sem chave não são tocados.
+        assert ids == [1, 3, 5, 6]
+        assert "Lançamento 2 movido para lancamentos_duplicados" in caplog.text
+        assert "Lançamento 4 movido para lancamentos_duplicados" in caplog.text
+        # As cópias, mesmo com valor e tipo diferentes, ficam guardadas com o id do lançamento mantido.
+        duplicados = db._get_connection().execute(
+            "SELECT id, chave_nfe, valor, tipo, id_mantido FROM lancamentos_duplicados ORDER BY id"
+        ).fetchall()
+        assert [tuple(row) for row in duplicados] == [(2, "CHAVE1", 100.0, "Entrada", 1), (4, "CHAVE1", 120.0, "Saída", 1)]
+        assert db.aggregate_by_tipo() == {"Entrada": (100.0, 1), "Saída": (70.0, 3)}
+        assert db.verify_rollups() == []
+    finally:
+        db.close()
+
+def test_normalizacao_de_datas_continua_de_onde_parou(tmp_path: Path) -> None:
+    from src.database.migrations import _normalizar_datas
+
+    db_path = tmp_path / "notas.db"
+    datas = ["10-01-2024", "11-01-2024", "12-01-2024", "31-02-2024", "2024-03-05", "13-01-2024"]
+    _baseline_db(db_path, [("Loja", "1", "Forn", "11", None, 1.0, data, "Saída") for data in datas])
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    # Interrompe a conversão no bloco que contém o lançamento 3.
+    conn.execute(
+        """
+        CREATE TRIGGER interrompe BEFORE UPDATE OF data_lancamento ON lancamentos WHEN NEW.id = 3
+        BEGIN SELECT RAISE(ABORT, 'interrompido'); END
+        """
+    )
+    try:
+        _normalizar_datas(conn, chunk_size=2)
+    except sqlite3.DatabaseError as e:
+        assert "interrompido" in str(e)
+    else:
+        raise AssertionError("a conversão deveria ter sido interrompida")
+
+    assert conn.execute("SELECT ultimo_id FROM migracao_progresso WHERE versao = 3").fetchone() == (2,)
+    assert [r[0] for r in conn.execute("SELECT data_lancamento FROM lancamentos ORDER BY id")] == [
+        "2024-01-10", "2024-01-11", "12-01-2024", "31-02-2024", "2024-03-05", "13-01-2024",
+    ]
+
+    conn.execute("DROP TRIGGER interrompe")
+    _normalizar_datas(conn, chunk_size=2)
+
+    # Os blocos já convertidos não são refeitos e datas inexistentes ficam como estão.
+    assert [r[0] for r in conn.execute("SELECT data_lancamento FROM lancamentos ORDER BY id")] == [
+        "2024-01-10", "2024-01-11", "2024-01-12", "31-02-2024", "2024-03-05", "2024-01-13",
+    ]
+    assert conn.execute("SELECT COUNT(*) FROM migracao_progresso").fetchone()[0] == 0
+    conn.close()
@@ -0,0 +1,40 @@
+from pathlib import Path
+from typing import Any, Dict
+import pytest
+from src.database import items
+from src.database.manager import DatabaseManager
+
+def _lancamento(chave: str, valor: float, data: str) -> Dict[str, Any]:
+    return {
+        "loja": "Loja", "cnpj_loja": "1", "fornecedor": "Forn", "cnpj_forn": "2",
+        "documento": "NF-e", "nfe": "1", "chave_nfe": chave, "valor": valor,
+        "data_lancamento": data, "vencimento": None, "observacao": None, "tipo": "Entrada",
+    }
+
+def _item(chave: str) -> Dict[str, Any]:
+    item: Dict[str, Any] = {column: None for column in items.ITEM_COLUMNS}
+    item.update(chave_nfe=chave, n_item=1, descricao="Agua", quantidade=1.0, valor_total=10.0)
+    return item
+
+def test_excluir_lancamento_de_ano_arquivado(tmp_path: Path) -> None:
+    db = DatabaseManager(db_path=tmp_path / "notas.db")
+    try:
+        db.insert_lancamentos_many([
+            _lancamento("A", 10.0, "2020-03-01"), _lancamento("B", 20.0, "2020-03-02"), _lancamento("C", 5.0, "2021-01-01"),
+        ])
+        db.insert_itens_many([_item("A"), _item("B")])
+        archived_id = next(row["id"] for row in db.get_lancamentos() if row["chave_nfe"] == "A")
+        assert db.archive_year(2020) == 2
+
+        db.delete_lancamento(archived_id)
+        assert sorted(row["chave_nfe"] for row in db.get_lancamentos()) == ["B", "C"]
+        assert db.aggregate_by_fornecedor() == {"Forn": 25.0}
+        assert db.verify_rollups() == []
+        conn = db._get_connection()
+        assert [row[0] for row in conn.execute("SELECT chave_nfe FROM arquivo_2020.lancamento_itens")] == ["B"]
+        assert conn.execute("SELECT linhas FROM particoes WHERE ano = 2020").fetchone()[0] == 1
+
+        with pytest.raises(ValueError):
+            db.delete_lancamento(archived_id)
+    finally:
+        db.close()
@@ -0,0 +1,54 @@
+import threading
+import time
+from typing import Any, Callable, List
+from src.ui.query_executor import QueryExecutor
+
+class _FakeRoot:
+    """Guarda os after() para o teste fazer o papel do mainloop do Tk."""
+
+    def __init__(self) -> None:
+        self.scheduled: List[Callable[[], None]] = []
+
+    def after(self, ms: int, callback: Callable[[], None]) -> None:
+        self.scheduled.append(callback)
+
+def _drain(root: _FakeRoot, executor: QueryExecutor, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while root.scheduled and time.monotonic() < deadline:
+        root.scheduled.pop(0)()
+        time.sleep(0.001)
+    assert not executor.busy
+
+def test_resultados_chegam_na_thread_do_tk_e_a_chave_cancela_a_anterior() -> None:
+    root = _FakeRoot()
+    busy: List[bool] = []
+    executor = QueryExecutor(root, workers=2, poll_interval_ms=1, on_busy_change=busy.append)  # type: ignore[arg-type]
+    main_thread = threading.current_thread()
+    release = threading.Event()
+    delivered: List[Any] = []
+
+    def on_success(result: Any) -> None:
+        assert threading.current_thread() is main_thread
+        delivered.append(result)
+
+    def slow() -> str:
+        release.wait(5)
+        return "antiga"
+
+    def fail() -> None:
+        raise RuntimeError("Erro no banco de dados: locked")
+
+    try:
+        executor.submit(slow, on_success, key="relatorio")
+        executor.submit(lambda: "nova", on_success, key="relatorio")
+        executor.submit(fail, on_success, on_error=lambda e: delivered.append(str(e)))
+        executor.submit(lambda: "verificacao", on_success, quiet=True)
+        assert executor.busy and busy == [True]
+        release.set()
+        _drain(root, executor)
+
+        # A busca substituída pela mesma chave não entrega resultado.
+        assert sorted(delivered) == ["Erro no banco de dados: locked", "nova", "verificacao"]
+        assert busy == [True, False]
+    finally:
+        executor.shutdown()
@@ -0,0 +1,150 @@
+import asyncio
+import http.client
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+import pytest
+from src.database.manager import DatabaseManager, DuplicateEntityError
+from src.remote.client import RemoteDatabaseManager
+from src.remote.server import FiscalizeServer, serve
+
+@pytest.fixture
+def remote(tmp_path: Path) -> Iterator[RemoteDatabaseManager]:
+    """Servidor em uma thread, com um banco temporário, e um cliente apontando para ele."""
+    db = DatabaseManager(db_path=tmp_path / "notas.db")
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    port: List[int] = []
+
+    def on_ready(bound_port: int) -> None:
+        port.append(bound_port)
+        ready.set()
+
+    task = loop.create_task(serve(db, "127.0.0.1", 0, read_workers=2, ready=on_ready))
+    thread = threading.Thread(target=lambda: loop.run_until_complete(asyncio.gather(task, return_exceptions=True)))
+    thread.start()
+    assert ready.wait(10)
+    client = RemoteDatabaseManager(f"http://127.0.0.1:{port[0]}")
+    try:
+        yield client
+    finally:
+        client.close()
+        loop.call_soon_threadsafe(task.cancel)
+        thread.join(10)
+        loop.close()
+        db.close()
+
+class _FakeResponse:
+    status = 200
+
+    def read(self) -> bytes:
+        return b'{"result": 7}'
+
+class _DropsFirstRequest:
+    """Conexão que cai depois de enviar a primeira requisição, como um servidor reiniciado."""
+
+    def __init__(self) -> None:
+        self.requests: List[str] = []
+
+    def request(self, method: str, path: str, body: Any, headers: Any) -> None:
+        self.requests.append(path)
+
+    def getresponse(self) -> _FakeResponse:
+        if len(self.requests) == 1:
+            raise http.client.RemoteDisconnected("Remote end closed connection without response")
+        return _FakeResponse()
+
+    def close(self) -> None:
+        pass
+
+def _client() -> Tuple[RemoteDatabaseManager, _DropsFirstRequest]:
+    client = RemoteDatabaseManager("http://servidor:8765")
+    conn = _DropsFirstRequest()
+    client._local.conn = conn
+    return client, conn
+
+def test_leitura_e_refeita_apos_queda_da_conexao() -> None:
+    client, conn = _client()
+    assert client.schema_version() == 7
+    assert conn.requests == ["/db/schema_version", "/db/schema_version"]
+
+def test_escrita_nao_e_reenviada_apos_queda_da_conexao() -> None:
+    client, conn = _client()
+    with pytest.raises(RuntimeError, match="comunicação"):
+        client.delete_lancamento(1)
+    # O servidor pode ter gravado antes de a conexão cair: reenviar poderia gravar duas vezes.
+    assert conn.requests == ["/db/delete_lancamento"]
+
+def test_cadastro_duplicado_chega_ao_cliente_com_o_mesmo_tipo(remote: RemoteDatabaseManager) -> None:
+    remote.insert_entity("fornecedores", "Distribuidora", "11")
+    with pytest.raises(DuplicateEntityError):
+        remote.insert_entity("fornecedores", "Distribuidora", "22")
+    assert remote.get_entities("fornecedores") == [("Distribuidora", "11")]
+
+def _lancamento(n: int) -> Dict[str, Any]:
+    return {
+        "loja": "Loja", "cnpj_loja": "1", "fornecedor": "Forn", "cnpj_forn": "11",
+        "documento": "NF-e", "nfe": str(n), "chave_nfe": f"CHAVE{n}", "valor": float(n),
+        "data_lancamento": "2024-01-10", "vencimento": None, "observacao": None, "tipo": "Entrada",
+    }
+
+def _health(client: RemoteDatabaseManager) -> Dict[str, Any]:
+    conn = http.client.HTTPConnection(client._host, client._port, timeout=10)
+    try:
+        conn.request("GET", "/health")
+        return json.loads(conn.getresponse().read())  # type: ignore[no-any-return]
+    finally:
+        conn.close()
+
+def test_escritas_e_leituras_simultaneas(remote: RemoteDatabaseManager) -> None:
+    remote.insert_entity("fornecedores", "Distribuidora", "99")
+    errors: List[BaseException] = []
+    totals: List[Dict[str, Any]] = []
+
+    def write(n: int) -> None:
+        try:
+            if n == 0:
+                remote.insert_entity("fornecedores", "Distribuidora", "98")
+            else:
+                remote.insert_lancamento(_lancamento(n))
+        except BaseException as e:
+            errors.append(e)
+
+    def read() -> None:
+        for _ in range(5):
+            totals.append(remote.get_lancamentos_totals())
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(13)] + [threading.Thread(target=read)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    # A escrita que falha é desfeita sozinha; as do mesmo grupo são gravadas.
+    assert [type(e) for e in errors] == [DuplicateEntityError]
+    assert sorted(row["valor"] for row in remote.get_lancamentos()) == [float(n) for n in range(1, 13)]
+    assert len(totals) == 5
+    health = _health(remote)
+    assert health["writes"] == 14
+    assert 1 <= health["write_batches"] <= 14
+
+def test_escritas_na_fila_sao_gravadas_em_um_so_grupo(tmp_path: Path) -> None:
+    db = DatabaseManager(db_path=tmp_path / "notas.db")
+    server = FiscalizeServer(db, read_workers=1)
+
+    async def run() -> List[Any]:
+        server._writer_task = asyncio.create_task(server._write_loop())
+        calls = [server.call("db", "insert_lancamento", {"data": _lancamento(n)}) for n in range(1, 5)]
+        calls.insert(2, server.call("db", "insert_entity", {"table": "lojas", "nome": "Loja", "cnpj": "2"}))
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    try:
+        results = asyncio.run(run())
+        assert isinstance(results[2], DuplicateEntityError)
+        assert results[:2] + results[3:] == [None] * 4
+        assert (server.writes, server.write_batches) == (5, 1)
+        assert len(db.get_lancamentos()) == 4
+    finally:
+        server.close()
+        db.close()
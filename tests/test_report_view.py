@@ -0,0 +1,110 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.ui.report_view import VirtualReportView, _run_now
+
+class _FakeTree:
+    """O mínimo do ttk.Treeview usado pela paginação, sem precisar de um display."""
+
+    def __init__(self) -> None:
+        self.rows: List[str] = []
+
+    def get_children(self) -> tuple:
+        return tuple(self.rows)
+
+    def insert(self, parent: str, index: Any, iid: str, values: Any) -> None:
+        self.rows.insert(0 if index == 0 else len(self.rows), iid)
+
+    def delete(self, *iids: str) -> None:
+        self.rows = [iid for iid in self.rows if iid not in iids]
+
+    def see(self, iid: str) -> None:
+        pass
+
+class _FakeLabel:
+    def __init__(self) -> None:
+        self.text = ""
+
+    def config(self, text: str) -> None:
+        self.text = text
+
+def _row(record_id: int) -> Dict[str, Any]:
+    return {
+        "id": record_id, "loja": "Loja", "cnpj_loja": "1", "fornecedor": "Forn", "cnpj_forn": "2",
+        "documento": "", "nfe": "", "chave_nfe": "", "valor": 1.0, "data_lancamento": "2024-01-01",
+        "vencimento": None, "observacao": None, "tipo": "Entrada",
+    }
+
+def _view() -> VirtualReportView:
+    view = VirtualReportView.__new__(VirtualReportView)
+    view.submit = _run_now
+    view.page_size = 2
+    view.max_rows = 6
+    view._fetch_page = None
+    view._fetch_totals = None
+    view._more_below = view._more_above = view._loading = view._failed = False
+    view._generation = 0
+    view.tree = _FakeTree()
+    view.totals_label = _FakeLabel()
+    return view
+
+def test_falha_ao_buscar_pagina_nao_trava_a_rolagem() -> None:
+    failures = {"count": 1}
+
+    def fetch_page(before_id: Optional[int], after_id: Optional[int], limit: int) -> List[Dict[str, Any]]:
+        if before_id is not None and failures["count"]:
+            failures["count"] -= 1
+            raise RuntimeError("Erro no banco de dados: database is locked")
+        start = 10 if before_id is None else before_id - 1
+        return [_row(record_id) for record_id in range(start, start - limit, -1)]
+
+    view = _view()
+    view.load(fetch_page, lambda: {"count": 10, "total_entradas": 10.0, "total_saidas": 0.0})
+    assert view.tree.rows == ["10", "9"]
+
+    view._loading = True
+    view._load_below()
+    assert view._loading is False
+    assert "database is locked" in view.totals_label.text
+    assert view.tree.rows == ["10", "9"]
+
+    # A rolagem seguinte tenta de novo e o rodapé volta a mostrar os totais.
+    view._loading = True
+    view._load_below()
+    assert view._loading is False
+    assert view.tree.rows == ["10", "9", "8", "7"]
+    assert view.totals_label.text.startswith("10 lançamento(s)")
+
+def test_falha_ao_buscar_pagina_acima_libera_a_rolagem() -> None:
+    def fetch_page(before_id: Optional[int], after_id: Optional[int], limit: int) -> List[Dict[str, Any]]:
+        if after_id is not None:
+            raise RuntimeError("cancelado")
+        return [_row(5), _row(4)]
+
+    view = _view()
+    view.load(fetch_page)
+    view._loading = True
+    view._load_above()
+    assert view._loading is False
+    assert "cancelado" in view.totals_label.text
+
+def test_totais_pendentes_nao_sobrescrevem_o_rodape_da_busca() -> None:
+    pending: List[Tuple[str, Callable[[], Any], Callable[[Any], None]]] = []
+
+    def deferred(fn: Callable[[], Any], on_success: Callable[[Any], None], key: str, on_error: Callable[[Exception], None]) -> None:
+        pending.append((key, fn, on_success))
+
+    view = _view()
+    view.submit = deferred
+    view.load(lambda before_id, after_id, limit: [_row(2), _row(1)], lambda: {"count": 2, "total_entradas": 2.0, "total_saidas": 0.0})
+    stale = [task for task in pending if task[0] == "totals"]
+    assert stale
+
+    view.load_rows(lambda: [_row(1)])
+    key, fn, on_success = pending[-1]
+    on_success(fn())
+    assert view.totals_label.text == "1 resultado(s)"
+
+    # Os totais do relatório chegam depois da busca e são descartados.
+    for _, fn, on_success in stale:
+        on_success(fn())
+    assert view.totals_label.text == "1 resultado(s)"
+    assert view.tree.rows == ["1"]
@@ -0,0 +1,39 @@
+from pathlib import Path
+from typing import Any, Dict
+from src.database.manager import DatabaseManager
+
+def _lancamento(chave: str, valor: float, data: str, fornecedor: str = "Forn A", tipo: str = "Entrada") -> Dict[str, Any]:
+    return {
+        "loja": "Loja", "cnpj_loja": "1", "fornecedor": fornecedor, "cnpj_forn": fornecedor[-1],
+        "documento": "NF-e", "nfe": "1", "chave_nfe": chave, "valor": valor,
+        "data_lancamento": data, "vencimento": None, "observacao": None, "tipo": tipo,
+    }
+
+def test_resumos_acompanham_insercao_exclusao_e_substituicao(tmp_path: Path) -> None:
+    db = DatabaseManager(db_path=tmp_path / "notas.db")
+    try:
+        db.insert_lancamento(_lancamento("A", 10.10, "2024-01-05"))
+        db.insert_lancamento(_lancamento("B", 20.20, "2024-01-20", "Forn B", "Saída"))
+        db.insert_lancamento(_lancamento("", 0.7, "2024-02-01"))
+        assert db.verify_rollups() == []
+        assert db.aggregate_by_tipo() == {"Entrada": (10.8, 2), "Saída": (20.2, 1)}
+
+        # Substituir pela mesma chave tira o lançamento antigo do mês e do fornecedor antigos.
+        db.insert_lancamentos_many([_lancamento("A", 5.0, "2024-03-01", "Forn B")], on_conflict="replace")
+        assert db.verify_rollups() == []
+        assert db.aggregate_by_fornecedor() == {"Forn A": 0.7, "Forn B": 25.2}
+
+        b_id = next(row["id"] for row in db.get_lancamentos() if row["chave_nfe"] == "B")
+        db.delete_lancamento(b_id)
+        assert db.verify_rollups() == []
+        assert db.aggregate_by_tipo() == {"Entrada": (5.7, 2)}
+        assert {mes for mes, _, _ in db.aggregate_by_month()} == {"2024-02", "2024-03"}
+
+        # Uma alteração feita fora do DatabaseManager também passa pelos triggers.
+        conn = db._get_connection()
+        conn.execute("UPDATE lancamentos_base SET valor = 1.3, data_lancamento = '2024-04-02' WHERE chave_nfe = ''")
+        conn.commit()
+        assert db.verify_rollups() == []
+        assert db.aggregate_by_tipo() == {"Entrada": (6.3, 2)}
+    finally:
+        db.close()
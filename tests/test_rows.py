@@ -0,0 +1,39 @@
+from pathlib import Path
+import pytest
+from benchmarks.generators import lancamentos
+from src.database.manager import DatabaseManager
+from src.database.rows import ROW_COLUMNS, LancamentoRow
+
+@pytest.fixture
+def db(tmp_path: Path):
+    db = DatabaseManager(db_path=tmp_path / "notas.db")
+    db.insert_lancamentos_many(lancamentos(500, days=120, suppliers=10))
+    yield db
+    db.close()
+
+def test_linhas_compactas_iguais_aos_dicionarios(db: DatabaseManager) -> None:
+    filtros = {"start_date": "2015-02-01", "end_date": "2015-03-31"}
+    consultas = [
+        (db.get_lancamentos(), db.get_lancamentos(compact=True)),
+        (db.get_lancamentos(**filtros), db.get_lancamentos(**filtros, compact=True)),
+        (list(db.iter_lancamentos(chunk_size=33)), list(db.iter_lancamentos(chunk_size=33, compact=True))),
+        (db.get_lancamentos_page(limit=50), db.get_lancamentos_page(limit=50, compact=True)),
+    ]
+    for dicts, rows in consultas:
+        assert rows and all(isinstance(row, LancamentoRow) for row in rows)
+        assert [row.to_dict() for row in rows] == dicts
+        assert [dict(row) for row in rows] == dicts
+        assert [LancamentoRow.from_dict(data) for data in dicts] == rows
+
+def test_acesso_por_nome_indice_e_get(db: DatabaseManager) -> None:
+    rows = db.get_lancamentos(compact=True)
+    row = rows[0]
+    assert tuple(row.keys()) == ROW_COLUMNS
+    assert row["valor"] == row.valor == row[ROW_COLUMNS.index("valor")]
+    assert row.get("tipo") == row.tipo
+    assert row.get("inexistente", "padrão") == "padrão"
+    with pytest.raises(KeyError):
+        row["inexistente"]
+    # Textos repetidos de uma mesma consulta são uma única cópia.
+    mesmo_tipo = [other for other in rows if other.tipo == row.tipo]
+    assert all(other.tipo is row.tipo for other in mesmo_tipo)
@@ -0,0 +1,89 @@
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict
+import pytest
+from src.database.manager import DatabaseManager
+from src.ui import screens
+from src.ui.screens import NotaFiscalEntryScreen
+
+class _FakeEntry:
+    """Entry/Combobox mínimos, sem precisar de um display."""
+
+    def __init__(self, text: str = "") -> None:
+        self.text = text
+        self.options: Dict[str, Any] = {}
+
+    def get(self) -> str:
+        return self.text
+
+    def set(self, text: str) -> None:
+        self.text = text
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.options[key] = value
+
+def _screen(db: DatabaseManager) -> NotaFiscalEntryScreen:
+    screen = NotaFiscalEntryScreen.__new__(NotaFiscalEntryScreen)
+    screen.controller = SimpleNamespace(db_manager=db)
+    screen.run_async = lambda fn, on_success, **kwargs: on_success(fn())  # type: ignore[method-assign]
+    screen._lojas_map, screen._fornecedores_map = {}, {}
+    screen._clear_entries = lambda: None  # type: ignore[method-assign]
+    screen.entries = {
+        name: _FakeEntry() for name in ("loja", "fornecedor", "documento", "nfe", "chave_nfe", "valor", "data_lancamento", "vencimento", "observacao", "tipo")
+    }
+    return screen
+
+def test_fornecedores_com_o_mesmo_nome_gravam_o_cnpj_escolhido(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(screens.messagebox, "showinfo", lambda *args: None)
+    db = DatabaseManager(db_path=tmp_path / "notas.db")
+    try:
+        # O cadastro manual recusa nomes repetidos, mas as importações gravam cada par (nome, CNPJ) da nota.
+        db.insert_lancamentos_many([
+            {"loja": "Loja", "cnpj_loja": "1", "fornecedor": "Distribuidora", "cnpj_forn": cnpj, "chave_nfe": cnpj,
+             "valor": 1.0, "data_lancamento": "2024-01-01", "tipo": "Entrada"}  # type: ignore[misc]
+            for cnpj in ("11", "22")
+        ])
+        screen = _screen(db)
+        screen.load_data()
+        assert screen.entries["fornecedor"].options["values"] == ["Distribuidora (11)", "Distribuidora (22)"]
+
+        for name, text in (("loja", "Loja (1)"), ("fornecedor", "Distribuidora (22)"), ("valor", "10,50"),
+                           ("data_lancamento", "05/01/2024"), ("tipo", "Entrada")):
+            screen.entries[name].set(text)
+        screen._save_lancamento()
+        row = db.get_lancamentos(limit=1)[0]
+        assert (row["fornecedor"], row["cnpj_forn"], row["cnpj_loja"], row["valor"]) == ("Distribuidora", "22", "1", 10.5)
+    finally:
+        db.close()
+
+class _CountingScreen(screens.BaseScreen):
+    data_dependencies = ("lancamentos",)
+
+    def load_data(self) -> None:
+        self.loads += 1
+
+def test_tela_so_recarrega_quando_suas_tabelas_mudam(tmp_path: Path) -> None:
+    db = DatabaseManager(db_path=tmp_path / "notas.db")
+    try:
+        screen = _CountingScreen.__new__(_CountingScreen)
+        screen.controller = SimpleNamespace(db_manager=db)
+        screen._loaded_versions = None
+        screen.loads = 0
+
+        screen.activate()
+        screen.activate()
+        assert screen.loads == 1
+
+        db.insert_entity("lojas", "Loja Nova", "9")
+        screen.activate()
+        assert screen.loads == 1
+
+        db.insert_lancamento({
+            "loja": "Loja Nova", "cnpj_loja": "9", "fornecedor": "Forn", "cnpj_forn": "2", "documento": "", "nfe": "",
+            "chave_nfe": "", "valor": 1.0, "data_lancamento": "2024-01-01", "vencimento": None, "observacao": None, "tipo": "Entrada",
+        })
+        screen.activate()
+        screen.activate()
+        assert screen.loads == 2
+    finally:
+        db.close()
@@ -0,0 +1,57 @@
+from pathlib import Path
+from typing import Any, Dict, Optional
+import pytest
+from src.database import search
+from src.database.manager import DatabaseManager
+
+def _lancamento(chave: str, fornecedor: str, observacao: Optional[str] = None, valor: float = 10.0) -> Dict[str, Any]:
+    return {
+        "loja": "Loja Centro", "cnpj_loja": "1", "fornecedor": fornecedor, "cnpj_forn": fornecedor,
+        "documento": "NF-e", "nfe": chave, "chave_nfe": chave, "valor": valor,
+        "data_lancamento": "2024-01-10", "vencimento": None, "observacao": observacao, "tipo": "Entrada",
+    }
+
+def _chaves(db: DatabaseManager, query: str) -> list:
+    return [row["chave_nfe"] for row in db.search_lancamentos(query)]
+
+def _verificar_indice(db: DatabaseManager) -> None:
+    # Com rank = 1, o integrity-check compara o índice com o conteúdo atual de lancamentos.
+    conn = db._get_connection()
+    conn.execute(f"INSERT INTO {search.SEARCH_TABLE} ({search.SEARCH_TABLE}, rank) VALUES ('integrity-check', 1)")
+    conn.commit()
+
+@pytest.fixture
+def db(tmp_path: Path):
+    db = DatabaseManager(db_path=tmp_path / "notas.db")
+    db.insert_lancamento(_lancamento("C1", "Água Pura Distribuidora", "água mineral sem gás, galão de água"))
+    db.insert_lancamento(_lancamento("C2", "Padaria Pão Quente", "pães, bolos e café; entrega na segunda; garrafas de agua"))
+    db.insert_lancamento(_lancamento("C3", "Mercado Central", "produtos de limpeza"))
+    db.insert_lancamento(_lancamento("C4", "Aguas Claras Bebidas"))
+    yield db
+    db.close()
+
+def test_busca_por_prefixo_sem_acentos_e_por_relevancia(db: DatabaseManager) -> None:
+    # C1 tem "água" no fornecedor e duas vezes numa observação curta: vem antes das mais recentes.
+    assert _chaves(db, "agua") == ["C1", "C4", "C2"]
+    assert _chaves(db, "agua min") == ["C1"]
+    assert _chaves(db, "pao cafe") == ["C2"]
+    assert set(_chaves(db, "centro")) == {"C1", "C2", "C3", "C4"}
+    assert _chaves(db, "   ") == []
+
+def test_indice_acompanha_exclusao_e_substituicao(db: DatabaseManager) -> None:
+    ids = {row["chave_nfe"]: row["id"] for row in db.get_lancamentos()}
+    db.delete_lancamento(ids["C1"])
+    assert _chaves(db, "agua") == ["C4", "C2"]
+    assert _chaves(db, "mineral") == []
+
+    # Substituir pela mesma chave tira do índice o texto antigo e inclui o novo.
+    db.insert_lancamentos_many([_lancamento("C3", "Distribuidora Norte", "caixas de água")], on_conflict="replace")
+    assert _chaves(db, "limpeza") == []
+    assert _chaves(db, "mercado") == []
+    assert _chaves(db, "norte") == ["C3"]
+    assert set(_chaves(db, "agua")) == {"C2", "C3", "C4"}
+    _verificar_indice(db)
+
+    db.rebuild_search_index()
+    assert set(_chaves(db, "agua")) == {"C2", "C3", "C4"}
+    _verificar_indice(db)
@@ -0,0 +1,10 @@
+from pathlib import Path
+from benchmarks.generators import write_nfe_files
+from src.services.xml_importer import XMLImporter, PARSER_MODES
+
+def test_modos_extraem_os_mesmos_dados_e_itens(tmp_path: Path) -> None:
+    paths = [str(p) for p in write_nfe_files(tmp_path, 5, items=3)]
+    resultados = {mode: [XMLImporter(mode).parse_xml_with_items(p) for p in paths] for mode in PARSER_MODES}
+    assert resultados["padrao"] == resultados["xpath"] == resultados["iterparse"]
+    assert all(len(itens) == 3 for _, itens in resultados["xpath"])
+    assert [dados for dados, _ in resultados["xpath"]] == [XMLImporter("xpath").parse_xml(p) for p in paths]